@@ -0,0 +1,116 @@
+"""
+Mémoire et temps de chargement de la table météo, un processus par variante
+
+Le pic de RSS (ru_maxrss) n'est mesurable qu'une fois par processus :
+chaque variante de chargement est donc exécutée dans un interpréteur neuf.
+
+Variantes:
+    float64  lecture pandas par défaut (float64) puis préparation
+    numpy    chargement par défaut (float32 et catégories dès la lecture Arrow)
+    pyarrow  ArrowDtype de bout en bout (dtype_backend='pyarrow')
+    snapshot instantané Arrow projeté en mémoire (core.snapshot), écrit au
+             premier passage puis relu par un processus neuf
+
+Usage:
+    python -m benchmarks.memory numpy data/raw/meteo_sample.parquet
+"""
+
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+VARIANTS = ['float64', 'numpy', 'pyarrow', 'snapshot']
+
+SNAPSHOT_DIR = Path(tempfile.gettempdir()) / 'meteo_benchmark_snapshots'
+
+
+def _status_mb(key: str) -> float:
+    """Valeur de /proc/self/status en Mo (0 hors Linux)"""
+    status = Path('/proc/self/status')
+    if status.exists():
+        for line in status.read_text().splitlines():
+            if line.startswith(f'{key}:'):
+                return int(line.split()[1]) / 1024
+    return 0.0
+
+
+def _rss_mb() -> float:
+    """Pic de RSS du processus (Mo)"""
+    # VmHWM repart de zéro à l'exec, contrairement à ru_maxrss hérité du parent
+    peak = _status_mb('VmHWM')
+    if peak:
+        return peak
+
+    # ru_maxrss est en kilo-octets sous Linux, en octets sous macOS
+    scale = 1 if sys.platform == 'darwin' else 1024
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale / 2**20
+
+
+def measure(variant: str, path: str) -> dict:
+    """
+    Charge la table selon une variante et mesure temps, pic de RSS et taille
+
+    Returns:
+        Dictionnaire {'secondes', 'rss_pic_mb', 'prive_mb', 'dataframe_mb', 'lignes'}
+        (prive_mb : mémoire anonyme, non partageable entre processus)
+    """
+    sys.path.insert(0, str(ROOT))
+    os.environ.setdefault('METEO_PROFILING', '0')
+
+    import pandas as pd
+    from core import loader, snapshot
+    from core.fingerprint import file_fingerprint
+
+    snapshot_file = snapshot.snapshot_path(path, file_fingerprint(path), SNAPSHOT_DIR)
+    before = _rss_mb()
+    anon = _status_mb('RssAnon')
+    start = time.perf_counter()
+
+    if variant == 'float64':
+        df = loader.reduce_memory_usage(loader.prepare_meteo(pd.read_parquet(path)))
+    elif variant == 'snapshot':
+        if not snapshot_file.exists():
+            snapshot.write_snapshot(loader._read_meteo(path), snapshot_file)
+        df = snapshot.read_snapshot(snapshot_file)
+    else:
+        df = loader._read_meteo(path, dtype_backend=variant)
+
+    return {
+        'secondes': round(time.perf_counter() - start, 3),
+        'rss_pic_mb': round(_rss_mb() - before, 1),
+        'prive_mb': round(_status_mb('RssAnon') - anon, 1),
+        'dataframe_mb': round(df.memory_usage(deep=True).sum() / 2**20, 1),
+        'lignes': len(df),
+    }
+
+
+def run_variants(path: str, variants: list = VARIANTS) -> dict:
+    """
+    Mesure chaque variante dans un sous-processus
+
+    Returns:
+        Dictionnaire {variante: mesures}
+    """
+    results = {}
+    if 'snapshot' in variants:
+        # Premier passage : écriture de l'instantané, non mesuré
+        subprocess.run([sys.executable, '-m', 'benchmarks.memory', 'snapshot', str(path)],
+                       cwd=ROOT, capture_output=True, check=True)
+    for variant in variants:
+        output = subprocess.run(
+            [sys.executable, '-m', 'benchmarks.memory', variant, str(path)],
+            cwd=ROOT, capture_output=True, text=True, check=True
+        ).stdout
+        results[variant] = json.loads(output.strip().splitlines()[-1])
+    return results
+
+
+if __name__ == '__main__':
+    print(json.dumps(measure(sys.argv[1], sys.argv[2])))
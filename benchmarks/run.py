@@ -0,0 +1,397 @@
+"""
+Benchmarks hors ligne des couches données et graphiques
+
+Les tables synthétiques (benchmarks.synthetic) sont générées à la taille
+demandée, puis chaque opération est chronométrée sans serveur Streamlit
+(le cœur de calcul est appelé directement, sans cache, pour mesurer le
+calcul réel).
+
+Usage:
+    python -m benchmarks.run --stations 50 --years 10 --save
+    python -m benchmarks.run --compare --tolerance 0.25
+    python -m benchmarks.run --memory
+
+--save écrit la référence JSON ; --compare relit la référence et termine
+avec le code 1 si une opération a régressé au-delà de la tolérance.
+--memory ajoute le pic de RSS et le temps de chargement de chaque variante
+de types (benchmarks.memory).
+"""
+
+import argparse
+import importlib.util
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+# Les spans du profileur ne sont pas utiles ici
+os.environ.setdefault('METEO_PROFILING', '0')
+# ColumnStore mesuré sans instantané partagé (mesuré à part, load_data[instantané])
+os.environ.setdefault('METEO_SNAPSHOT', '0')
+
+import numpy as np
+import pandas as pd
+import streamlit.logger
+
+# Avertissements du mode sans serveur des pages importées ("No runtime found"...)
+streamlit.logger.set_log_level('error')
+
+from benchmarks.memory import run_variants
+from benchmarks.synthetic import make_meteo, make_incendies
+
+BASELINE_FILE = 'logs/benchmark_baseline.json'
+
+
+def load_page(filename: str):
+    """Importe un module de pages/ (noms de fichiers non importables tels quels)"""
+    path = ROOT / 'pages' / filename
+    spec = importlib.util.spec_from_file_location(f"bench_{path.stem}", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def uncached(func):
+    """Fonction sous-jacente d'une fonction mise en cache (memoize, st.cache_*)"""
+    return getattr(func, '__wrapped__', func)
+
+
+def quality_loop(df: pd.DataFrame) -> pd.DataFrame:
+    """Masquage qualité colonne par colonne (.loc), référence de filter_by_quality"""
+    from core.quality import quality_pairs
+    from utils.constants import QUALITY_RULES
+
+    df_filtered = df.copy()
+    for variable, qcol in quality_pairs(df.columns):
+        codes = QUALITY_RULES.get(variable, QUALITY_RULES['default'])
+        flags = df_filtered[qcol]
+        df_filtered.loc[flags.notna() & ~flags.isin(codes), variable] = np.nan
+    return df_filtered
+
+
+def _count(result):
+    if isinstance(result, (pd.DataFrame, pd.Series, np.ndarray, list, dict)):
+        return len(result)
+    return None
+
+
+def time_case(func, repeat: int = 3) -> dict:
+    """
+    Chronomètre une opération (meilleur temps et médiane)
+
+    Args:
+        func: Callable sans argument
+        repeat: Nombre d'exécutions
+
+    Returns:
+        Dictionnaire {'min_ms', 'median_ms', 'rows'}
+    """
+    timings = []
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter_ns()
+        result = func()
+        timings.append((time.perf_counter_ns() - start) / 1e6)
+
+    return {
+        'min_ms': round(min(timings), 3),
+        'median_ms': round(statistics.median(timings), 3),
+        'rows': _count(result),
+    }
+
+
+def build_cases(parquet_path: str, fires: pd.DataFrame) -> list:
+    """
+    Liste des opérations chronométrées
+
+    Args:
+        parquet_path: Fichier météo synthétique
+        fires: Table d'incendies synthétique
+
+    Returns:
+        Liste de (nom, callable)
+    """
+    from core import loader, preprocessing, snapshot
+    from core.downsampling import lttb_indices, minmax_indices
+    from core.performance import stratified_sample, limit_map_markers
+    from core.dry_spells import dry_spells, dry_streak
+    from core.fire_join import station_locations, commune_station_map, join_fire_weather
+    from core.fwi import compute_fwi
+    from core.query import MeteoQuery
+    from core.normals import compute_normals
+    from core.quantiles import DEFAULT_PERCENTILES, percentiles, grouped_percentiles, build_quantile_cube, box_stats, histogram
+    from components.charts import box_figure, histogram_figure
+    import plotly.express as px
+    from core.wind_rose import compute_wind_rose, compute_wind_roses, build_wind_rose_cube
+
+    # Lecture sans cache ni instantané ; l'instantané est mesuré à part
+    load = loader._read_meteo
+    df = load(parquet_path)
+    snapshot_file = snapshot.write_snapshot(
+        df, snapshot.snapshot_path(parquet_path, 'benchmark', Path(parquet_path).parent))
+    df_raw = pd.read_parquet(parquet_path)
+
+    stations = df['NUM_POSTE'].unique()
+    annees = sorted(df['annee'].unique())
+    df_daily = df.groupby('date')['TX'].mean()
+    date_mid = df['date'].min() + (df['date'].max() - df['date'].min()) / 2
+    df_jour = df[df['date'] == date_mid]
+
+    page_carte = load_page('1__Carte_Interactive.py')
+    page_temperatures = load_page('3__Températures.py')
+    page_extremes = load_page('7__Événements_Extrêmes.py')
+    page_incendies = load_page('Analyse_Incendies.py')
+
+    cube = build_wind_rose_cube(df_raw, 'FFM', 'DXY')
+    quantile_cube = build_quantile_cube(df, 'TX')
+    query = MeteoQuery(parquet_path)
+    station_year = {'TX': 'mean', 'TN': 'min', 'RR': 'sum', 'FFM': 'std'}
+
+    # Communes synthétiques : centroïdes tirés dans l'emprise des stations
+    rng = np.random.default_rng(0)
+    communes = fires[['Code INSEE', 'Département']].drop_duplicates('Code INSEE')
+    centroids = pd.DataFrame({
+        'insee': communes['Code INSEE'].to_numpy(),
+        'dep': communes['Département'].to_numpy(),
+        'LAT': rng.uniform(df['LAT'].min(), df['LAT'].max(), len(communes)),
+        'LON': rng.uniform(df['LON'].min(), df['LON'].max(), len(communes)),
+    })
+    locations = station_locations(df)
+    mapping = commune_station_map(centroids, locations)
+
+    cases = [
+        ('load_data', lambda: load(parquet_path)),
+        ('load_data[instantané]', lambda: snapshot.read_snapshot(snapshot_file)),
+        ('load_data[projection page]', lambda: loader.ColumnStore(
+            parquet_path, 'benchmark-projection').get(['TN', 'TX', 'TM', 'date'])),
+        ('load_data[colonnes+années]', lambda: load(
+            parquet_path, ['NUM_POSTE', 'NOM_USUEL', 'AAAAMMJJ', 'TX', 'TN', 'RR'],
+            annees[-3:])),
+        ('filter_by_quality', lambda: loader.filter_by_quality(df)),
+        ('filter_by_quality[boucle .loc]', lambda: quality_loop(df)),
+
+        ('pandas.groupby[station×année]', lambda: df.groupby(['NUM_POSTE', 'annee']).agg(station_year)),
+        ('query.aggregate[station×année]', lambda: query.aggregate(['NUM_POSTE', 'annee'], station_year)),
+        ('query.scan[colonnes+années]', lambda: query.scan(
+            ['NUM_POSTE', 'NOM_USUEL', 'AAAAMMJJ', 'TX', 'TN', 'RR'], years=annees[-3:])),
+
+        ('fwi.compute_fwi', lambda: compute_fwi(df, workers=1)),
+        ('dry_spells.dry_streak', lambda: dry_streak(df)),
+        ('dry_spells.dry_spells', lambda: dry_spells(df)),
+        ('fire_join.commune_station_map', lambda: commune_station_map.__wrapped__(centroids, locations)),
+        ('fire_join.join_fire_weather', lambda: join_fire_weather(fires, df, mapping)),
+
+        ('preprocessing.filter_by_date_range', lambda: preprocessing.filter_by_date_range(
+            df, df['date'].min(), date_mid)),
+        ('preprocessing.filter_by_stations', lambda: preprocessing.filter_by_stations(
+            df, list(stations[: len(stations) // 2]))),
+        ('preprocessing.filter_by_altitude', lambda: preprocessing.filter_by_altitude(
+            df, 0, 800)),
+        ('preprocessing.filter_by_region', lambda: preprocessing.filter_by_region(
+            df, ["Provence-Alpes-Côte d'Azur"])),
+        ('preprocessing.aggregate_by_period', lambda: preprocessing.aggregate_by_period(
+            df, 'MS')),
+        ('preprocessing.aggregate_by_station', lambda: preprocessing.aggregate_by_station(df)),
+        ('preprocessing.calculate_monthly_stats', lambda: preprocessing.calculate_monthly_stats(
+            df, 'TX')),
+        ('preprocessing.detect_extreme_events[canicule]', lambda: preprocessing.detect_extreme_events(
+            df, 'canicule', 35, 3)),
+        ('preprocessing.detect_extreme_events[forte_pluie]', lambda: preprocessing.detect_extreme_events(
+            df, 'forte_pluie', 50)),
+
+        ('extremes.detect_extreme_events[TX]', lambda: page_extremes.detect_extreme_events(df, 'TX', 'extrême')),
+        ('extremes.detect_extreme_events[RR]', lambda: page_extremes.detect_extreme_events(df, 'RR', 'extrême')),
+        ('extremes.classify_extremes[TX]', lambda: page_extremes.classify_extremes(df['TX'], 'TX')),
+        ('extremes.create_frequency_analysis[TX]', lambda: page_extremes.create_frequency_analysis(df, 'TX')),
+
+        ('normals.compute_normals', lambda: compute_normals(df_raw)),
+
+        ('pandas.quantile[boucle centiles]', lambda: [df['TX'].quantile(p / 100) for p in DEFAULT_PERCENTILES]),
+        ('quantiles.percentiles', lambda: percentiles(df['TX'])),
+        ('pandas.groupby.quantile[station]', lambda: df.groupby('NUM_POSTE')['TX'].quantile(
+            np.array(DEFAULT_PERCENTILES) / 100)),
+        ('quantiles.grouped_percentiles[station]', lambda: grouped_percentiles(df['TX'], df['NUM_POSTE'])),
+        ('quantiles.build_quantile_cube', lambda: build_quantile_cube(df, 'TX')),
+        ('numpy.nanpercentile[stations×années]', lambda: np.nanpercentile(
+            df['TX'].to_numpy(dtype=np.float64, na_value=np.nan)[
+                df['NUM_POSTE'].isin(stations[::2]).to_numpy() & df['annee'].isin(annees[-5:]).to_numpy()],
+            DEFAULT_PERCENTILES)),
+        ('quantiles.cube.percentiles', lambda: quantile_cube.percentiles(
+            stations=stations[::2], years=annees[-5:])),
+        ('plotly.px.box[mois]', lambda: px.box(df, x='mois', y='TX').to_json()),
+        ('quantiles.box_stats+box_figure[mois]', lambda: box_figure(*box_stats(df['TX'], df['mois'])).to_json()),
+        ('downsampling.lttb[série quotidienne]', lambda: lttb_indices(df_daily.index, df_daily.to_numpy())),
+        ('downsampling.minmax[série quotidienne]', lambda: minmax_indices(df_daily.to_numpy())),
+        ('temperatures.create_moyennes_mobiles', lambda: page_temperatures.create_moyennes_mobiles(df, 'TX').to_json()),
+        ('pandas.groupby.apply(sample)[annee]', lambda: df.groupby('annee', group_keys=False).apply(
+            lambda x: x.sample(min(len(x), 10000 // df['annee'].nunique()), random_state=42))),
+        ('performance.stratified_sample[annee]', lambda: stratified_sample(df, 10000, 'annee')),
+        ('performance.stratified_sample[annee, station]', lambda: stratified_sample(
+            df, 10000, ['annee', 'NUM_POSTE'], 'equal')),
+        ('plotly.px.histogram', lambda: px.histogram(df, x='TX', nbins=50).to_json()),
+        ('quantiles.histogram+histogram_figure', lambda: histogram_figure(*histogram(df['TX'])).to_json()),
+
+        ('wind_rose.compute_wind_rose', lambda: compute_wind_rose(df['DXY'], df['FFM'])),
+        ('wind_rose.compute_wind_roses[station]', lambda: compute_wind_roses(df, 'FFM', 'DXY', 'NUM_POSTE')),
+        ('wind_rose.build_wind_rose_cube', lambda: build_wind_rose_cube(df_raw, 'FFM', 'DXY')),
+        ('wind_rose.cube.rose', lambda: cube.rose(stations=stations[::2], years=annees[-5:])),
+
+        ('carte.create_interactive_map', lambda: page_carte.create_interactive_map(df_jour, 'TX')),
+        ('performance.limit_map_markers[grille]', lambda: limit_map_markers(
+            df_jour, max(len(df_jour) // 4, 1), variable='TX')),
+        ('carte.create_heatmap_density', lambda: page_carte.create_heatmap_density(df_jour, 'TX')),
+        ('extremes.create_extremes_map', lambda: page_extremes.create_extremes_map(df, 'TX')),
+        ('incendies.create_incendies_heatmap', lambda: page_incendies.create_incendies_heatmap(
+            page_incendies.prepare_incendies(fires))),
+    ]
+
+    shapefiles_present = all(Path(p).exists() for p in page_incendies.SHAPEFILE_SOURCES)
+    if shapefiles_present:
+        gdf = page_incendies.load_geodata()
+        cases += [
+            ('incendies.create_interactive_map', lambda: page_incendies.create_interactive_map(gdf)),
+            ('incendies.create_pente_map', lambda: page_incendies.create_pente_map(gdf)),
+        ]
+
+    return cases
+
+
+def run(n_stations: int, n_years: int, n_fires: int, repeat: int, only: str = None,
+        memory: bool = False) -> dict:
+    """
+    Exécute la suite et retourne les résultats
+
+    Args:
+        n_stations: Nombre de stations synthétiques
+        n_years: Nombre d'années synthétiques
+        n_fires: Nombre de feux synthétiques
+        repeat: Répétitions par opération
+        only: Ne garder que les opérations dont le nom contient ce texte
+        memory: Mesurer aussi la mémoire du chargement (un processus par variante)
+
+    Returns:
+        Dictionnaire sérialisable en JSON
+    """
+    os.chdir(ROOT)
+
+    print(f"🧪 Génération : {n_stations} stations × {n_years} ans, {n_fires:,} feux...")
+    meteo = make_meteo(n_stations, n_years)
+    fires = make_incendies(n_fires)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        parquet_path = str(Path(tmp) / 'meteo_benchmark.parquet')
+        meteo.to_parquet(parquet_path, compression='snappy', index=False)
+
+        cases = build_cases(parquet_path, fires)
+
+        results = {}
+        for name, func in cases:
+            if only and only not in name:
+                continue
+            results[name] = time_case(func, repeat)
+            print(f"   {name:<52} {results[name]['min_ms']:>10.1f} ms")
+
+        memoire = {}
+        if memory:
+            print("\n🧠 Chargement par variante de types (processus séparés)...")
+            memoire = run_variants(parquet_path)
+            for variant, mesure in memoire.items():
+                print(f"   {variant:<10} {mesure['secondes']:>7.2f} s | pic RSS {mesure['rss_pic_mb']:>8.1f} Mo "
+                      f"| DataFrame {mesure['dataframe_mb']:>7.1f} Mo")
+
+    return {
+        'date': datetime.now().isoformat(timespec='seconds'),
+        'taille': {'stations': n_stations, 'annees': n_years, 'lignes': len(meteo), 'feux': n_fires},
+        'environnement': {
+            'python': platform.python_version(),
+            'pandas': pd.__version__,
+            'numpy': np.__version__,
+            'machine': platform.machine(),
+        },
+        'resultats': results,
+        'memoire': memoire,
+    }
+
+
+def compare(results: dict, baseline: dict, tolerance: float = 0.25, min_delta_ms: float = 5.0) -> list:
+    """
+    Compare une exécution à la référence
+
+    Une opération régresse si elle est plus lente que la référence de plus
+    de `tolerance` (relatif) ET de plus de `min_delta_ms` (absolu, pour
+    ignorer le bruit des opérations très courtes).
+
+    Returns:
+        Liste de (nom, référence_ms, actuel_ms, ratio) des régressions
+    """
+    if baseline.get('taille') != results.get('taille'):
+        print(f"⚠️  Tailles différentes : référence {baseline.get('taille')} / actuel {results.get('taille')}")
+
+    regressions = []
+    for name, current in results['resultats'].items():
+        reference = baseline['resultats'].get(name)
+        if reference is None:
+            continue
+
+        ref_ms, cur_ms = reference['min_ms'], current['min_ms']
+        ratio = cur_ms / ref_ms if ref_ms > 0 else float('inf')
+        if ratio > 1 + tolerance and cur_ms - ref_ms > min_delta_ms:
+            regressions.append((name, ref_ms, cur_ms, ratio))
+
+        print(f"   {name:<52} {ref_ms:>10.1f} → {cur_ms:>10.1f} ms  (×{ratio:.2f})")
+
+    return regressions
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmarks hors Streamlit")
+    parser.add_argument('--stations', type=int, default=50)
+    parser.add_argument('--years', type=int, default=10)
+    parser.add_argument('--fires', type=int, default=20_000)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--only', help="Filtre sur le nom des opérations")
+    parser.add_argument('--baseline', default=BASELINE_FILE, help="Fichier de référence JSON")
+    parser.add_argument('--save', action='store_true', help="Enregistrer comme référence")
+    parser.add_argument('--compare', action='store_true', help="Comparer à la référence")
+    parser.add_argument('--tolerance', type=float, default=0.25)
+    parser.add_argument('--min-delta-ms', type=float, default=5.0)
+    parser.add_argument('--memory', action='store_true', help="Mesurer la mémoire du chargement")
+    args = parser.parse_args(argv)
+
+    results = run(args.stations, args.years, args.fires, args.repeat, args.only, args.memory)
+    baseline_path = ROOT / args.baseline
+
+    if args.compare:
+        if not baseline_path.exists():
+            print(f"❌ Référence introuvable : {baseline_path}")
+            return 2
+
+        baseline = json.loads(baseline_path.read_text(encoding='utf-8'))
+        print("\n📊 Comparaison à la référence...")
+        regressions = compare(results, baseline, args.tolerance, args.min_delta_ms)
+
+        if regressions:
+            print(f"\n❌ {len(regressions)} régression(s) :")
+            for name, ref_ms, cur_ms, ratio in regressions:
+                print(f"   {name}: {ref_ms:.1f} → {cur_ms:.1f} ms (×{ratio:.2f})")
+            return 1
+        print("\n✅ Aucune régression")
+
+    if args.save:
+        baseline_path.parent.mkdir(parents=True, exist_ok=True)
+        baseline_path.write_text(json.dumps(results, indent=2, ensure_ascii=False), encoding='utf-8')
+        print(f"\n💾 Référence enregistrée : {baseline_path}")
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,164 @@
+"""
+Jeux de données synthétiques pour les benchmarks
+
+Les tables reproduisent le schéma des fichiers Météo-France (meteo_sample)
+et Prométhée (incendies_sample) avec une taille paramétrable, afin de
+mesurer les performances sans dépendre des données réelles.
+"""
+
+import numpy as np
+import pandas as pd
+
+# Départements simulés et centre approximatif (lat, lon)
+DEPARTEMENTS = {
+    '13': (43.5, 5.1),
+    '05': (44.6, 6.3),
+    '83': (43.4, 6.2),
+    '84': (44.0, 5.2),
+    '06': (43.8, 7.1),
+}
+
+# Variables météo simulées (avec leur code qualité Q*)
+METEO_VARIABLES = ['RR', 'TN', 'TX', 'TM', 'TNTXM', 'TAMPLI', 'FFM', 'FXY', 'DXY', 'FXI', 'DXI']
+
+
+def make_meteo(n_stations: int = 50, n_years: int = 10, start_year: int = 2010,
+               seed: int = 42) -> pd.DataFrame:
+    """
+    Table météo quotidienne synthétique (stations × jours)
+
+    Args:
+        n_stations: Nombre de stations
+        n_years: Nombre d'années
+        start_year: Première année
+        seed: Graine aléatoire
+
+    Returns:
+        DataFrame au schéma de meteo_sample.parquet
+    """
+    rng = np.random.default_rng(seed)
+
+    dates = pd.date_range(f"{start_year}-01-01", f"{start_year + n_years - 1}-12-31", freq='D')
+    n_days = len(dates)
+    n = n_stations * n_days
+
+    depts = list(DEPARTEMENTS)
+    st_dept = np.array([depts[i % len(depts)] for i in range(n_stations)])
+    st_num = np.array([int(d) * 1_000_000 + 1000 + i for i, d in enumerate(st_dept)], dtype=np.int64)
+    st_lat = np.array([DEPARTEMENTS[d][0] for d in st_dept]) + rng.uniform(-0.4, 0.4, n_stations)
+    st_lon = np.array([DEPARTEMENTS[d][1] for d in st_dept]) + rng.uniform(-0.4, 0.4, n_stations)
+    st_alti = rng.integers(0, 1800, n_stations)
+
+    station = np.repeat(np.arange(n_stations), n_days)
+    day = np.tile(np.arange(n_days), n_stations)
+    doy = np.tile(dates.dayofyear.to_numpy(), n_stations)
+
+    # Cycle saisonnier + gradient altitudinal + bruit
+    saison = np.cos(2 * np.pi * (doy - 200) / 365.25)
+    alti = st_alti[station]
+    tm = 14 + 9 * saison - alti * 0.0065 + rng.normal(0, 2.5, n)
+    amplitude = np.clip(10 + 3 * saison + rng.normal(0, 2, n), 2, None)
+    tn = tm - amplitude / 2
+    tx = tm + amplitude / 2
+
+    pluie = rng.random(n) < 0.28
+    rr = np.where(pluie, rng.gamma(0.7, 9.0, n), 0.0)
+
+    ffm = rng.gamma(2.0, 1.6, n)
+    fxy = ffm * rng.uniform(1.6, 2.6, n)
+    dxy = rng.choice(np.arange(10, 370, 10), n, p=_direction_weights())
+    fxi = fxy * rng.uniform(1.0, 1.2, n)
+    dxi = (dxy + rng.choice([-10, 0, 10], n)) % 360
+    dxi = np.where(dxi == 0, 360, dxi)
+
+    values = {
+        'RR': np.round(rr, 1), 'TN': np.round(tn, 1), 'TX': np.round(tx, 1),
+        'TM': np.round(tm, 1), 'TNTXM': np.round((tn + tx) / 2, 1),
+        'TAMPLI': np.round(tx - tn, 1), 'FFM': np.round(ffm, 1),
+        'FXY': np.round(fxy, 1), 'DXY': dxy.astype(np.float64),
+        'FXI': np.round(fxi, 1), 'DXI': dxi.astype(np.float64),
+    }
+
+    df = pd.DataFrame({
+        'NUM_POSTE': st_num[station],
+        'NOM_USUEL': pd.array([f"STATION {i:04d}" for i in range(n_stations)], dtype='str')[station],
+        'LAT': np.round(st_lat[station], 4),
+        'LON': np.round(st_lon[station], 4),
+        'ALTI': alti.astype(np.int64),
+        'AAAAMMJJ': np.tile(dates.strftime('%Y%m%d').astype(np.int64).to_numpy(), n_stations),
+    })
+
+    for variable in METEO_VARIABLES:
+        valeurs = values[variable]
+        # 2 % de valeurs manquantes, codes qualité 1 (validé), 0 (douteux), 9 (brut)
+        manquant = rng.random(n) < 0.02
+        df[variable] = np.where(manquant, np.nan, valeurs)
+        df['Q' + variable] = np.where(
+            manquant, np.nan, rng.choice([1.0, 0.0, 9.0], n, p=[0.95, 0.01, 0.04])
+        )
+
+    return df
+
+
+def _direction_weights() -> np.ndarray:
+    """Mistral dominant (secteur Nord-Ouest) et brises de Sud"""
+    directions = np.arange(10, 370, 10)
+    weights = (1
+               + 4 * np.exp(-((directions - 320) / 30.0) ** 2)
+               + 1.5 * np.exp(-((directions - 160) / 40.0) ** 2))
+    return weights / weights.sum()
+
+
+def make_incendies(n_fires: int = 20_000, start_year: int = 1990, end_year: int = 2023,
+                   seed: int = 42) -> pd.DataFrame:
+    """
+    Table d'incendies synthétique
+
+    Args:
+        n_fires: Nombre de feux
+        start_year: Première année
+        end_year: Dernière année
+        seed: Graine aléatoire
+
+    Returns:
+        DataFrame au schéma de incendies_sample.parquet
+    """
+    rng = np.random.default_rng(seed)
+
+    annee = rng.integers(start_year, end_year + 1, n_fires)
+    # Saison des feux : pic estival
+    mois = rng.choice(np.arange(1, 13), n_fires,
+                      p=np.array([3, 4, 6, 5, 5, 8, 20, 22, 12, 6, 5, 4]) / 100)
+    jour = rng.integers(1, 29, n_fires)
+    heure = rng.integers(0, 24, n_fires)
+
+    depts = np.array(['13', '05', '2A', '2B', '83', '84', '06'])
+    dept = rng.choice(depts, n_fires, p=[0.3, 0.05, 0.15, 0.15, 0.2, 0.05, 0.1])
+    commune = rng.integers(1, 120, n_fires)
+
+    surface = np.round(rng.lognormal(5.5, 2.0, n_fires), 0)
+
+    alerte = pd.Series(
+        [f"{j:02d}/{m:02d}/{a} {h:02d}:00" for j, m, a, h in zip(jour, mois, annee, heure)],
+        dtype='str'
+    )
+    code_insee = pd.Series([f"{d}{c:03d}" for d, c in zip(dept, commune)], dtype='str')
+
+    return pd.DataFrame({
+        'Année': annee.astype(np.float64),
+        'Numéro': np.arange(1, n_fires + 1, dtype=np.float64),
+        'Type de feu': np.zeros(n_fires),
+        'Département': pd.Series(dept, dtype='str'),
+        'Code INSEE': code_insee,
+        'Commune': 'Commune ' + code_insee,
+        'Lieu-dit': pd.Series([None] * n_fires, dtype='str'),
+        'Code du carreau DFCI': pd.Series(['NB48G74'] * n_fires, dtype='str'),
+        'DFCI_2': pd.Series(['NB48G7'] * n_fires, dtype='str'),
+        'Alerte': alerte,
+        'mois': mois.astype(np.float64),
+        'heure': heure.astype(np.float64),
+        "Origine de l'alerte": np.full(n_fires, np.nan),
+        'Surface parcourue (m2)': surface,
+        'surf_ha': pd.Series(np.char.replace((surface / 10000).round(2).astype(str), '.', ','),
+                             dtype='str'),
+    })
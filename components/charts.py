@@ -0,0 +1,137 @@
+"""
+Graphiques réutilisables construits à partir de statistiques précalculées
+
+Les figures reçoivent des agrégats (core) plutôt que les lignes quotidiennes :
+la taille de la figure envoyée au navigateur dépend du nombre de groupes ou
+de classes, pas du nombre de mesures.
+"""
+
+import numpy as np
+import plotly.express as px
+import plotly.graph_objects as go
+from core.downsampling import downsample_indices
+from core.performance import get_performance_config
+
+
+def line_trace(x, y, method: str = 'lttb', max_points: int = None, **kwargs):
+    """
+    Trace d'une série temporelle réduite pour l'affichage (core.downsampling)
+
+    Au-delà de max_points, la série est réduite à max_points points ('lttb'
+    pour la forme, 'minmax' pour l'enveloppe et les extrêmes). Si la série
+    d'origine dépasse le seuil WebGL de get_performance_config() et que le
+    rendu 'webgl' est choisi, la trace est un go.Scattergl.
+
+    Args:
+        x: Abscisses croissantes (dates)
+        y: Valeurs
+        method: Méthode de réduction ('lttb' ou 'minmax')
+        max_points: Points conservés (défaut : 'max_line_points' de la configuration)
+        **kwargs: Propriétés de la trace (mode, name, line...)
+
+    Returns:
+        go.Scatter ou go.Scattergl
+    """
+    config = get_performance_config()
+    x, y = np.asarray(x), np.asarray(y, dtype=np.float64)
+    n_points = len(y)
+
+    if config['enable_downsampling']:
+        keep = downsample_indices(x, y, max_points or config['max_line_points'], method)
+        x, y = x[keep], y[keep]
+
+    webgl = config['chart_renderer'] == 'webgl' and n_points > config['webgl_threshold']
+    trace = go.Scattergl if webgl else go.Scatter
+    return trace(x=x, y=y, **kwargs)
+
+
+def box_figure(stats, outliers=None, colors=None, labels=None, title=None,
+               xaxis_title=None, yaxis_title=None):
+    """
+    Boîtes à moustaches à partir de statistiques précalculées (core.quantiles.box_stats)
+
+    Args:
+        stats: DataFrame indexée par groupe (q1, median, q3, lowerfence, upperfence, mean, n)
+        outliers: DataFrame (groupe, valeur) des points atypiques à afficher
+        colors: Palette, une couleur par groupe (cyclique)
+        labels: {groupe: libellé affiché} (par défaut le groupe lui-même)
+        title: Titre du graphique
+        xaxis_title: Titre de l'axe des abscisses
+        yaxis_title: Titre de l'axe des ordonnées
+
+    Returns:
+        go.Figure : une trace go.Box par groupe, plus une trace des points atypiques
+    """
+    colors = colors or px.colors.qualitative.Plotly
+    labels = labels or {}
+
+    traces = []
+    group_colors = {}
+
+    for i, (group, row) in enumerate(stats.iterrows()):
+        color = colors[i % len(colors)]
+        label = labels.get(group, group)
+        group_colors[group] = color
+
+        traces.append(go.Box(
+            x=[label],
+            q1=[row['q1']],
+            median=[row['median']],
+            q3=[row['q3']],
+            lowerfence=[row['lowerfence']],
+            upperfence=[row['upperfence']],
+            mean=[row['mean']],
+            name=str(label),
+            marker_color=color,
+            boxpoints=False,
+            hovertext=f"n = {int(row['n']):,}"
+        ))
+
+    # Points atypiques de tous les groupes dans une seule trace
+    if outliers is not None and not outliers.empty:
+        groups = outliers['groupe']
+        traces.append(go.Scatter(
+            x=groups.map(lambda g: labels.get(g, g)).to_numpy(),
+            y=outliers['valeur'].to_numpy(),
+            mode='markers',
+            marker=dict(color=groups.map(group_colors).to_numpy(), size=4, opacity=0.6),
+            showlegend=False,
+            hovertemplate='%{y:.1f}<extra>%{x}</extra>'
+        ))
+
+    fig = go.Figure(data=traces)
+    fig.update_layout(title=title, xaxis_title=xaxis_title, yaxis_title=yaxis_title)
+
+    return fig
+
+
+def histogram_figure(counts, edges, color='#3498db', title=None, xaxis_title=None,
+                     yaxis_title='Nombre de jours'):
+    """
+    Histogramme à partir d'effectifs par classe (core.quantiles.histogram)
+
+    Args:
+        counts: Effectif de chaque classe
+        edges: Bornes des classes (une de plus que les effectifs)
+        color: Couleur des barres
+        title: Titre du graphique
+        xaxis_title: Titre de l'axe des abscisses
+        yaxis_title: Titre de l'axe des ordonnées
+
+    Returns:
+        go.Figure : une trace go.Bar, une barre par classe
+    """
+    edges = np.asarray(edges, dtype=np.float64)
+
+    fig = go.Figure(go.Bar(
+        x=(edges[:-1] + edges[1:]) / 2,
+        y=counts,
+        width=np.diff(edges),
+        marker_color=color,
+        customdata=np.column_stack([edges[:-1], edges[1:]]),
+        hovertemplate='[%{customdata[0]:.4~f} ; %{customdata[1]:.4~f}[ : %{y:,}<extra></extra>'
+    ))
+
+    fig.update_layout(title=title, xaxis_title=xaxis_title, yaxis_title=yaxis_title, bargap=0)
+
+    return fig
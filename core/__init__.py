@@ -0,0 +1,7 @@
+"""
+Cœur de calcul météo / incendies, indépendant de Streamlit
+
+Les modules de ce paquet n'importent jamais streamlit : ils peuvent être
+utilisés dans un pool de processus, un traitement par lots ou la ligne de
+commande (python -m core). Les pages passent par les adaptateurs de utils/.
+"""
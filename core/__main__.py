@@ -0,0 +1,132 @@
+"""
+Interface en ligne de commande du cœur de calcul
+
+Usage:
+    python -m core ingest data/raw/departements --output data/processed/meteo --workers 8
+    python -m core append data/raw/Q_13_latest-2024-2025_RR-T-Vent.csv.gz
+    python -m core precompute data/raw/meteo.parquet --workers 3
+    python -m core fwi data/processed/meteo --workers 8
+    python -m core summary data/raw/meteo_sample.parquet
+"""
+
+import argparse
+import sys
+
+from utils.constants import METEO_DATASET_DIR
+from .fwi import FWI_FILE
+
+
+def _ingest(args) -> int:
+    from .ingest import ingest_sources
+
+    print(f"📥 Ingestion vers {args.output}...")
+    report = ingest_sources(args.sources, args.output, args.workers)
+
+    errors = [t for t in report['taches'] if t['erreur']]
+    for task in report['taches']:
+        if task['erreur']:
+            print(f"   ❌ {task['source']} : {task['erreur']}")
+        else:
+            print(f"   ✅ {task['source']} : {task['lignes']:,} lignes, "
+                  f"{task['partitions']} partitions ({task['secondes']:.1f}s)")
+
+    cpu = sum(t['secondes'] for t in report['taches'])
+    print(f"📊 {report['fichiers']} fichiers, {report['lignes']:,} lignes en {report['secondes']:.1f}s "
+          f"→ {report['lignes_par_seconde']:,.0f} lignes/s (travail cumulé {cpu:.1f}s)")
+    return 1 if errors or not report['fichiers'] else 0
+
+
+def _append(args) -> int:
+    from .incremental import append_batch
+
+    print(f"➕ Ajout de {args.batch} à {args.dataset}...")
+    report = append_batch(args.batch, args.dataset)
+
+    print(f"   ✅ {report['lignes']:,} lignes ({report['remplacees']:,} remplacées), "
+          f"{report['partitions']} partitions, {report['stations']} stations")
+    for summary in report['derives']:
+        print(f"   ✅ {summary}")
+    print(f"🔑 Empreinte {report['empreinte_avant']} → {report['empreinte_apres']} "
+          f"({report['secondes']:.1f}s)")
+    return 0
+
+
+def _precompute(args) -> int:
+    from .precompute import precompute_derived
+
+    print(f"📐 Précalcul des agrégats de {args.path}...")
+    for summary in precompute_derived(args.path, args.workers):
+        print(f"   ✅ {summary}")
+    return 0
+
+
+def _fwi(args) -> int:
+    import pandas as pd
+    from .fwi import write_fwi, fwi_class
+    from .loader import load_meteo
+
+    print(f"🔥 Indice Forêt Météo de {args.path}...")
+    df = load_meteo(args.path, columns=['TX', 'TN', 'RR', 'FFM', 'UN', 'UM', 'date'])
+    path = write_fwi(df, args.output, args.workers)
+
+    fwi = pd.read_parquet(path, columns=['FWI'])['FWI']
+    print(f"   ✅ {fwi.notna().sum():,} jours-stations calculés → {path}")
+    for label, count in pd.Series(fwi_class(fwi)).value_counts(sort=False).items():
+        print(f"   {label:<12} {count:>10,}")
+    return 0
+
+
+def _summary(args) -> int:
+    from .loader import load_meteo, get_data_summary
+
+    summary = get_data_summary(load_meteo(args.path))
+    if not summary:
+        print("⚠️  Aucune donnée")
+        return 1
+
+    print(f"📊 {summary['nb_lignes']:,} lignes | {summary['nb_stations']} stations | "
+          f"{summary['date_min']:%d/%m/%Y} → {summary['date_max']:%d/%m/%Y}")
+    for col, taux in summary['completude'].items():
+        print(f"   {col:<4} {taux:5.1f} % complet")
+    return 0
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog='python -m core', description="Cœur de calcul météo")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    ingest = commands.add_parser('ingest', help="Ingestion parallèle de fichiers départementaux")
+    ingest.add_argument('sources', nargs='+', help="Fichiers CSV, CSV.gz ou Parquet (ou dossiers)")
+    ingest.add_argument('--output', default=METEO_DATASET_DIR, help="Racine du jeu partitionné")
+    ingest.add_argument('--workers', type=int, default=None,
+                        help="Nombre de processus (1 = en série)")
+    ingest.set_defaults(func=_ingest)
+
+    append = commands.add_parser('append', help="Ajout incrémental d'un lot d'observations")
+    append.add_argument('batch', help="Fichier CSV, CSV.gz ou Parquet du lot")
+    append.add_argument('--dataset', default=METEO_DATASET_DIR, help="Racine du jeu partitionné")
+    append.set_defaults(func=_append)
+
+    precompute = commands.add_parser('precompute', help="Normales, roses des vents et quantiles précalculés")
+    precompute.add_argument('path', help="Fichier Parquet météo ou jeu partitionné")
+    precompute.add_argument('--workers', type=int, default=None,
+                            help="Nombre de processus (1 = en série)")
+    precompute.set_defaults(func=_precompute)
+
+    fwi = commands.add_parser('fwi', help="Indice Forêt Météo (FFMC, DMC, DC, ISI, BUI, FWI)")
+    fwi.add_argument('path', help="Fichier Parquet météo ou jeu partitionné")
+    fwi.add_argument('--output', default=FWI_FILE, help="Fichier Parquet de sortie")
+    fwi.add_argument('--workers', type=int, default=None,
+                     help="Nombre de processus (1 = en série)")
+    fwi.set_defaults(func=_fwi)
+
+    summary = commands.add_parser('summary', help="Résumé d'un fichier météo")
+    summary.add_argument('path', help="Fichier Parquet météo")
+    summary.set_defaults(func=_summary)
+
+    args = parser.parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
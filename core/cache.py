@@ -0,0 +1,100 @@
+"""
+Cache mémoire du cœur de calcul, indépendant de Streamlit
+
+memoize() est un cache LRU dont la clé tolère les arguments non hachables
+usuels (DataFrame, Series, tableaux NumPy, listes, dictionnaires). Il est
+local au processus : chaque worker d'un pool a son propre cache.
+"""
+
+import hashlib
+import threading
+from collections import OrderedDict
+from functools import wraps
+
+import numpy as np
+import pandas as pd
+
+
+def freeze(value):
+    """
+    Convertit un argument en clé de cache hachable
+
+    Les DataFrame et Series sont identifiés par leur forme, leurs colonnes
+    et un hash de leur contenu (pd.util.hash_pandas_object).
+    """
+    if isinstance(value, pd.DataFrame):
+        content = int(pd.util.hash_pandas_object(value, index=True).sum())
+        return ('DataFrame', value.shape, tuple(map(str, value.columns)), content)
+
+    if isinstance(value, pd.Series):
+        content = int(pd.util.hash_pandas_object(value, index=True).sum())
+        return ('Series', value.name, len(value), content)
+
+    if isinstance(value, np.ndarray):
+        digest = hashlib.blake2b(np.ascontiguousarray(value).view(np.uint8), digest_size=16).hexdigest()
+        return ('ndarray', value.shape, str(value.dtype), digest)
+
+    if isinstance(value, (list, tuple)):
+        return (type(value).__name__,) + tuple(freeze(v) for v in value)
+
+    if isinstance(value, dict):
+        return ('dict',) + tuple(sorted((str(k), freeze(v)) for k, v in value.items()))
+
+    if isinstance(value, (set, frozenset)):
+        return ('set', frozenset(freeze(v) for v in value))
+
+    try:
+        hash(value)
+        return value
+    except TypeError:
+        return ('repr', repr(value))
+
+
+def memoize(maxsize: int = 32):
+    """
+    Décorateur de cache LRU (thread-safe) à clé « gelée »
+
+    Les résultats sont partagés, pas copiés : l'appelant ne doit pas les
+    modifier en place.
+
+    Args:
+        maxsize: Nombre maximum d'entrées conservées
+
+    Usage:
+        @memoize(maxsize=4)
+        def load_table(path, fingerprint): ...
+
+        load_table.clear()
+    """
+    def decorator(func):
+        entries = OrderedDict()
+        lock = threading.Lock()
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            key = (freeze(args), freeze(kwargs))
+
+            with lock:
+                if key in entries:
+                    entries.move_to_end(key)
+                    return entries[key]
+
+            result = func(*args, **kwargs)
+
+            with lock:
+                entries[key] = result
+                entries.move_to_end(key)
+                while len(entries) > maxsize:
+                    entries.popitem(last=False)
+
+            return result
+
+        def clear():
+            with lock:
+                entries.clear()
+
+        wrapper.clear = clear
+        wrapper.cache_size = lambda: len(entries)
+        return wrapper
+
+    return decorator
@@ -0,0 +1,118 @@
+"""
+Classement vectorisé des valeurs selon des seuils de gravité
+
+Les seuils d'une variable (ex. {'extrême_chaud': 38, 'très_chaud': 32})
+sont compilés une fois en bornes triées associées à des niveaux de gravité
+(LEVEL_KEYS). Une colonne entière est ensuite classée par np.digitize, sans
+appel Python par valeur : le résultat est un Categorical ordonné
+(SEVERITY_LEVELS) et un tableau de couleurs.
+"""
+
+from functools import lru_cache
+from typing import NamedTuple
+
+import numpy as np
+import pandas as pd
+
+# Niveaux de gravité, du moins au plus grave
+SEVERITY_LEVELS = ['normal', 'modéré', 'grave', 'très_grave', 'extrême']
+
+# Clés de seuil reconnues pour chaque niveau
+LEVEL_KEYS = {
+    'extrême': ('extrême_chaud', 'tempête_violente', 'danger_extrême', 'extrême_froid', 'déluge'),
+    'très_grave': ('très_chaud', 'tempête', 'danger_très_élevé', 'très_froid', 'forte_pluie'),
+    'grave': ('coup_de_vent', 'danger_élevé', 'gel', 'pluie'),
+    'modéré': ('averse',),
+}
+
+# Couleur des valeurs manquantes ou sans seuil
+MISSING_COLOR = 'gray'
+
+
+class ThresholdBins(NamedTuple):
+    """Seuils compilés : bornes croissantes et niveau de chaque intervalle"""
+    edges: np.ndarray
+    levels: tuple
+    descending: bool
+
+
+@lru_cache(maxsize=64)
+def _compile(items: tuple, descending: bool) -> ThresholdBins:
+    thresholds = dict(items)
+    pairs = []
+    for level, keys in LEVEL_KEYS.items():
+        key = next((k for k in keys if k in thresholds), None)
+        if key is not None:
+            pairs.append((float(thresholds[key]), level))
+
+    pairs.sort()
+    edges = np.array([edge for edge, _ in pairs], dtype=np.float64)
+    levels = [level for _, level in pairs]
+
+    # Croissant : au-delà de chaque borne, le niveau de la borne
+    # Décroissant : jusqu'à chaque borne incluse, le niveau de la borne
+    if descending:
+        return ThresholdBins(edges, tuple(levels + ['normal']), True)
+    return ThresholdBins(edges, tuple(['normal'] + levels), False)
+
+
+def compile_thresholds(thresholds: dict, descending: bool = False) -> ThresholdBins:
+    """
+    Compile les seuils d'une variable en bornes triées
+
+    Args:
+        thresholds: {clé de seuil: valeur} (clés de LEVEL_KEYS, les autres sont ignorées)
+        descending: True si les valeurs basses sont les plus graves (≤ seuil),
+            False si ce sont les hautes (≥ seuil)
+
+    Returns:
+        ThresholdBins
+    """
+    return _compile(tuple(sorted(thresholds.items())), descending)
+
+
+def classify(values, bins: ThresholdBins, colors: dict = None):
+    """
+    Niveau de gravité de chaque valeur
+
+    Args:
+        values: Valeurs à classer
+        bins: Seuils compilés (compile_thresholds), None si la variable n'a pas de seuil
+        colors: {niveau: couleur}, None pour ne pas calculer les couleurs
+
+    Returns:
+        (pd.Categorical ordonné sur SEVERITY_LEVELS, tableau de couleurs ou None) ;
+        les valeurs manquantes sont 'normal', de couleur MISSING_COLOR
+    """
+    values = np.asarray(values, dtype=np.float64)
+    missing = np.isnan(values)
+    dtype = pd.CategoricalDtype(SEVERITY_LEVELS, ordered=True)
+
+    if bins is None or len(bins.edges) == 0:
+        codes = np.zeros(len(values), dtype=np.int8)
+        labels = pd.Categorical.from_codes(codes, dtype=dtype)
+        return labels, (np.full(len(values), MISSING_COLOR, dtype=object) if colors else None)
+
+    positions = np.digitize(values, bins.edges, right=bins.descending)
+    level_codes = np.array([SEVERITY_LEVELS.index(level) for level in bins.levels], dtype=np.int8)
+    codes = np.where(missing, 0, level_codes[positions])
+    labels = pd.Categorical.from_codes(codes, dtype=dtype)
+
+    if not colors:
+        return labels, None
+    palette = np.array([colors.get(level, MISSING_COLOR) for level in SEVERITY_LEVELS], dtype=object)
+    return labels, np.where(missing, MISSING_COLOR, palette[codes])
+
+
+def at_least(labels: pd.Categorical, level: str) -> np.ndarray:
+    """
+    Valeurs dont la gravité atteint au moins un niveau
+
+    Args:
+        labels: Sortie de classify
+        level: Niveau de SEVERITY_LEVELS
+
+    Returns:
+        Tableau booléen
+    """
+    return np.asarray(labels.codes) >= SEVERITY_LEVELS.index(level)
@@ -0,0 +1,67 @@
+"""
+Projection des colonnes : colonnes sources d'une page et colonnes calculées
+
+Les pages déclarent les colonnes qu'elles utilisent (brutes ou calculées).
+source_columns() les traduit en colonnes du fichier à lire, projection()
+retrouve dans la table préparée les colonnes qui en découlent. Le
+chargement à la demande (core.loader.ColumnStore) s'appuie sur ces deux
+fonctions pour ne décoder que les colonnes utiles.
+"""
+
+from .fwi import FWI_COLUMNS, HUMIDITY_COLUMNS
+
+# Colonnes toujours chargées : identité des lignes et dates
+KEY_COLUMNS = ['NUM_POSTE', 'NOM_USUEL', 'LAT', 'LON', 'ALTI', 'AAAAMMJJ']
+
+# Colonnes calculées (add_computed_columns, core.fwi, core.dry_spells) et leurs sources
+DERIVED_SOURCES = {
+    'date': 'AAAAMMJJ', 'annee': 'AAAAMMJJ', 'mois': 'AAAAMMJJ', 'jour': 'AAAAMMJJ',
+    'jour_annee': 'AAAAMMJJ', 'jour_semaine': 'AAAAMMJJ', 'nom_mois': 'AAAAMMJJ',
+    'saison': 'AAAAMMJJ', 'annee_mois': 'AAAAMMJJ',
+    'dept': 'NUM_POSTE', 'region': 'NUM_POSTE',
+    'FFM_kmh': 'FFM', 'FXY_kmh': 'FXY',
+    'jour_gel': 'TN', 'jour_canicule': 'TX', 'jour_chaleur': 'TX',
+    'jour_pluie': 'RR', 'jour_pluie_forte': 'RR', 'jours_secs': 'RR',
+    # Indices feu (core.fwi), calculés à la demande par ColumnStore
+    **{code: ('TX', 'TN', 'RR', 'FFM') for code in FWI_COLUMNS}
+}
+
+
+def _sources(column) -> tuple:
+    """Colonnes sources d'une colonne brute ou calculée"""
+    source = DERIVED_SOURCES.get(column, column)
+    return source if isinstance(source, tuple) else (source,)
+
+
+def source_columns(columns, available) -> list:
+    """
+    Colonnes du fichier nécessaires pour un ensemble de colonnes demandées
+
+    Args:
+        columns: Colonnes brutes ou calculées utilisées par la page
+        available: Colonnes présentes dans le fichier
+
+    Returns:
+        Colonnes à lire (KEY_COLUMNS en tête), dans l'ordre, sans doublon ;
+        l'humidité (UN, UM) est ajoutée aux indices feu si le fichier la fournit
+    """
+    available = set(available)
+    wanted = KEY_COLUMNS + [s for c in columns for s in _sources(c)]
+    if set(columns) & set(FWI_COLUMNS):
+        wanted += HUMIDITY_COLUMNS
+    return [c for c in dict.fromkeys(wanted) if c in available]
+
+
+def projection(sources, table_columns) -> list:
+    """
+    Colonnes de la table préparée issues de colonnes sources
+
+    Args:
+        sources: Colonnes lues (source_columns)
+        table_columns: Colonnes de la table préparée
+
+    Returns:
+        Colonnes sources et calculées correspondantes, dans l'ordre de la table
+    """
+    sources = set(sources)
+    return [c for c in table_columns if c in sources or (c in DERIVED_SOURCES and sources.issuperset(_sources(c)))]
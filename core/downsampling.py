@@ -0,0 +1,152 @@
+"""
+Réduction visuelle des séries longues : LTTB et min/max par intervalle
+
+Une courbe de 60 ans de valeurs quotidiennes compte plus de 20 000 points
+pour un graphique de quelques centaines de pixels de large. Les deux
+méthodes ramènent une série à environ 2 points par pixel en gardant la
+forme visible, là où un échantillonnage aléatoire efface les pics :
+
+- minmax_indices : minimum et maximum de chaque intervalle, l'enveloppe
+  exacte de la série (tous les extrêmes locaux visibles) ;
+- lttb_indices : Largest-Triangle-Three-Buckets, dans chaque intervalle le
+  point qui forme le plus grand triangle avec le point retenu dans
+  l'intervalle précédent et la moyenne de l'intervalle suivant.
+
+Les fonctions renvoient des positions : les abscisses (dates) se prennent
+aux mêmes positions. Les valeurs manquantes sont écartées.
+"""
+
+import numpy as np
+
+# Largeur de référence d'un graphique et points conservés par pixel
+CHART_WIDTH_PX = 1200
+POINTS_PER_PIXEL = 2
+DEFAULT_MAX_POINTS = CHART_WIDTH_PX * POINTS_PER_PIXEL
+
+# Au-delà, les traces passent en WebGL (go.Scattergl)
+WEBGL_THRESHOLD = 5000
+
+METHODS = ('lttb', 'minmax')
+
+
+def _as_float(values) -> np.ndarray:
+    """Valeurs numériques ou dates en float64 (dates : nombre de nanosecondes)"""
+    values = np.asarray(values)
+    if np.issubdtype(values.dtype, np.datetime64):
+        return values.astype('datetime64[ns]').view(np.int64).astype(np.float64)
+    return values.astype(np.float64)
+
+
+def minmax_indices(y, n_out: int = DEFAULT_MAX_POINTS) -> np.ndarray:
+    """
+    Positions du minimum et du maximum de chaque intervalle
+
+    Args:
+        y: Valeurs, dans l'ordre des abscisses
+        n_out: Nombre de points visé (n_out / 2 intervalles)
+
+    Returns:
+        Positions croissantes (premier et dernier point compris)
+    """
+    y = _as_float(y)
+    valid = np.flatnonzero(np.isfinite(y))
+    y = y[valid]
+    n = len(y)
+    if n <= n_out:
+        return valid
+
+    n_buckets = max(n_out // 2, 1)
+    size = -(-n // n_buckets)
+    n_buckets = -(-n // size)
+    pad = n_buckets * size - n
+
+    lows = np.concatenate([y, np.full(pad, np.inf)]).reshape(n_buckets, size)
+    highs = np.concatenate([y, np.full(pad, -np.inf)]).reshape(n_buckets, size)
+    start = np.arange(n_buckets) * size
+
+    selected = np.concatenate([[0, n - 1], start + lows.argmin(axis=1), start + highs.argmax(axis=1)])
+    return valid[np.unique(selected)]
+
+
+def lttb_indices(x, y, n_out: int = DEFAULT_MAX_POINTS) -> np.ndarray:
+    """
+    Positions retenues par Largest-Triangle-Three-Buckets
+
+    Le choix de chaque intervalle dépend du point retenu dans le précédent :
+    au lieu d'une boucle par intervalle, les intervalles sont calculés
+    ensemble, puis seuls ceux dont le voisin de gauche a changé sont
+    recalculés, jusqu'à stabilité. Après k passages les k premiers choix sont
+    ceux de l'algorithme séquentiel : le résultat est exactement le sien.
+
+    Args:
+        x: Abscisses croissantes (nombres ou dates)
+        y: Valeurs
+        n_out: Nombre de points conservés (premier et dernier compris)
+
+    Returns:
+        Positions croissantes
+    """
+    x, y = _as_float(x), _as_float(y)
+    valid = np.flatnonzero(np.isfinite(y))
+    x, y = x[valid], y[valid]
+    n = len(y)
+    if n <= n_out:
+        return valid
+    if n_out < 3:
+        return valid[[0, n - 1]]
+
+    # n_out - 2 intervalles entre le premier et le dernier point
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+    counts = np.diff(edges)
+
+    # Moyenne de l'intervalle suivant (le dernier point pour le dernier intervalle)
+    mean_x = np.add.reduceat(x[:n - 1], edges[:-1]) / counts
+    mean_y = np.add.reduceat(y[:n - 1], edges[:-1]) / counts
+    next_x = np.append(mean_x[1:], x[-1])
+    next_y = np.append(mean_y[1:], y[-1])
+
+    # Intervalles en lignes d'un tableau rectangulaire (positions hors intervalle masquées)
+    positions = edges[:-1, None] + np.arange(counts.max())
+    inside = positions < edges[1:, None]
+    positions = np.minimum(positions, n - 1)
+    bucket_x, bucket_y = x[positions], y[positions]
+
+    # Premier passage : tous les intervalles ; ensuite seulement ceux dont le
+    # choix de l'intervalle précédent a changé
+    selected = edges[:-1].copy()
+    previous = np.concatenate([[0], selected[:-1]])
+    rows = np.arange(len(counts))
+    while len(rows):
+        ax, ay = x[previous[rows]][:, None], y[previous[rows]][:, None]
+        area = np.abs((ax - next_x[rows, None]) * (bucket_y[rows] - ay)
+                      - (ax - bucket_x[rows]) * (next_y[rows, None] - ay))
+        area[~inside[rows]] = -1
+        chosen = positions[rows, area.argmax(axis=1)]
+
+        moved = chosen != selected[rows]
+        changed = rows[moved]
+        selected[changed] = chosen[moved]
+        rows = changed[changed < len(counts) - 1] + 1
+        previous[rows] = selected[rows - 1]
+
+    return valid[np.concatenate([[0], selected, [n - 1]])]
+
+
+def downsample_indices(x, y, n_out: int = DEFAULT_MAX_POINTS, method: str = 'lttb') -> np.ndarray:
+    """
+    Positions à conserver pour tracer une série
+
+    Args:
+        x: Abscisses croissantes (nombres ou dates)
+        y: Valeurs
+        n_out: Nombre de points visé
+        method: 'lttb' (forme de la courbe) ou 'minmax' (enveloppe, extrêmes)
+
+    Returns:
+        Positions croissantes
+    """
+    if method == 'lttb':
+        return lttb_indices(x, y, n_out)
+    if method == 'minmax':
+        return minmax_indices(y, n_out)
+    raise ValueError(f"Méthode de réduction inconnue : {method} (attendu : {', '.join(METHODS)})")
@@ -0,0 +1,143 @@
+"""
+Périodes sèches : jours consécutifs sans pluie par station
+
+Un jour est sec si RR <= THRESHOLDS['pluie_faible'] (même seuil que
+jour_pluie). La série courante de jours secs est calculée en une passe sur
+la table triée par (station, date), sans boucle : une série s'interrompt
+sur un jour pluvieux, une mesure RR manquante, un jour absent ou un
+changement de station. La colonne jours_secs (longueur de la série en
+cours, 0 les jours non secs) est une colonne calculée de la table commune ;
+les périodes et les maxima annuels s'en déduisent directement.
+"""
+
+import numpy as np
+import pandas as pd
+from utils.constants import THRESHOLDS
+from .profiling import profile
+
+DRY_SPELL_COLUMNS = ['jours_secs']
+
+
+def _sorted_keys(df: pd.DataFrame):
+    """Ordre (station, date), codes station et numéros de jour"""
+    station = pd.factorize(df['NUM_POSTE'])[0]
+    day = df['date'].to_numpy(dtype='datetime64[D]').astype(np.int64)
+    order = np.lexsort((day, station))
+    return order, station[order], day[order]
+
+
+def _continues(station: np.ndarray, day: np.ndarray) -> np.ndarray:
+    """Ligne triée qui suit directement la précédente (même station, jour suivant)"""
+    follows = np.zeros(len(station), dtype=bool)
+    follows[1:] = (station[1:] == station[:-1]) & (day[1:] == day[:-1] + 1)
+    return follows
+
+
+@profile('dry_spells.streak')
+def dry_streak(df: pd.DataFrame, threshold: float = THRESHOLDS['pluie_faible']) -> pd.DataFrame:
+    """
+    Longueur de la série de jours secs en cours, pour chaque ligne
+
+    Args:
+        df: Table quotidienne (NUM_POSTE, date, RR)
+        threshold: Pluie maximale d'un jour sec (mm)
+
+    Returns:
+        DataFrame (jours_secs, int16) alignée sur df
+    """
+    if df.empty or 'RR' not in df.columns:
+        return pd.DataFrame({'jours_secs': np.zeros(len(df), dtype=np.int16)}, index=df.index)
+
+    order, station, day = _sorted_keys(df)
+    rr = df['RR'].to_numpy(dtype=np.float64, na_value=np.nan)[order]
+    with np.errstate(invalid='ignore'):
+        dry = rr <= threshold
+
+    # Début de série : jour sec qui ne prolonge pas un jour sec de la veille
+    previous_dry = np.zeros(len(dry), dtype=bool)
+    previous_dry[1:] = dry[:-1]
+    start = dry & ~(previous_dry & _continues(station, day))
+
+    position = np.arange(len(dry))
+    last_start = np.maximum.accumulate(np.where(start, position, 0))
+    streak = np.where(dry, position - last_start + 1, 0)
+
+    result = np.empty(len(df), dtype=np.int16)
+    result[order] = np.minimum(streak, np.iinfo(np.int16).max)
+    return pd.DataFrame({'jours_secs': result}, index=df.index)
+
+
+def _streak(df: pd.DataFrame, threshold: float) -> pd.Series:
+    """Colonne jours_secs de la table, calculée si absente"""
+    if 'jours_secs' in df.columns and threshold == THRESHOLDS['pluie_faible']:
+        return df['jours_secs']
+    return dry_streak(df, threshold)['jours_secs']
+
+
+@profile('dry_spells.spells')
+def dry_spells(df: pd.DataFrame,
+               min_days: int = THRESHOLDS['duree_secheresse'],
+               threshold: float = THRESHOLDS['pluie_faible']) -> pd.DataFrame:
+    """
+    Périodes sèches d'au moins min_days jours
+
+    Les séries sont lues dans jours_secs : une période commencée avant le
+    début de la table filtrée garde sa durée totale.
+
+    Args:
+        df: Table quotidienne (NUM_POSTE, NOM_USUEL, date, RR ou jours_secs)
+        min_days: Durée minimale (jours)
+        threshold: Pluie maximale d'un jour sec (mm)
+
+    Returns:
+        DataFrame (NUM_POSTE, NOM_USUEL, debut, fin, duree) triée par durée décroissante
+    """
+    columns = ['NUM_POSTE', 'NOM_USUEL', 'debut', 'fin', 'duree']
+    if df.empty or 'date' not in df.columns:
+        return pd.DataFrame(columns=columns)
+
+    order, station, day = _sorted_keys(df)
+    streak = _streak(df, threshold).to_numpy()[order]
+
+    # Fin de série : jour sec non prolongé le lendemain
+    extends = np.zeros(len(streak), dtype=bool)
+    extends[:-1] = _continues(station, day)[1:] & (streak[1:] == streak[:-1] + 1)
+    ends = np.flatnonzero((streak >= max(min_days, 1)) & ~extends)
+
+    rows = order[ends]
+    duree = streak[ends].astype(np.int64)
+    fin = df['date'].to_numpy()[rows]
+
+    spells = pd.DataFrame({
+        'NUM_POSTE': df['NUM_POSTE'].to_numpy()[rows],
+        'NOM_USUEL': df['NOM_USUEL'].to_numpy()[rows] if 'NOM_USUEL' in df.columns else None,
+        'debut': fin - (duree - 1).astype('timedelta64[D]'),
+        'fin': fin,
+        'duree': duree,
+    }, columns=columns)
+    return spells.sort_values('duree', ascending=False, ignore_index=True)
+
+
+@profile('dry_spells.longest')
+def longest_dry_spell_by_year(df: pd.DataFrame, threshold: float = THRESHOLDS['pluie_faible']) -> pd.DataFrame:
+    """
+    Plus longue série sèche atteinte par station et par année
+
+    Une série à cheval sur deux années compte, pour la seconde, les jours
+    secs depuis son début (l'automne précédent prolonge la sécheresse).
+
+    Args:
+        df: Table quotidienne (NUM_POSTE, date, RR ou jours_secs)
+        threshold: Pluie maximale d'un jour sec (mm)
+
+    Returns:
+        DataFrame (NUM_POSTE, annee, plus_longue_secheresse)
+    """
+    if df.empty or 'date' not in df.columns:
+        return pd.DataFrame(columns=['NUM_POSTE', 'annee', 'plus_longue_secheresse'])
+
+    streak = _streak(df, threshold)
+    annee = df['annee'] if 'annee' in df.columns else df['date'].dt.year
+    result = streak.groupby([df['NUM_POSTE'], annee], observed=True).max()
+    result.index.names = ['NUM_POSTE', 'annee']
+    return result.rename('plus_longue_secheresse').reset_index()
@@ -0,0 +1,171 @@
+"""
+Export des données filtrées par blocs (CSV, Excel, Parquet)
+
+Les lignes sont sérialisées par tranches vers un fichier temporaire ou un
+générateur : on ne matérialise jamais la totalité du fichier en mémoire et
+rien n'est mis en cache.
+"""
+
+import tempfile
+import numpy as np
+import pandas as pd
+
+# Nombre de lignes sérialisées par bloc
+DEFAULT_CHUNK_SIZE = 50_000
+
+# Limite de lignes d'une feuille Excel (en-tête compris)
+EXCEL_MAX_ROWS = 1_048_576
+
+EXPORT_FORMATS = {
+    'CSV': {'extension': 'csv', 'mime': 'text/csv'},
+    'Excel': {'extension': 'xlsx',
+              'mime': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'},
+    'Parquet': {'extension': 'parquet', 'mime': 'application/vnd.apache.parquet'},
+}
+
+
+def _project(df: pd.DataFrame, columns: list = None) -> pd.DataFrame:
+    """Projection sur les colonnes demandées (sans copie)"""
+    if columns is None:
+        return df
+    return df[[c for c in columns if c in df.columns]]
+
+
+def iter_chunks(df: pd.DataFrame, columns: list = None, chunk_size: int = DEFAULT_CHUNK_SIZE):
+    """
+    Découpe le DataFrame en tranches de lignes
+
+    Args:
+        df: DataFrame à exporter
+        columns: Colonnes à conserver (None = toutes)
+        chunk_size: Nombre de lignes par tranche
+
+    Yields:
+        Vues successives du DataFrame projeté
+    """
+    df = _project(df, columns)
+    for start in range(0, len(df), chunk_size):
+        yield df.iloc[start:start + chunk_size]
+
+
+def iter_csv(df: pd.DataFrame, columns: list = None, chunk_size: int = DEFAULT_CHUNK_SIZE,
+             sep: str = ';'):
+    """
+    Générateur CSV par blocs (en-tête dans le premier bloc)
+
+    Args:
+        df: DataFrame à exporter
+        columns: Colonnes à conserver (None = toutes)
+        chunk_size: Nombre de lignes par bloc
+        sep: Séparateur de champs
+
+    Yields:
+        Blocs CSV encodés en UTF-8
+    """
+    header = True
+    for chunk in iter_chunks(df, columns, chunk_size):
+        yield chunk.to_csv(index=False, sep=sep, header=header).encode('utf-8')
+        header = False
+
+    if header:
+        # DataFrame vide : en-tête seul
+        yield _project(df, columns).head(0).to_csv(index=False, sep=sep).encode('utf-8')
+
+
+def _write_csv(df, fileobj, columns, chunk_size):
+    for block in iter_csv(df, columns, chunk_size):
+        fileobj.write(block)
+
+
+def _excel_value(value):
+    """Valeur compatible openpyxl (NaN/NaT → cellule vide)"""
+    if value is None or value is pd.NaT:
+        return None
+    if isinstance(value, float) and np.isnan(value):
+        return None
+    if isinstance(value, np.generic):
+        return value.item()
+    return value
+
+
+def _write_excel(df, fileobj, columns, chunk_size):
+    from openpyxl import Workbook
+
+    df = _project(df, columns)
+    if len(df) + 1 > EXCEL_MAX_ROWS:
+        raise ValueError(
+            f"{len(df):,} lignes : limite Excel de {EXCEL_MAX_ROWS - 1:,} lignes dépassée"
+        )
+
+    # Mode écriture seule : les lignes sont écrites au fil de l'eau
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet('Données')
+    sheet.append([str(c) for c in df.columns])
+
+    for chunk in iter_chunks(df, chunk_size=chunk_size):
+        for row in chunk.itertuples(index=False, name=None):
+            sheet.append([_excel_value(v) for v in row])
+
+    workbook.save(fileobj)
+
+
+def _write_parquet(df, fileobj, columns, chunk_size):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    writer = None
+    schema = None
+    try:
+        for chunk in iter_chunks(df, columns, chunk_size):
+            table = pa.Table.from_pandas(chunk, schema=schema, preserve_index=False)
+            if writer is None:
+                schema = table.schema
+                writer = pq.ParquetWriter(fileobj, schema, compression='snappy')
+            writer.write_table(table)
+
+        if writer is None:
+            pq.write_table(pa.Table.from_pandas(_project(df, columns).head(0), preserve_index=False),
+                           fileobj)
+    finally:
+        if writer is not None:
+            writer.close()
+
+
+_WRITERS = {
+    'CSV': _write_csv,
+    'Excel': _write_excel,
+    'Parquet': _write_parquet,
+}
+
+
+def write_export(df: pd.DataFrame, fmt: str, fileobj=None, columns: list = None,
+                 chunk_size: int = DEFAULT_CHUNK_SIZE):
+    """
+    Écrit le DataFrame par blocs dans un fichier (temporaire par défaut)
+
+    Args:
+        df: DataFrame à exporter
+        fmt: 'CSV', 'Excel' ou 'Parquet'
+        fileobj: Fichier binaire de destination (None = fichier temporaire)
+        columns: Colonnes à conserver (None = toutes)
+        chunk_size: Nombre de lignes par bloc
+
+    Returns:
+        Fichier positionné au début, prêt à être lu
+    """
+    if fmt not in _WRITERS:
+        raise ValueError(f"Format d'export inconnu : {fmt}")
+
+    if fileobj is None:
+        # Supprimé automatiquement à la fermeture
+        fileobj = tempfile.TemporaryFile()
+
+    _WRITERS[fmt](df, fileobj, columns, chunk_size)
+    fileobj.seek(0)
+    return fileobj
+
+
+def export_formats(n_rows: int) -> list:
+    """Formats disponibles pour un nombre de lignes donné"""
+    return [fmt for fmt in EXPORT_FORMATS
+            if fmt != 'Excel' or n_rows + 1 <= EXCEL_MAX_ROWS]
@@ -0,0 +1,97 @@
+"""
+Empreinte des sources de données pour l'invalidation des caches
+
+L'empreinte d'un fichier combine sa taille, sa date de modification et,
+pour un fichier Parquet, un hash du footer (métadonnées des row groups,
+statistiques des colonnes). Elle ne change que si le contenu change : les
+caches dérivés indexés sur elle n'ont donc pas besoin de TTL.
+
+Un dossier (jeu partitionné issu de l'ingestion) a pour empreinte le hash
+des empreintes de tous ses fichiers Parquet.
+"""
+
+import hashlib
+import os
+
+PARQUET_MAGIC = b'PAR1'
+
+# Empreinte absente : le fichier n'existe pas (encore)
+MISSING = 'absent'
+
+# Footers déjà hachés, indexés par (chemin, taille, mtime)
+_FOOTER_HASHES = {}
+
+
+def _parquet_footer_hash(path: str, size: int) -> str:
+    """Hash du footer Parquet (lecture des seuls derniers octets du fichier)"""
+    if size < 12:
+        return ''
+
+    with open(path, 'rb') as f:
+        f.seek(-8, os.SEEK_END)
+        tail = f.read(8)
+        if tail[4:] != PARQUET_MAGIC:
+            return ''
+
+        footer_len = int.from_bytes(tail[:4], 'little')
+        f.seek(-(8 + footer_len), os.SEEK_END)
+        footer = f.read(footer_len)
+
+    return hashlib.blake2b(footer, digest_size=8).hexdigest()
+
+
+def _directory_fingerprint(path: str) -> str:
+    """Empreinte d'un dossier : hash des empreintes de ses fichiers Parquet"""
+    entries = []
+    for root, dirs, files in os.walk(path):
+        dirs[:] = sorted(d for d in dirs if not d.startswith(('.', '_')))
+        for name in sorted(files):
+            if name.endswith('.parquet') and not name.startswith(('.', '_')):
+                file_path = os.path.join(root, name)
+                entries.append(f"{os.path.relpath(file_path, path)}={file_fingerprint(file_path)}")
+
+    digest = hashlib.blake2b('|'.join(entries).encode('utf-8'), digest_size=8).hexdigest()
+    return f"dir-{len(entries):x}-{digest}"
+
+
+def file_fingerprint(path) -> str:
+    """
+    Empreinte d'un fichier : taille, mtime et hash du footer Parquet
+
+    Args:
+        path: Chemin du fichier (ou dossier partitionné)
+
+    Returns:
+        Chaîne courte, MISSING si le fichier n'existe pas
+    """
+    path = os.fspath(path)
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return MISSING
+
+    if os.path.isdir(path):
+        return _directory_fingerprint(path)
+
+    key = (os.path.abspath(path), stat.st_size, stat.st_mtime_ns)
+    footer = _FOOTER_HASHES.get(key)
+
+    if footer is None:
+        footer = _parquet_footer_hash(path, stat.st_size) if path.endswith('.parquet') else ''
+        _FOOTER_HASHES[key] = footer
+
+    return f"{stat.st_size:x}-{stat.st_mtime_ns:x}-{footer}"
+
+
+def dataset_fingerprint(*paths) -> str:
+    """
+    Empreinte combinée de plusieurs fichiers (données + dérivés)
+
+    Args:
+        *paths: Chemins des fichiers constituant la source
+
+    Returns:
+        Hash hexadécimal stable tant qu'aucun fichier ne change
+    """
+    combined = '|'.join(f"{os.fspath(p)}={file_fingerprint(p)}" for p in paths)
+    return hashlib.blake2b(combined.encode('utf-8'), digest_size=8).hexdigest()
@@ -0,0 +1,332 @@
+"""
+Jointure incendies × météo : station la plus proche et météo du jour du feu
+
+Chaque feu est rattaché à sa commune (Code INSEE), chaque commune à ses
+stations les plus proches (distance orthodromique entre centroïdes, calculée
+une fois pour toutes les communes). Un feu dont la commune n'a pas de
+centroïde prend les stations du centre de son département. La météo est
+ensuite lue par recherche « as-of » sur l'index (station, jour) : dernière
+mesure de la station au plus tard le jour du feu, dans une tolérance de
+quelques jours. Tout est vectorisé sur l'ensemble des feux : une recherche
+dichotomique (np.searchsorted) par rang de station, sans fusion ligne à ligne.
+
+Quand la mesure de la station la plus proche manque pour une variable, la
+station suivante (par distance) la complète.
+"""
+
+import numpy as np
+import pandas as pd
+from .cache import memoize
+from .profiling import profile
+
+# Variables météo rattachées aux feux (colonnes brutes ou calculées de la table commune)
+FIRE_WEATHER_VARIABLES = ['TX', 'TN', 'RR', 'FFM', 'FWI', 'jours_secs']
+
+# Stations candidates par commune, distance maximale d'une station (km)
+NEAREST_STATIONS = 3
+MAX_STATION_DISTANCE_KM = 50
+
+# Écart maximal entre le jour du feu et la mesure retenue (jours)
+ASOF_TOLERANCE_DAYS = 2
+
+EARTH_RADIUS_KM = 6371.0
+
+# Taille maximale d'un bloc de distances points × stations (cellules float64)
+DISTANCE_BLOCK_CELLS = 4_000_000
+
+
+def haversine_km(lat1, lon1, lat2, lon2) -> np.ndarray:
+    """
+    Distance orthodromique entre points (degrés), avec diffusion NumPy
+
+    Args:
+        lat1, lon1: Coordonnées des premiers points
+        lat2, lon2: Coordonnées des seconds points
+
+    Returns:
+        Distances en km
+    """
+    lat1, lon1, lat2, lon2 = (np.radians(np.asarray(v, dtype=np.float64)) for v in (lat1, lon1, lat2, lon2))
+    a = (np.sin((lat2 - lat1) / 2) ** 2
+         + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2)
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0, 1)))
+
+
+def commune_centroids(gdf) -> pd.DataFrame:
+    """
+    Centroïdes des communes d'un GeoDataFrame
+
+    Les centroïdes sont calculés en Lambert 93 (EPSG:2154) puis ramenés en
+    WGS84, pour éviter le biais des centroïdes en degrés.
+
+    Args:
+        gdf: Communes (colonnes insee et dep, géométries polygonales)
+
+    Returns:
+        DataFrame (insee, dep, LAT, LON)
+    """
+    columns = {c.lower(): c for c in gdf.columns}
+    centroids = gdf.geometry.to_crs(2154).centroid.to_crs(4326)
+    return pd.DataFrame({
+        'insee': gdf[columns['insee']].astype(str).str.strip().to_numpy(),
+        'dep': gdf[columns['dep']].astype(str).str.strip().str.zfill(2).to_numpy(),
+        'LAT': centroids.y.to_numpy(),
+        'LON': centroids.x.to_numpy(),
+    })
+
+
+def station_locations(meteo: pd.DataFrame) -> pd.DataFrame:
+    """
+    Position de chaque station de la table météo
+
+    Args:
+        meteo: Table météo (NUM_POSTE, LAT, LON)
+
+    Returns:
+        DataFrame (NUM_POSTE, LAT, LON), une ligne par station
+    """
+    stations = meteo[['NUM_POSTE', 'LAT', 'LON']].dropna()
+    return stations.drop_duplicates('NUM_POSTE', ignore_index=True)
+
+
+def nearest_stations(lat, lon, stations: pd.DataFrame, k: int = NEAREST_STATIONS,
+                     max_km: float = MAX_STATION_DISTANCE_KM):
+    """
+    k stations les plus proches de chaque point
+
+    Les distances sont calculées par blocs de points (DISTANCE_BLOCK_CELLS
+    cellules au plus) : la mémoire ne croît pas avec points × stations. Dans
+    chaque bloc, np.argpartition isole les k plus proches, seuls triés.
+
+    Args:
+        lat, lon: Coordonnées des points
+        stations: Stations (station_locations)
+        k: Nombre de stations par point
+        max_km: Distance au-delà de laquelle une station est ignorée
+
+    Returns:
+        (positions dans stations, distances km), tableaux points × k ;
+        position -1 et distance NaN quand aucune station n'est assez proche
+    """
+    lat, lon = np.asarray(lat, dtype=np.float64), np.asarray(lon, dtype=np.float64)
+    station_lat = stations['LAT'].to_numpy(dtype=np.float64)[None, :]
+    station_lon = stations['LON'].to_numpy(dtype=np.float64)[None, :]
+    k = min(k, len(stations))
+
+    nearest = np.zeros((len(lat), k), dtype=np.int64)
+    nearest_km = np.full((len(lat), k), np.inf)
+    block = max(DISTANCE_BLOCK_CELLS // max(len(stations), 1), 1)
+
+    for start in range(0, len(lat) if k else 0, block):
+        rows = slice(start, start + block)
+        distances = haversine_km(lat[rows, None], lon[rows, None], station_lat, station_lon)
+
+        if k < len(stations):
+            candidates = np.argpartition(distances, k - 1, axis=1)[:, :k]
+        else:
+            candidates = np.broadcast_to(np.arange(k), distances.shape)
+        candidate_km = np.take_along_axis(distances, candidates, axis=1)
+        order = np.argsort(candidate_km, axis=1, kind='stable')
+
+        nearest[rows] = np.take_along_axis(candidates, order, axis=1)
+        nearest_km[rows] = np.take_along_axis(candidate_km, order, axis=1)
+
+    too_far = ~(nearest_km <= max_km)
+    return np.where(too_far, -1, nearest), np.where(too_far, np.nan, nearest_km)
+
+
+@memoize(maxsize=4)
+def commune_station_map(centroids: pd.DataFrame, stations: pd.DataFrame, k: int = NEAREST_STATIONS,
+                        max_km: float = MAX_STATION_DISTANCE_KM) -> pd.DataFrame:
+    """
+    Correspondance commune → stations les plus proches, avec repli départemental
+
+    Les départements apparaissent comme des « communes » de clé dep:<code>,
+    placées au centre de leurs communes : un feu sans commune reconnue y est
+    rattaché.
+
+    Args:
+        centroids: Centroïdes des communes (commune_centroids)
+        stations: Stations (station_locations)
+        k: Stations candidates par commune
+        max_km: Distance maximale d'une station
+
+    Returns:
+        DataFrame indexée par commune (insee), colonnes NUM_POSTE_<rang> (Int64,
+        NA sans station) et distance_km_<rang> pour les rangs 1 à k
+    """
+    departments = centroids.groupby('dep', observed=True)[['LAT', 'LON']].mean().reset_index()
+    places = pd.concat([
+        centroids[['insee', 'LAT', 'LON']],
+        departments.assign(insee='dep:' + departments['dep'])[['insee', 'LAT', 'LON']],
+    ], ignore_index=True).drop_duplicates('insee')
+
+    if stations.empty:
+        return pd.DataFrame(index=pd.Index(places['insee'], name='insee'))
+
+    positions, distances = nearest_stations(places['LAT'], places['LON'], stations, k, max_km)
+    codes = stations['NUM_POSTE'].to_numpy()
+
+    mapping = {}
+    for rank in range(positions.shape[1]):
+        found = positions[:, rank] >= 0
+        nearest = pd.array(codes[np.maximum(positions[:, rank], 0)], dtype='Int64')
+        nearest[~found] = pd.NA
+        mapping[f'NUM_POSTE_{rank + 1}'] = nearest
+        mapping[f'distance_km_{rank + 1}'] = distances[:, rank]
+    return pd.DataFrame(mapping, index=pd.Index(places['insee'].to_numpy(), name='insee'))
+
+
+def _on_uniques(values: pd.Series, func) -> np.ndarray:
+    """Applique func aux valeurs distinctes seulement, puis redistribue sur les lignes"""
+    codes, uniques = pd.factorize(values, use_na_sentinel=False)
+    return np.asarray(func(pd.Series(uniques)))[codes]
+
+
+def fire_dates(fires: pd.DataFrame) -> pd.Series:
+    """
+    Jour de chaque feu, lu dans l'heure d'alerte (jj/mm/aaaa hh:mm)
+
+    Seuls les jours distincts (quelques milliers pour 100 000 feux) passent
+    par l'analyse de date.
+
+    Args:
+        fires: Table des incendies (Alerte)
+
+    Returns:
+        Series datetime64 (minuit), NaT si l'alerte est illisible
+    """
+    day = fires['Alerte'].astype(str).str.strip().str[:10]
+    parsed = _on_uniques(day, lambda u: pd.to_datetime(u, format='%d/%m/%Y', errors='coerce'))
+    return pd.Series(parsed, index=fires.index, name='date_feu')
+
+
+def _fire_places(fires: pd.DataFrame, mapping: pd.DataFrame) -> pd.Index:
+    """Clé de correspondance de chaque feu : commune, à défaut département"""
+    insee = pd.Series(_on_uniques(fires['Code INSEE'], lambda u: u.astype(str).str.strip()))
+    dep = _on_uniques(fires['Département'], lambda u: 'dep:' + u.astype(str).str.strip().str.zfill(2))
+    return pd.Index(insee.where(insee.isin(mapping.index), dep))
+
+
+def _station_day_keys(station_codes: np.ndarray, days: np.ndarray, span: int) -> np.ndarray:
+    """Clé entière (station, jour) triable : code × span + jour"""
+    return station_codes.astype(np.int64) * span + days
+
+
+def asof_lookup(meteo: pd.DataFrame, stations, dates: pd.Series, variables: list,
+                tolerance_days: int = ASOF_TOLERANCE_DAYS) -> pd.DataFrame:
+    """
+    Météo de chaque (station, date) : dernière mesure au plus tard à la date
+
+    Les clés (station, jour) de la table sont triées une seule fois ; chaque
+    colonne de stations candidates est une recherche dichotomique, et ne
+    complète que les mesures encore manquantes.
+
+    Args:
+        meteo: Table météo (NUM_POSTE, date, variables)
+        stations: Station de chaque requête (NA si aucune), ou DataFrame
+            requêtes × candidates par ordre de préférence
+        dates: Date de chaque requête (NaT si inconnue)
+        variables: Colonnes à lire
+        tolerance_days: Ancienneté maximale de la mesure (jours)
+
+    Returns:
+        DataFrame (variables), une ligne par requête, NaN sans mesure
+    """
+    station_index = pd.Index(pd.unique(meteo['NUM_POSTE']))
+    meteo_station = station_index.get_indexer(meteo['NUM_POSTE'])
+    meteo_day = meteo['date'].to_numpy(dtype='datetime64[D]').astype(np.int64)
+
+    day_min = meteo_day.min()
+    last_day = int(meteo_day.max() - day_min) + tolerance_days
+    span = last_day + 1
+    keys = _station_day_keys(meteo_station, meteo_day - day_min, span)
+    order = np.argsort(keys, kind='stable')
+    keys = keys[order]
+
+    query_day = pd.Series(dates).to_numpy(dtype='datetime64[D]')
+    dated = ~np.isnat(query_day)
+    query_day = np.where(dated, query_day.astype(np.int64) - day_min, 0)
+    dated &= (query_day >= 0) & (query_day <= last_day)
+
+    columns = {v: meteo[v].to_numpy(dtype=np.float64, na_value=np.nan) for v in variables}
+    result = {v: np.full(len(query_day), np.nan) for v in variables}
+
+    candidates = stations if isinstance(stations, pd.DataFrame) else pd.DataFrame(list(stations))
+    for _, candidate in candidates.items():
+        query_station = station_index.get_indexer(pd.Index(candidate))
+        valid = dated & (query_station >= 0)
+
+        query_keys = _station_day_keys(query_station, query_day, span)
+        found = np.searchsorted(keys, query_keys, side='right') - 1
+        found_key = keys[np.maximum(found, 0)]
+        match = valid & (found >= 0) & (found_key <= query_keys) & (query_keys - found_key <= tolerance_days)
+
+        rows = order[np.maximum(found, 0)]
+        for variable, values in result.items():
+            missing = np.isnan(values)
+            values[missing] = np.where(match, columns[variable][rows], np.nan)[missing]
+
+    return pd.DataFrame(result)
+
+
+@profile('fire_join')
+def join_fire_weather(fires: pd.DataFrame, meteo: pd.DataFrame, mapping: pd.DataFrame,
+                      variables=None, tolerance_days: int = ASOF_TOLERANCE_DAYS) -> pd.DataFrame:
+    """
+    Ajoute à chaque feu la météo du jour à la station la plus proche
+
+    Args:
+        fires: Table des incendies (Code INSEE, Département, Alerte)
+        meteo: Table météo (NUM_POSTE, date et variables)
+        mapping: Correspondance commune → stations (commune_station_map)
+        variables: Variables météo à joindre (FIRE_WEATHER_VARIABLES présentes par défaut)
+        tolerance_days: Ancienneté maximale de la mesure (jours)
+
+    Returns:
+        Copie de fires avec date_feu, NUM_POSTE (Int64), distance_km (station
+        la plus proche) et les variables météo (NaN si aucune station ne les fournit)
+    """
+    if variables is None:
+        variables = [v for v in FIRE_WEATHER_VARIABLES if v in meteo.columns]
+
+    result = fires.copy()
+    result['date_feu'] = fire_dates(fires).to_numpy()
+
+    ranks = [c for c in mapping.columns if c.startswith('NUM_POSTE_')]
+    if not ranks or meteo.empty:
+        result['NUM_POSTE'] = pd.array([pd.NA] * len(result), dtype='Int64')
+        result['distance_km'] = np.nan
+        for variable in variables:
+            result[variable] = np.nan
+        return result
+
+    candidates = mapping.reindex(_fire_places(fires, mapping))
+    result['NUM_POSTE'] = candidates['NUM_POSTE_1'].array
+    result['distance_km'] = candidates['distance_km_1'].to_numpy()
+
+    # Rang 1, puis stations suivantes pour les mesures manquantes
+    weather = asof_lookup(meteo, candidates[ranks].reset_index(drop=True), result['date_feu'],
+                          variables, tolerance_days)
+
+    for variable in variables:
+        result[variable] = weather[variable].to_numpy()
+    return result
+
+
+def fire_weather_correlation(joined: pd.DataFrame, variables=None, target: str = 'surf_ha') -> pd.DataFrame:
+    """
+    Corrélations de rang (Spearman) entre la météo du jour et la surface brûlée
+
+    Args:
+        joined: Sortie de join_fire_weather
+        variables: Variables météo (FIRE_WEATHER_VARIABLES présentes par défaut)
+        target: Colonne de surface
+
+    Returns:
+        Matrice de corrélation (target et variables)
+    """
+    if variables is None:
+        variables = [v for v in FIRE_WEATHER_VARIABLES if v in joined.columns]
+    columns = [target] + list(variables) if target in joined.columns else list(variables)
+    return joined[columns].apply(pd.to_numeric, errors='coerce').corr(method='spearman')
@@ -0,0 +1,332 @@
+"""
+Indice Forêt Météo (IFM, Fire Weather Index canadien)
+
+Codes et indices de Van Wagner (1987) calculés sur la table quotidienne :
+FFMC (humidité des combustibles fins), DMC (humus), DC (sécheresse),
+ISI (propagation initiale), BUI (combustible disponible) et FWI (indice
+final). Chaque code dépend de celui de la veille : la récurrence avance
+jour par jour, mais chaque pas est une opération NumPy sur toutes les
+stations à la fois (grille jours × stations). Pour l'archive complète, les
+stations sont réparties en lots calculés dans un pool de processus.
+
+Entrées (observations quotidiennes, approximation des valeurs de midi) :
+    température   TX (°C)
+    vent          FFM (m/s, converti en km/h) ; à défaut, moyenne du jour
+                  des autres stations de la table
+    pluie         RR (mm sur 24 h)
+    humidité      voir estimate_humidity
+
+Un jour sans température, humidité, vent ou pluie laisse les codes de la
+veille inchangés et produit des indices manquants (NaN) pour ce jour.
+"""
+
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from utils.constants import PROCESSED_DIR
+from .parallel import default_workers, parallel_map
+from .profiling import profile
+
+FWI_COLUMNS = ['FFMC', 'DMC', 'DC', 'ISI', 'BUI', 'FWI']
+
+FWI_FILE = f"{PROCESSED_DIR}/ifm.parquet"
+
+# Humidité relative quotidienne Météo-France (minimale, moyenne), par priorité
+HUMIDITY_COLUMNS = ['UN', 'UM']
+
+# Humidité retenue quand ni humidité ni TN ne sont disponibles (%)
+DEFAULT_HUMIDITY = 40.0
+
+# Valeurs de démarrage standard des codes
+STARTUP = {'FFMC': 85.0, 'DMC': 6.0, 'DC': 15.0}
+
+# Durée du jour effective (DMC) et facteur de longueur du jour (DC), latitudes > 30° N
+DMC_DAY_LENGTH = np.array([6.5, 7.5, 9.0, 12.8, 13.9, 13.9, 12.4, 10.9, 9.4, 8.0, 7.0, 6.0])
+DC_DAY_LENGTH = np.array([-1.6, -1.6, -1.6, 0.9, 3.8, 5.8, 6.4, 5.0, 2.4, 0.4, -1.6, -1.6])
+
+# Classes de danger EFFIS (bornes inférieures du FWI)
+FWI_CLASSES = {
+    'Très faible': 0.0,
+    'Faible': 5.2,
+    'Modéré': 11.2,
+    'Élevé': 21.3,
+    'Très élevé': 38.0,
+    'Extrême': 50.0
+}
+
+# Au-delà, compute_fwi répartit les stations dans un pool de processus
+PARALLEL_ROWS = 2_000_000
+
+
+def estimate_humidity(df: pd.DataFrame) -> np.ndarray:
+    """
+    Humidité relative de l'après-midi (%), avec replis documentés
+
+    1. UN (humidité minimale quotidienne), puis UM (moyenne) si présentes ;
+    2. sinon TN comme approximation du point de rosée, comparé à TX :
+       HR = 100 · e(TN) / e(TX) (formule de Magnus). Le minimum nocturne
+       est proche du point de rosée par nuit claire ; en été méditerranéen
+       il le dépasse souvent, ce qui surestime l'humidité et donc sous-estime
+       légèrement le danger ;
+    3. sinon DEFAULT_HUMIDITY.
+
+    Args:
+        df: Table quotidienne (TX, TN, éventuellement UN / UM)
+
+    Returns:
+        Tableau float64 borné à [5, 100]
+    """
+    humidity = np.full(len(df), np.nan)
+
+    for col in HUMIDITY_COLUMNS:
+        if col in df.columns:
+            values = df[col].to_numpy(dtype=np.float64, na_value=np.nan)
+            humidity = np.where(np.isnan(humidity), values, humidity)
+
+    if 'TX' in df.columns and 'TN' in df.columns:
+        tx = df['TX'].to_numpy(dtype=np.float64, na_value=np.nan)
+        tn = np.minimum(df['TN'].to_numpy(dtype=np.float64, na_value=np.nan), tx)
+        magnus = 100 * np.exp(17.625 * tn / (243.04 + tn) - 17.625 * tx / (243.04 + tx))
+        humidity = np.where(np.isnan(humidity), magnus, humidity)
+
+    humidity = np.where(np.isnan(humidity), DEFAULT_HUMIDITY, humidity)
+    return np.clip(humidity, 5.0, 100.0)
+
+
+def fwi_inputs(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Entrées du calcul : température, humidité, vent (km/h), pluie
+
+    Args:
+        df: Table quotidienne (NUM_POSTE, date, TX, TN, RR, FFM)
+
+    Returns:
+        DataFrame (T, H, W, R) alignée sur df
+    """
+    nan = pd.Series(np.nan, index=df.index)
+    wind = df['FFM'].astype('float64') if 'FFM' in df.columns else nan
+
+    # Station sans anémomètre : vent moyen du jour des autres stations
+    wind = wind.fillna(wind.groupby(df['date']).transform('mean'))
+
+    return pd.DataFrame({
+        'T': df['TX'].astype('float64') if 'TX' in df.columns else nan,
+        'H': estimate_humidity(df),
+        'W': wind * 3.6,
+        'R': df['RR'].astype('float64') if 'RR' in df.columns else nan,
+    }, index=df.index)
+
+
+def ffmc_step(ffmc0, T, H, W, R):
+    """Indice d'humidité des combustibles fins (FFMC) du jour"""
+    mo = 147.2 * (101 - ffmc0) / (59.5 + ffmc0)
+
+    rf = np.maximum(R - 0.5, 1e-9)
+    wet = mo + 42.5 * rf * np.exp(-100 / (251 - mo)) * (1 - np.exp(-6.93 / rf))
+    wet = np.where(mo > 150, wet + 0.0015 * (mo - 150) ** 2 * np.sqrt(rf), wet)
+    mo = np.where(R > 0.5, np.minimum(wet, 250), mo)
+
+    ed = 0.942 * H ** 0.679 + 11 * np.exp((H - 100) / 10) + 0.18 * (21.1 - T) * (1 - np.exp(-0.115 * H))
+    ew = 0.618 * H ** 0.753 + 10 * np.exp((H - 100) / 10) + 0.18 * (21.1 - T) * (1 - np.exp(-0.115 * H))
+
+    # Séchage au-dessus de l'équilibre, humidification en dessous
+    ko = 0.424 * (1 - (H / 100) ** 1.7) + 0.0694 * np.sqrt(W) * (1 - (H / 100) ** 8)
+    kd = ko * 0.581 * np.exp(0.0365 * T)
+    k1 = 0.424 * (1 - ((100 - H) / 100) ** 1.7) + 0.0694 * np.sqrt(W) * (1 - ((100 - H) / 100) ** 8)
+    kw = k1 * 0.581 * np.exp(0.0365 * T)
+
+    m = np.where(mo > ed, ed + (mo - ed) * 10 ** -kd,
+                 np.where(mo < ew, ew - (ew - mo) * 10 ** -kw, mo))
+
+    return np.clip(59.5 * (250 - m) / (147.2 + m), 0, 101)
+
+
+def dmc_step(dmc0, T, H, R, month):
+    """Indice d'humidité de l'humus (DMC) du jour"""
+    rk = 1.894 * (np.maximum(T, -1.1) + 1.1) * (100 - H) * DMC_DAY_LENGTH[month - 1] * 1e-4
+
+    rw = 0.92 * R - 1.27
+    wmi = 20 + 280 / np.exp(0.023 * dmc0)
+    log_dmc = np.log(np.maximum(dmc0, 1e-9))
+    b = np.where(dmc0 <= 33, 100 / (0.5 + 0.3 * dmc0),
+                 np.where(dmc0 <= 65, 14 - 1.3 * log_dmc, 6.2 * log_dmc - 17.2))
+    wmr = wmi + 1000 * rw / (48.77 + b * rw)
+    wet = 43.43 * (5.6348 - np.log(np.maximum(wmr - 20, 1e-9)))
+    pr = np.maximum(np.where(R > 1.5, wet, dmc0), 0)
+
+    return np.maximum(pr + rk, 0)
+
+
+def dc_step(dc0, T, R, month):
+    """Indice de sécheresse (DC) du jour"""
+    pe = np.maximum((0.36 * (np.maximum(T, -2.8) + 2.8) + DC_DAY_LENGTH[month - 1]) / 2, 0)
+
+    rw = 0.83 * R - 1.27
+    smi = 800 * np.exp(-dc0 / 400)
+    wet = np.maximum(dc0 - 400 * np.log(1 + 3.937 * np.maximum(rw, 0) / smi), 0)
+    dr = np.where(R > 2.8, wet, dc0)
+
+    return dr + pe
+
+
+def isi_index(ffmc, W):
+    """Indice de propagation initiale (ISI)"""
+    mo = 147.2 * (101 - ffmc) / (59.5 + ffmc)
+    ff = 19.115 * np.exp(-0.1386 * mo) * (1 + mo ** 5.31 / 4.93e7)
+    return ff * np.exp(0.05039 * W)
+
+
+def bui_index(dmc, dc):
+    """Indice du combustible disponible (BUI)"""
+    total = np.maximum(dmc + 0.4 * dc, 1e-9)
+    low = 0.8 * dc * dmc / total
+    high = dmc - (1 - 0.8 * dc / total) * (0.92 + (0.0114 * dmc) ** 1.7)
+    return np.maximum(np.where(dmc <= 0.4 * dc, low, high), 0)
+
+
+def fwi_index(isi, bui):
+    """Indice Forêt Météo (FWI)"""
+    bb = np.where(bui <= 80, 0.1 * isi * (0.626 * bui ** 0.809 + 2),
+                  0.1 * isi * (1000 / (25 + 108.64 * np.exp(-0.023 * bui))))
+    return np.where(bb > 1, np.exp(2.72 * (0.434 * np.log(np.maximum(bb, 1))) ** 0.647), bb)
+
+
+def fwi_grid(T, H, W, R, months) -> dict:
+    """
+    Récurrence FWI sur une grille jours × stations
+
+    Args:
+        T, H, W, R: Tableaux (jours, stations), NaN = jour manquant
+        months: Mois de chaque jour (jours,)
+
+    Returns:
+        Dictionnaire {code: tableau (jours, stations)} pour FWI_COLUMNS
+    """
+    n_days, n_stations = T.shape
+    ffmc = np.full(n_stations, STARTUP['FFMC'])
+    dmc = np.full(n_stations, STARTUP['DMC'])
+    dc = np.full(n_stations, STARTUP['DC'])
+    out = {code: np.full((n_days, n_stations), np.nan, dtype=np.float32) for code in FWI_COLUMNS}
+
+    with np.errstate(invalid='ignore', divide='ignore', over='ignore'):
+        for day in range(n_days):
+            t, h, w, r = T[day], H[day], W[day], R[day]
+            ok = ~(np.isnan(t) | np.isnan(h) | np.isnan(w) | np.isnan(r))
+            if not ok.any():
+                continue
+
+            # Jour manquant : codes de la veille conservés
+            ffmc = np.where(ok, ffmc_step(ffmc, t, h, w, r), ffmc)
+            dmc = np.where(ok, dmc_step(dmc, t, h, r, months[day]), dmc)
+            dc = np.where(ok, dc_step(dc, t, r, months[day]), dc)
+            isi = isi_index(ffmc, w)
+            bui = bui_index(dmc, dc)
+
+            for code, values in zip(FWI_COLUMNS, (ffmc, dmc, dc, isi, bui, fwi_index(isi, bui))):
+                out[code][day] = np.where(ok, values, np.nan)
+
+    return out
+
+
+def _fwi_rows(chunk: dict) -> np.ndarray:
+    """
+    Codes FWI des lignes d'un lot de stations (exécutable dans un worker)
+
+    Args:
+        chunk: {'station', 'day', 'T', 'H', 'W', 'R'} (tableaux par ligne)
+
+    Returns:
+        Tableau (lignes, 6) dans l'ordre de FWI_COLUMNS
+    """
+    stations, station_idx = np.unique(chunk['station'], return_inverse=True)
+    first = chunk['day'].min()
+    day_idx = chunk['day'] - first
+    n_days = int(day_idx.max()) + 1
+
+    grids = {}
+    for key in ('T', 'H', 'W', 'R'):
+        grid = np.full((n_days, len(stations)), np.nan)
+        grid[day_idx, station_idx] = chunk[key]
+        grids[key] = grid
+
+    days = pd.to_datetime(first + np.arange(n_days), unit='D')
+    out = fwi_grid(grids['T'], grids['H'], grids['W'], grids['R'], days.month.to_numpy())
+
+    return np.column_stack([out[code][day_idx, station_idx] for code in FWI_COLUMNS])
+
+
+@profile('fwi')
+def compute_fwi(df: pd.DataFrame, workers: int = None) -> pd.DataFrame:
+    """
+    Codes et indices FWI de chaque ligne de la table
+
+    Les stations sont indépendantes : au-delà de PARALLEL_ROWS lignes (ou si
+    workers > 1), elles sont réparties en lots calculés par processus.
+
+    Args:
+        df: Table quotidienne (NUM_POSTE, date, TX, TN, RR, FFM, UN / UM facultatives)
+        workers: Nombre de processus (None = automatique, 1 = en série)
+
+    Returns:
+        DataFrame float32 (FFMC, DMC, DC, ISI, BUI, FWI) alignée sur df
+    """
+    if df.empty or 'date' not in df.columns:
+        return pd.DataFrame(columns=FWI_COLUMNS, index=df.index, dtype=np.float32)
+
+    inputs = fwi_inputs(df)
+    station = pd.factorize(df['NUM_POSTE'])[0]
+    day = (df['date'].to_numpy(dtype='datetime64[D]')).astype(np.int64)
+
+    if workers is None:
+        workers = 1 if len(df) < PARALLEL_ROWS else default_workers()
+    n_chunks = max(min(workers, station.max() + 1), 1)
+
+    # Lots de stations entières : la récurrence ne traverse jamais deux lots
+    chunk_of = station % n_chunks
+    rows = [np.flatnonzero(chunk_of == c) for c in range(n_chunks)]
+    chunks = [{'station': station[r], 'day': day[r],
+               **{k: inputs[k].to_numpy()[r] for k in ('T', 'H', 'W', 'R')}} for r in rows]
+
+    result = np.full((len(df), len(FWI_COLUMNS)), np.nan, dtype=np.float32)
+    for r, values in zip(rows, parallel_map(_fwi_rows, chunks, workers=workers)):
+        result[r] = values
+
+    return pd.DataFrame(result, columns=FWI_COLUMNS, index=df.index)
+
+
+def fwi_class(values) -> pd.Categorical:
+    """
+    Classe de danger EFFIS d'une série de FWI
+
+    Args:
+        values: Valeurs de FWI
+
+    Returns:
+        pd.Categorical ordonné (FWI_CLASSES), manquant si FWI manquant
+    """
+    values = np.asarray(values, dtype=np.float64)
+    labels = list(FWI_CLASSES)
+    codes = np.digitize(values, list(FWI_CLASSES.values())[1:])
+    codes = np.where(np.isnan(values), -1, codes)
+    return pd.Categorical.from_codes(codes, dtype=pd.CategoricalDtype(labels, ordered=True))
+
+
+def write_fwi(df: pd.DataFrame, path: str = FWI_FILE, workers: int = None) -> Path:
+    """
+    Calcule les indices FWI de toute l'archive et les écrit en Parquet
+
+    Args:
+        df: Table quotidienne (voir compute_fwi)
+        path: Fichier de sortie
+        workers: Nombre de processus (None = automatique, 1 = en série)
+
+    Returns:
+        Chemin écrit (NUM_POSTE, AAAAMMJJ et FWI_COLUMNS)
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+
+    result = pd.concat([df[['NUM_POSTE', 'AAAAMMJJ']], compute_fwi(df, workers)], axis=1)
+    result.to_parquet(path, index=False)
+    return path
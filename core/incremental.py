@@ -0,0 +1,254 @@
+"""
+Ingestion incrémentale d'un lot d'observations quotidiennes
+
+Un lot (nouveaux jours ou corrections) ne réécrit que les partitions
+(dept, annee) qu'il touche. Le registre des stations est mis à jour par
+fusion, et les agrégats dérivés ne sont recalculés que sur leurs tranches
+concernées : cellules station × mois des cubes de rose des vents et de
+quantiles, stations touchées des normales (si le lot recoupe leur période).
+Le fichier IFM (ifm.parquet) est supprimé : il se régénère par
+`python -m core fwi`.
+
+L'empreinte du dossier (file_fingerprint) change avec les fichiers
+réécrits : les caches des pages sont invalidés sans reconstruction complète.
+"""
+
+import os
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from utils.constants import METEO_DATASET_DIR
+from .fingerprint import file_fingerprint
+from .ingest import (normalize_meteo, read_source, partition_keys, partition_path, read_partitioned,
+                     load_station_registry, save_station_registry, update_station_registry)
+from .fwi import FWI_FILE
+from .normals import NormalsStore, compute_normals, NORMALS_FILE
+from .precompute import DATE_COLUMNS
+from .quantiles import QuantileCube, build_quantile_cube, quantile_cube_path, QUANTILE_CUBE_VARIABLES
+from .wind_rose import WindRoseCube, build_wind_rose_cube, wind_rose_cube_path, WIND_ROSE_CUBE_VARIABLES
+
+# Fichier des lots ajoutés dans chaque partition (fusionné à chaque ajout)
+APPEND_NAME = 'ajouts'
+
+
+def _row_keys(df: pd.DataFrame) -> np.ndarray:
+    """Clé entière (station, jour) de chaque ligne"""
+    return df['NUM_POSTE'].to_numpy(dtype=np.int64) * 100_000_000 + df['AAAAMMJJ'].to_numpy(dtype=np.int64)
+
+
+def _cell_keys(df: pd.DataFrame) -> np.ndarray:
+    """Clé entière (station, mois absolu) de chaque ligne, comme WindRoseCube"""
+    ymd = df['AAAAMMJJ'].to_numpy(dtype=np.int64)
+    period = (ymd // 10_000) * 12 + (ymd // 100) % 100 - 1
+    return df['NUM_POSTE'].to_numpy(dtype=np.int64) * 100_000 + period
+
+
+def _write_atomic(df: pd.DataFrame, path: Path):
+    tmp = path.with_name(f".{path.name}.tmp")
+    df.to_parquet(tmp, compression='snappy', index=False)
+    os.replace(tmp, path)
+
+
+def merge_partition(rows: pd.DataFrame, output_dir, dept: str, annee: int, name: str = APPEND_NAME) -> pd.Series:
+    """
+    Ajoute des lignes à une partition en remplaçant les (station, jour) existants
+
+    Seuls les fichiers de la partition qui contiennent un jour corrigé sont
+    réécrits ; les lignes sont ajoutées au fichier `name` de la partition.
+
+    Args:
+        rows: Lignes normalisées de la partition
+        output_dir: Racine du jeu partitionné
+        dept: Département de la partition
+        annee: Année de la partition
+        name: Fichier recevant les lignes ajoutées
+
+    Returns:
+        Nombre de lignes remplacées par station
+    """
+    target = partition_path(output_dir, dept, annee, name)
+    target.parent.mkdir(parents=True, exist_ok=True)
+    new_keys = _row_keys(rows)
+
+    replaced = []
+    parts = [rows]
+
+    for path in sorted(target.parent.glob('*.parquet')):
+        if path.name.startswith(('.', '_')):
+            continue
+
+        keys = pd.read_parquet(path, columns=['NUM_POSTE', 'AAAAMMJJ'])
+        overlap = np.isin(_row_keys(keys), new_keys)
+        if path != target and not overlap.any():
+            continue
+
+        existing = pd.read_parquet(path)
+        replaced.append(keys.loc[overlap, 'NUM_POSTE'])
+        if path == target:
+            parts.insert(0, existing[~overlap])
+        elif overlap.all():
+            path.unlink()
+        else:
+            _write_atomic(existing[~overlap], path)
+
+    columns = list(dict.fromkeys(c for part in parts for c in part.columns))
+    merged = pd.concat([part.reindex(columns=columns) for part in parts], ignore_index=True)
+    _write_atomic(merged.sort_values(['NUM_POSTE', 'AAAAMMJJ'], kind='stable'), target)
+
+    if not replaced:
+        return pd.Series(dtype='int64')
+    return pd.concat(replaced).value_counts()
+
+
+def refresh_wind_rose_cubes(dataset_dir, rows: pd.DataFrame) -> list:
+    """
+    Recalcule les cellules station × mois des cubes touchées par un lot
+
+    Seuls les cubes déjà précalculés sont mis à jour ; les lignes relues
+    se limitent aux stations et années du lot.
+
+    Returns:
+        Résumés lisibles des mises à jour
+    """
+    cells = np.unique(_cell_keys(rows))
+    stations = rows['NUM_POSTE'].unique()
+    years = (rows['AAAAMMJJ'] // 10_000).unique()
+    summaries = []
+
+    for speed_col, direction_col in WIND_ROSE_CUBE_VARIABLES:
+        path = wind_rose_cube_path(speed_col, direction_col)
+        if not Path(path).exists() or speed_col not in rows.columns or direction_col not in rows.columns:
+            continue
+
+        cube = WindRoseCube.load(path)
+        df = read_partitioned(dataset_dir, DATE_COLUMNS + [speed_col, direction_col], years, stations)
+        df = df[np.isin(_cell_keys(df), cells)]
+
+        update = build_wind_rose_cube(df, speed_col, direction_col, cube.n_sectors,
+                                      cube.speed_bins, cube.calm_threshold)
+        cube.replace_cells(update, cells).save(path)
+        summaries.append(f"Rose {speed_col}/{direction_col} : {len(cells):,} cellules station-mois recalculées")
+
+    return summaries
+
+
+def refresh_quantile_cubes(dataset_dir, rows: pd.DataFrame) -> list:
+    """
+    Recalcule les cellules station × mois des cubes de quantiles touchées par un lot
+
+    Les cellules sont reconstruites sur les bornes du cube existant, seules
+    compatibles avec les cellules conservées.
+
+    Returns:
+        Résumés lisibles des mises à jour
+    """
+    cells = np.unique(_cell_keys(rows))
+    stations = rows['NUM_POSTE'].unique()
+    years = (rows['AAAAMMJJ'] // 10_000).unique()
+    summaries = []
+
+    for variable in QUANTILE_CUBE_VARIABLES:
+        path = quantile_cube_path(variable)
+        if not Path(path).exists() or variable not in rows.columns:
+            continue
+
+        cube = QuantileCube.load(path)
+        df = read_partitioned(dataset_dir, DATE_COLUMNS + [variable], years, stations)
+        df = df[np.isin(_cell_keys(df), cells)]
+
+        update = build_quantile_cube(df, variable, edges=cube.edges)
+        cube.replace_cells(update, cells).save(path)
+        summaries.append(f"Quantiles {variable} : {len(cells):,} cellules station-mois recalculées")
+
+    return summaries
+
+
+def discard_fwi(path: str = FWI_FILE) -> list:
+    """
+    Supprime le fichier IFM, périmé après un lot
+
+    Un jour ajouté change la récurrence de sa station jusqu'à la fin de
+    l'archive, et le vent des stations sans anémomètre (moyenne du jour sur
+    toutes les stations) : aucune tranche ne peut être recalculée seule.
+
+    Returns:
+        Résumés lisibles des mises à jour
+    """
+    if not Path(path).exists():
+        return []
+
+    Path(path).unlink()
+    return [f"IFM : {path} supprimé (à régénérer par python -m core fwi)"]
+
+
+def refresh_normals(dataset_dir, rows: pd.DataFrame, path: str = NORMALS_FILE) -> list:
+    """
+    Recalcule les normales des stations d'un lot s'il recoupe leur période
+
+    Returns:
+        Résumés lisibles des mises à jour
+    """
+    if not Path(path).exists():
+        return []
+
+    store = NormalsStore.load(path)
+    start, end = store.periode
+    years = (rows['AAAAMMJJ'] // 10_000).unique()
+    if not ((years >= start) & (years <= end)).any():
+        return [f"Normales {start}-{end} : lot hors période, inchangées"]
+
+    stations = rows['NUM_POSTE'].unique()
+    variables = [v for v in store.variables if v in rows.columns]
+    df = read_partitioned(dataset_dir, DATE_COLUMNS + variables, list(range(start, end + 1)), stations)
+
+    update = compute_normals(df, variables, reference_period=store.periode)
+    store.replace_stations(update).save(path)
+    return [f"Normales {start}-{end} : {len(update.stations):,} stations recalculées"]
+
+
+def append_batch(batch, dataset_dir: str = METEO_DATASET_DIR, name: str = APPEND_NAME) -> dict:
+    """
+    Ajoute un lot d'observations au jeu partitionné
+
+    Args:
+        batch: Fichier source (CSV, CSV.gz, Parquet) ou DataFrame brut
+        dataset_dir: Racine du jeu partitionné
+        name: Fichier recevant les lignes ajoutées dans chaque partition
+
+    Returns:
+        Rapport {'lignes', 'remplacees', 'partitions', 'stations', 'derives',
+        'empreinte_avant', 'empreinte_apres', 'secondes'}
+    """
+    start = time.perf_counter()
+    before = file_fingerprint(dataset_dir)
+
+    raw = batch if isinstance(batch, pd.DataFrame) else read_source(str(batch))
+    rows = normalize_meteo(raw.copy())
+
+    replaced = []
+    keys = partition_keys(rows)
+    for (dept, annee), index in keys.groupby(['dept', 'annee'], sort=True).groups.items():
+        replaced.append(merge_partition(rows.loc[index], dataset_dir, dept, int(annee), name))
+    replaced = pd.concat(replaced).groupby(level=0).sum() if replaced else pd.Series(dtype='int64')
+
+    if not rows.empty:
+        registry = update_station_registry(load_station_registry(dataset_dir), rows, replaced)
+        save_station_registry(registry, dataset_dir)
+
+    derives = []
+    if not rows.empty:
+        derives = (refresh_wind_rose_cubes(dataset_dir, rows) + refresh_quantile_cubes(dataset_dir, rows)
+                   + refresh_normals(dataset_dir, rows) + discard_fwi())
+
+    return {
+        'lignes': len(rows),
+        'remplacees': int(replaced.sum()),
+        'partitions': keys.drop_duplicates().shape[0],
+        'stations': rows['NUM_POSTE'].nunique(),
+        'derives': derives,
+        'empreinte_avant': before,
+        'empreinte_apres': file_fingerprint(dataset_dir),
+        'secondes': time.perf_counter() - start,
+    }
@@ -0,0 +1,331 @@
+"""
+Ingestion parallèle des fichiers quotidiens Météo-France
+
+Météo-France publie les données quotidiennes par département et par période
+(ex. Q_13_previous-1950-2022_RR-T-Vent.csv.gz). Chaque fichier source est
+une tâche indépendante : un worker le lit, normalise les types et écrit ses
+lignes dans le jeu partitionné
+
+    <sortie>/dept=13/annee=2020/<fichier source>.parquet
+
+Le nom du fichier de sortie reprend celui de la source : deux sources ne
+s'écrasent jamais et réingérer une source remplace exactement ses fichiers.
+Les colonnes de partition (dept, annee) ne sont pas stockées dans les
+fichiers ; elles sont reconstruites à la lecture (read_partitioned).
+"""
+
+import os
+import time
+from pathlib import Path
+
+import pandas as pd
+from utils.constants import METEO_DATASET_DIR
+from .parallel import parallel_map
+from .query import PARTITION_COLUMNS, open_dataset, scan_filter
+
+SOURCE_SUFFIXES = ('.csv.gz', '.csv', '.parquet')
+
+# Colonnes d'identification et leur type normalisé (les autres sont numériques)
+ID_COLUMNS = {
+    'NUM_POSTE': 'int64',
+    'NOM_USUEL': 'str',
+    'LAT': 'float64',
+    'LON': 'float64',
+    'ALTI': 'int64',
+    'AAAAMMJJ': 'int64',
+}
+
+# Registre des stations du jeu partitionné (ignoré par la lecture des données)
+STATIONS_REGISTRY = '_stations.parquet'
+REGISTRY_SOURCE_COLUMNS = ['NUM_POSTE', 'NOM_USUEL', 'LAT', 'LON', 'ALTI', 'AAAAMMJJ']
+
+
+def source_name(path) -> str:
+    """Nom d'une source sans extension (Q_13_....csv.gz -> Q_13_...)"""
+    name = Path(path).name
+    for suffix in SOURCE_SUFFIXES:
+        if name.endswith(suffix):
+            return name[: -len(suffix)]
+    return Path(path).stem
+
+
+def discover_sources(paths) -> list:
+    """
+    Liste les fichiers sources (CSV, CSV.gz, Parquet) à ingérer
+
+    Args:
+        paths: Fichiers ou dossiers (parcourus récursivement)
+
+    Returns:
+        Chemins triés du plus gros au plus petit (meilleur équilibrage du pool)
+
+    Raises:
+        ValueError: Si deux sources ont le même nom de fichier
+    """
+    sources = []
+    for path in map(Path, paths):
+        if path.is_dir():
+            sources += [p for p in path.rglob('*') if p.is_file() and p.name.endswith(SOURCE_SUFFIXES)]
+        elif path.exists():
+            sources.append(path)
+
+    names = [source_name(p) for p in sources]
+    duplicates = sorted({n for n in names if names.count(n) > 1})
+    if duplicates:
+        raise ValueError(f"Sources homonymes : {', '.join(duplicates)}")
+
+    return [str(p) for p in sorted(sources, key=lambda p: p.stat().st_size, reverse=True)]
+
+
+def read_source(path: str) -> pd.DataFrame:
+    """Lit un fichier source brut (séparateur ';' pour les CSV Météo-France)"""
+    if path.endswith('.parquet'):
+        return pd.read_parquet(path)
+    return pd.read_csv(path, sep=';', low_memory=False)
+
+
+def normalize_meteo(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Normalise une table brute au schéma de meteo.parquet
+
+    Identifiants et dates en entiers, mesures et codes qualité en float64.
+    Les lignes sans station ou sans date sont écartées, les doublons
+    (station, jour) ne gardent que la dernière occurrence.
+
+    Args:
+        df: Table brute (CSV ou Parquet Météo-France)
+
+    Returns:
+        Table normalisée, triée par station puis date
+    """
+    df = df.rename(columns=str.strip)
+
+    for col in df.columns:
+        if col == 'NOM_USUEL':
+            df[col] = df[col].astype('str').str.strip()
+        elif col not in ('NUM_POSTE', 'AAAAMMJJ', 'ALTI'):
+            df[col] = pd.to_numeric(df[col], errors='coerce').astype('float64')
+
+    df['NUM_POSTE'] = pd.to_numeric(df['NUM_POSTE'], errors='coerce')
+    df['AAAAMMJJ'] = pd.to_numeric(df['AAAAMMJJ'], errors='coerce')
+    df = df.dropna(subset=['NUM_POSTE', 'AAAAMMJJ'])
+
+    for col in ('NUM_POSTE', 'AAAAMMJJ'):
+        df[col] = df[col].astype(ID_COLUMNS[col])
+    if 'ALTI' in df.columns:
+        df['ALTI'] = pd.to_numeric(df['ALTI'], errors='coerce').fillna(0).astype(ID_COLUMNS['ALTI'])
+
+    df = df.drop_duplicates(subset=['NUM_POSTE', 'AAAAMMJJ'], keep='last')
+    return df.sort_values(['NUM_POSTE', 'AAAAMMJJ'], kind='stable').reset_index(drop=True)
+
+
+def partition_keys(df: pd.DataFrame) -> pd.DataFrame:
+    """Clés de partition (dept, annee) de chaque ligne d'une table normalisée"""
+    return pd.DataFrame({
+        'dept': df['NUM_POSTE'].astype(str).str.zfill(8).str[:2],
+        'annee': (df['AAAAMMJJ'] // 10_000).astype('int64'),
+    }, index=df.index)
+
+
+def partition_path(output_dir, dept: str, annee: int, name: str) -> Path:
+    """Fichier d'une source dans une partition"""
+    return Path(output_dir) / f"dept={dept}" / f"annee={annee}" / f"{name}.parquet"
+
+
+def write_partitions(df: pd.DataFrame, output_dir, name: str) -> list:
+    """
+    Écrit une table normalisée dans le jeu partitionné
+
+    Chaque fichier est écrit à côté puis renommé : un lecteur concurrent ne
+    voit jamais de fichier partiel.
+
+    Args:
+        df: Table normalisée
+        output_dir: Racine du jeu partitionné
+        name: Nom du fichier dans chaque partition
+
+    Returns:
+        Liste des (dept, annee) écrites
+    """
+    keys = partition_keys(df)
+    written = []
+
+    for (dept, annee), index in keys.groupby(['dept', 'annee'], sort=True).groups.items():
+        path = partition_path(output_dir, dept, annee, name)
+        path.parent.mkdir(parents=True, exist_ok=True)
+
+        tmp = path.with_name(f".{path.name}.tmp")
+        df.loc[index].to_parquet(tmp, compression='snappy', index=False)
+        os.replace(tmp, path)
+        written.append((dept, int(annee)))
+
+    return written
+
+
+def ingest_file(path: str, output_dir: str = METEO_DATASET_DIR) -> dict:
+    """
+    Tâche : lit, normalise et partitionne un fichier source
+
+    Les erreurs sont retournées dans le résultat pour ne pas interrompre
+    l'ingestion des autres fichiers.
+
+    Returns:
+        Dictionnaire {'source', 'lignes', 'partitions', 'secondes', 'erreur'}
+    """
+    start = time.perf_counter()
+    result = {'source': path, 'lignes': 0, 'partitions': 0, 'secondes': 0.0, 'erreur': None}
+
+    try:
+        df = normalize_meteo(read_source(path))
+        result['lignes'] = len(df)
+        result['partitions'] = len(write_partitions(df, output_dir, source_name(path)))
+    except Exception as e:
+        result['erreur'] = f"{type(e).__name__}: {e}"
+
+    result['secondes'] = time.perf_counter() - start
+    return result
+
+
+def _ingest_task(args) -> dict:
+    return ingest_file(*args)
+
+
+def ingest_sources(paths, output_dir: str = METEO_DATASET_DIR, workers: int = None) -> dict:
+    """
+    Ingère des fichiers départementaux dans un pool de processus
+
+    Le temps total suit le nombre de cœurs plutôt que le nombre de fichiers :
+    chaque worker traite un fichier entier, du plus gros au plus petit. Le
+    registre des stations est reconstruit à la fin de l'ingestion.
+
+    Args:
+        paths: Fichiers ou dossiers sources
+        output_dir: Racine du jeu partitionné
+        workers: Nombre de processus (None = cœurs disponibles, 1 = en série)
+
+    Returns:
+        Rapport {'fichiers', 'lignes', 'partitions', 'secondes',
+        'lignes_par_seconde', 'taches'}
+    """
+    start = time.perf_counter()
+    sources = discover_sources(paths)
+    tasks = parallel_map(_ingest_task, [(p, str(output_dir)) for p in sources], workers)
+
+    if any(t['lignes'] for t in tasks):
+        save_station_registry(build_station_registry(output_dir), output_dir)
+    elapsed = time.perf_counter() - start
+
+    rows = sum(t['lignes'] for t in tasks)
+    return {
+        'fichiers': len(tasks),
+        'lignes': rows,
+        'partitions': sum(t['partitions'] for t in tasks),
+        'secondes': elapsed,
+        'lignes_par_seconde': rows / elapsed if elapsed > 0 else 0.0,
+        'taches': tasks,
+    }
+
+
+def read_partitioned(path: str = METEO_DATASET_DIR,
+                     columns: list = None,
+                     years: list = None,
+                     stations: list = None) -> pd.DataFrame:
+    """
+    Lit le jeu partitionné (seules les partitions des années demandées)
+
+    Args:
+        path: Racine du jeu partitionné
+        columns: Colonnes à lire (None = toutes)
+        years: Années à lire (None = toutes)
+        stations: NUM_POSTE à lire (None = toutes)
+
+    Returns:
+        Table au format meteo.parquet (colonnes de partition retirées)
+    """
+    dataset = open_dataset(path)
+    if columns is None:
+        columns = [c for c in dataset.schema.names if c not in PARTITION_COLUMNS]
+
+    filter_ = scan_filter(dataset, years, stations)
+    return dataset.to_table(columns=columns, filter=filter_).to_pandas()
+
+
+def summarize_stations(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Résumé par station d'une table normalisée (une ligne par NUM_POSTE)
+
+    Returns:
+        DataFrame NUM_POSTE, NOM_USUEL, LAT, LON, ALTI, dept,
+        date_debut, date_fin, nb_mesures (dates au format AAAAMMJJ)
+    """
+    meta = [c for c in ('NOM_USUEL', 'LAT', 'LON', 'ALTI') if c in df.columns]
+    stations = df.groupby('NUM_POSTE', sort=True).agg(
+        **{c: (c, 'last') for c in meta},
+        date_debut=('AAAAMMJJ', 'min'),
+        date_fin=('AAAAMMJJ', 'max'),
+        nb_mesures=('AAAAMMJJ', 'size'),
+    ).reset_index()
+
+    stations.insert(len(meta) + 1, 'dept', stations['NUM_POSTE'].astype(str).str.zfill(8).str[:2])
+    return stations
+
+
+def update_station_registry(registry: pd.DataFrame, rows: pd.DataFrame, replaced: pd.Series = None) -> pd.DataFrame:
+    """
+    Met à jour le registre avec un lot de lignes ajoutées
+
+    Args:
+        registry: Registre existant (peut être vide)
+        rows: Lignes normalisées ajoutées au jeu
+        replaced: Nombre de lignes remplacées par station (corrections)
+
+    Returns:
+        Nouveau registre
+    """
+    summary = summarize_stations(rows)
+    if registry.empty:
+        return summary
+
+    combined = pd.concat([registry, summary], ignore_index=True)
+    meta = [c for c in registry.columns if c not in ('NUM_POSTE', 'date_debut', 'date_fin', 'nb_mesures')]
+    updated = combined.groupby('NUM_POSTE', sort=True).agg(
+        **{c: (c, 'last') for c in meta},
+        date_debut=('date_debut', 'min'),
+        date_fin=('date_fin', 'max'),
+        nb_mesures=('nb_mesures', 'sum'),
+    )
+
+    if replaced is not None and len(replaced):
+        updated['nb_mesures'] -= replaced.reindex(updated.index, fill_value=0).astype('int64')
+
+    return updated.reset_index()[registry.columns]
+
+
+def build_station_registry(path: str = METEO_DATASET_DIR) -> pd.DataFrame:
+    """Reconstruit le registre des stations à partir de tout le jeu partitionné"""
+    names = open_dataset(path).schema.names
+    columns = [c for c in REGISTRY_SOURCE_COLUMNS if c in names]
+    return summarize_stations(read_partitioned(path, columns))
+
+
+def load_station_registry(path: str = METEO_DATASET_DIR) -> pd.DataFrame:
+    """
+    Registre des stations du jeu partitionné
+
+    Returns:
+        DataFrame (voir summarize_stations), vide si le registre n'existe pas
+    """
+    registry = Path(path) / STATIONS_REGISTRY
+    if not registry.exists():
+        return pd.DataFrame()
+    return pd.read_parquet(registry)
+
+
+def save_station_registry(registry: pd.DataFrame, path: str = METEO_DATASET_DIR):
+    """Écrit le registre des stations (écriture atomique)"""
+    target = Path(path) / STATIONS_REGISTRY
+    target.parent.mkdir(parents=True, exist_ok=True)
+
+    tmp = target.with_name(f".{target.name}.tmp")
+    registry.to_parquet(tmp, index=False)
+    os.replace(tmp, target)
@@ -0,0 +1,647 @@
+"""
+Chargement et préparation des données météorologiques (sans Streamlit)
+
+Les erreurs sont levées sous forme d'exceptions ; l'affichage des messages
+est laissé aux adaptateurs Streamlit (utils.data_loader).
+"""
+
+import threading
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+from pathlib import Path
+from utils.constants import NUMERIC_COLUMNS, REGIONS_FRANCE, MONTHS_FR, SEASONS, METEO_FILE
+from .cache import memoize
+from .columns import projection, source_columns
+from .fingerprint import file_fingerprint
+from .dry_spells import DRY_SPELL_COLUMNS, dry_streak
+from .fwi import FWI_COLUMNS, compute_fwi
+from .normals import NormalsStore, compute_normals, NORMALS_FILE
+from .profiling import profile
+from .quality import apply_quality_mask
+from .quantiles import QuantileCube, build_quantile_cube, quantile_cube_path
+from .query import MeteoQuery, PARTITION_COLUMNS, open_dataset, scan_filter
+from .snapshot import read_columns, read_snapshot, snapshot_dir, snapshot_enabled, write_columns
+from .wind_rose import WindRoseCube, build_wind_rose_cube, wind_rose_cube_path
+
+# Colonnes texte encodées en dictionnaire (catégories pandas)
+DICTIONARY_COLUMNS = ['NOM_USUEL', 'nom_mois', 'saison', 'annee_mois', 'dept', 'region']
+
+# Colonnes calculées sur la table entière (récurrences par station), à la demande
+TABLE_DERIVED = [
+    (FWI_COLUMNS, compute_fwi),
+    (DRY_SPELL_COLUMNS, dry_streak),
+]
+
+
+def load_meteo(filepath: str = METEO_FILE,
+               columns: list = None,
+               years: list = None,
+               sample_frac: float = None,
+               dtype_backend: str = 'numpy',
+               quality=None) -> pd.DataFrame:
+    """
+    Charge et prépare les données météorologiques depuis le fichier Parquet
+    ou le dossier partitionné produit par l'ingestion (core.ingest)
+    
+    Le résultat est mis en cache par (fichier, empreinte, options) : il est
+    invalidé dès que le fichier change. Le DataFrame retourné est partagé
+    et ne doit pas être modifié en place.
+    
+    Sans années, échantillon ni masquage qualité, les colonnes sont lues à
+    la demande dans une table commune à toutes les pages (ColumnStore),
+    partagée entre processus par l'instantané Arrow (core.snapshot) : une
+    page ne décode que ce qu'elle déclare, et les colonnes déjà lues par une
+    autre page ou un autre processus ne sont pas relues.
+    
+    Args:
+        filepath: Chemin vers le fichier Parquet ou le dossier partitionné
+        columns: Liste de colonnes à charger, brutes ou calculées (None = toutes) ;
+            les colonnes d'identité (core.columns.KEY_COLUMNS) sont toujours incluses
+        years: Liste d'années à filtrer (None = toutes)
+        sample_frac: Fraction de données à échantillonner (0.1 = 10%)
+        dtype_backend: 'numpy' (float32 et catégories, compatible avec toutes
+            les pages) ou 'pyarrow' (ArrowDtype de bout en bout, date32)
+        quality: Masquage qualité à la lecture (core.quality) : None = aucun,
+            True = règles QUALITY_RULES, liste de codes ou {variable: codes}
+        
+    Returns:
+        DataFrame pandas avec les données nettoyées et enrichies
+        
+    Raises:
+        FileNotFoundError: Si le fichier n'existe pas
+    """
+    if not Path(filepath).exists():
+        raise FileNotFoundError(filepath)
+    
+    filepath, fingerprint = str(filepath), file_fingerprint(filepath)
+    
+    if not years and not sample_frac and quality is None and dtype_backend == 'numpy':
+        store = _column_store(filepath, fingerprint)
+        return store.get(store.available if columns is None else columns)
+    
+    return _load_meteo(filepath, fingerprint, columns, years, sample_frac, dtype_backend, quality)
+
+
+@memoize(maxsize=4)
+@profile('load_data')
+def _load_meteo(filepath: str,
+                fingerprint: str,
+                columns: list = None,
+                years: list = None,
+                sample_frac: float = None,
+                dtype_backend: str = 'numpy',
+                quality=None) -> pd.DataFrame:
+    """Chargement effectif, mis en cache par (fichier, empreinte, options)"""
+    return _read_meteo(filepath, columns, years, sample_frac, dtype_backend, quality)
+
+
+def _read_meteo(filepath: str,
+                columns: list = None,
+                years: list = None,
+                sample_frac: float = None,
+                dtype_backend: str = 'numpy',
+                quality=None) -> pd.DataFrame:
+    """Lecture Arrow et préparation de la table (sans cache)"""
+    table = read_meteo_table(filepath, columns, years)
+    
+    # La table Arrow est libérée colonne par colonne pendant la conversion
+    options = {'split_blocks': True, 'self_destruct': True}
+    
+    if dtype_backend == 'pyarrow':
+        df = prepare_meteo(table.to_pandas(types_mapper=pd.ArrowDtype, **options),
+                           sample_frac=sample_frac, quality=quality)
+        df['date'] = df['date'].astype(pd.ArrowDtype(pa.date32()))
+        return df
+    
+    return prepare_meteo(_to_pandas(table), sample_frac=sample_frac, quality=quality)
+
+
+def _to_pandas(table: pa.Table) -> pd.DataFrame:
+    """Conversion pandas d'une table read_meteo_table (backend numpy)"""
+    # La table Arrow est libérée colonne par colonne pendant la conversion
+    df = table.to_pandas(split_blocks=True, self_destruct=True)
+    
+    # Les dictionnaires Arrow suivent l'ordre du fichier : catégories triées
+    # pour que groupby et les listes de stations restent alphabétiques
+    for col in df.select_dtypes(include='category').columns:
+        df[col] = df[col].cat.reorder_categories(sorted(df[col].cat.categories))
+    
+    return df
+
+
+class ColumnStore:
+    """
+    Table météo partagée dont les colonnes sont lues à la demande
+    
+    Seules les colonnes qui manquent encore sont lues et préparées, puis
+    ajoutées à la table commune : la première page ne décode que ses
+    colonnes, les suivantes complètent la table au lieu de la recharger.
+    Les colonnes de TABLE_DERIVED (indices feu, séries sèches) sont
+    calculées une fois, à la première page qui en déclare une.
+    
+    La table est partagée entre processus par l'instantané (core.snapshot),
+    un fichier par colonne : un agrandissement écrit ses seules colonnes
+    nouvelles, en une fois par appel, puis les projette en mémoire. Un
+    processus reprend les colonnes déjà publiées par les autres et ne lit
+    que celles qui manquent.
+    
+    Usage:
+        store = ColumnStore('data/raw/meteo_sample.parquet', empreinte)
+        store.get(['TN', 'TX', 'annee'])
+    """
+    
+    def __init__(self, filepath: str, fingerprint: str):
+        self.filepath = filepath
+        self.available = [c for c in open_dataset(filepath).schema.names if c not in PARTITION_COLUMNS]
+        self.loaded = []
+        self.df = pd.DataFrame()
+        self._lock = threading.Lock()
+        self._directory = snapshot_dir(filepath, fingerprint) if snapshot_enabled() else None
+        self._adopt()
+    
+    @profile('load_data[colonnes]')
+    def get(self, columns: list) -> pd.DataFrame:
+        """
+        Projection de la table sur les colonnes demandées (lues si besoin)
+        
+        Args:
+            columns: Colonnes brutes ou calculées (core.columns.DERIVED_SOURCES)
+            
+        Returns:
+            DataFrame des colonnes d'identité, demandées et calculées associées
+        """
+        sources = source_columns(columns, self.available)
+        with self._lock:
+            if not self._complete(columns, sources):
+                self._adopt()
+            before = set(self.df.columns)
+            
+            missing = [c for c in sources if c not in self.loaded]
+            if missing:
+                self._add(missing)
+            for derived, compute in TABLE_DERIVED:
+                if set(columns) & set(derived) and derived[0] not in self.df.columns:
+                    self.df = pd.concat([self.df, compute(self.df)], axis=1)
+            
+            added = [c for c in self.df.columns if c not in before]
+            if added:
+                self._publish(added)
+            df = self.df
+        return df[projection(sources, df.columns)]
+    
+    def _complete(self, columns: list, sources: list) -> bool:
+        """La table contient déjà les colonnes sources et calculées demandées"""
+        derived = [d[0] for d, _ in TABLE_DERIVED if set(columns) & set(d)]
+        return all(c in self.loaded for c in sources) and all(c in self.df.columns for c in derived)
+    
+    def _adopt(self):
+        """Reprend les colonnes de l'instantané publiées par d'autres processus"""
+        if self._directory is None or not self._directory.exists():
+            return
+        try:
+            shared = read_columns(self._directory, exclude=self.df.columns,
+                                  rows=None if self.df.empty else len(self.df))
+        except OSError:
+            # Dossier en cours de suppression : reprise au prochain appel
+            return
+        
+        if self.df.empty:
+            self.df = shared
+        elif len(shared.columns):
+            self.df = pd.concat([self.df, shared], axis=1)
+        self.loaded = [c for c in self.available if c in self.df.columns]
+    
+    def _publish(self, columns: list):
+        """Écrit les colonnes ajoutées dans l'instantané, puis les projette en mémoire"""
+        if self._directory is None:
+            return
+        try:
+            mapped = [read_snapshot(path) for path in write_columns(self.df, columns, self._directory)]
+        except OSError:
+            # Dossier en lecture seule : chaque processus garde sa copie
+            return
+        self.df = pd.concat([self.df.drop(columns=columns)] + mapped, axis=1)
+    
+    def _add(self, columns: list):
+        """Lit, prépare et ajoute des colonnes à la table commune"""
+        part = prepare_meteo(_to_pandas(read_meteo_table(self.filepath, columns)))
+        
+        if not self.loaded:
+            self.df = part
+        elif len(part) != len(self.df):
+            raise ValueError(f"Lecture incohérente de {self.filepath} : {len(part)} lignes au lieu de {len(self.df)}")
+        else:
+            self.df = pd.concat([self.df, part], axis=1)
+        self.loaded += columns
+
+
+@memoize(maxsize=2)
+def _column_store(filepath: str, fingerprint: str) -> ColumnStore:
+    """Table à colonnes à la demande, une par (fichier, empreinte)"""
+    return ColumnStore(filepath, fingerprint)
+
+
+def read_meteo_table(filepath: str, columns: list = None, years: list = None) -> pa.Table:
+    """
+    Lit la source en table Arrow compacte (projection et années poussées dans le scanner)
+    
+    Les mesures sont converties en float32 et les libellés encodés en
+    dictionnaire côté Arrow : aucune colonne float64 ni chaîne Python n'est
+    matérialisée avant la conversion en pandas (catégories, float32).
+    
+    Args:
+        filepath: Fichier Parquet ou dossier partitionné
+        columns: Colonnes à lire (None = toutes)
+        years: Années à lire (None = toutes)
+        
+    Returns:
+        pyarrow.Table
+    """
+    dataset = open_dataset(filepath)
+    if columns is None:
+        columns = [c for c in dataset.schema.names if c not in PARTITION_COLUMNS]
+    
+    table = dataset.to_table(columns=list(columns), filter=scan_filter(dataset, years))
+    
+    schema = []
+    for field in table.schema:
+        if pa.types.is_floating(field.type):
+            field = field.with_type(pa.float32())
+        elif field.name in DICTIONARY_COLUMNS and (pa.types.is_string(field.type) or pa.types.is_large_string(field.type)):
+            field = field.with_type(pa.dictionary(pa.int32(), pa.string()))
+        schema.append(field)
+    
+    return table.cast(pa.schema(schema))
+
+
+def open_meteo(filepath: str = METEO_FILE) -> MeteoQuery:
+    """
+    Ouvre la source météo pour des requêtes hors mémoire (core.query)
+    
+    Contrairement à load_meteo, rien n'est chargé : les agrégations sont
+    poussées dans le scanner Arrow et calculées lot par lot. L'objet est
+    mis en cache par (fichier, empreinte).
+    
+    Args:
+        filepath: Chemin vers le fichier Parquet ou le dossier partitionné
+        
+    Returns:
+        MeteoQuery
+        
+    Raises:
+        FileNotFoundError: Si la source n'existe pas
+    """
+    if not Path(filepath).exists():
+        raise FileNotFoundError(filepath)
+    
+    return _open_meteo(str(filepath), file_fingerprint(filepath))
+
+
+@memoize(maxsize=4)
+def _open_meteo(filepath: str, fingerprint: str) -> MeteoQuery:
+    return MeteoQuery(filepath)
+
+
+def prepare_meteo(df: pd.DataFrame, years: list = None, sample_frac: float = None,
+                  quality=None) -> pd.DataFrame:
+    """
+    Filtre, convertit et enrichit une table météo brute
+    
+    Args:
+        df: Table au format Météo-France
+        years: Liste d'années à filtrer (None = toutes)
+        sample_frac: Fraction de données à échantillonner (0.1 = 10%)
+        quality: Masquage qualité (voir load_meteo), avant les colonnes calculées
+        
+    Returns:
+        DataFrame nettoyé et enrichi
+    """
+    # Filtrer par années si spécifié
+    if years and 'AAAAMMJJ' in df.columns:
+        df['temp_year'] = df['AAAAMMJJ'].astype(str).str[:4].astype(int)
+        df = df[df['temp_year'].isin(years)]
+        df = df.drop('temp_year', axis=1)
+    
+    # Échantillonnage si demandé
+    if sample_frac and 0 < sample_frac < 1:
+        df = df.sample(frac=sample_frac, random_state=42)
+    
+    # Convertir les types de données
+    df = convert_data_types(df)
+    
+    # Masquer les mesures de qualité insuffisante
+    if quality is not None and quality is not False:
+        df = filter_by_quality(df, None if quality is True else quality)
+    
+    # Ajouter les colonnes calculées
+    df = add_computed_columns(df)
+    
+    # Gérer les données manquantes
+    df = handle_missing_values(df)
+    
+    # Optimiser la mémoire
+    df = reduce_memory_usage(df)
+    
+    return df
+
+
+def reduce_memory_usage(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Réduit l'utilisation mémoire du DataFrame
+    """
+    for col in df.select_dtypes(include=['float64']).columns:
+        df[col] = pd.to_numeric(df[col], downcast='float')
+    
+    for col in df.select_dtypes(include=['int']).columns:
+        df[col] = pd.to_numeric(df[col], downcast='integer')
+    
+    return df
+
+
+def convert_data_types(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Convertit les colonnes aux types appropriés
+    
+    Args:
+        df: DataFrame brut
+        
+    Returns:
+        DataFrame avec types convertis
+    """
+    # Copie superficielle : les nouvelles colonnes ne modifient pas l'appelant
+    df = df.copy(deep=False)
+    
+    # Convertir la date
+    if 'AAAAMMJJ' in df.columns:
+        df['date'] = pd.to_datetime(df['AAAAMMJJ'], format='%Y%m%d', errors='coerce')
+    
+    # Convertir les colonnes numériques
+    for col in NUMERIC_COLUMNS:
+        if col in df.columns and not pd.api.types.is_numeric_dtype(df[col]):
+            df[col] = pd.to_numeric(df[col], errors='coerce')
+    
+    # Convertir altitude en entier
+    if 'ALTI' in df.columns:
+        df['ALTI'] = df['ALTI'].fillna(0).astype(int)
+    
+    return df
+
+
+def add_computed_columns(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Ajoute des colonnes calculées utiles pour l'analyse
+    
+    Args:
+        df: DataFrame avec données de base
+        
+    Returns:
+        DataFrame enrichi avec colonnes calculées
+    """
+    df = df.copy(deep=False)
+    
+    if 'date' in df.columns:
+        # Extraire les composantes de date
+        dates = df['date'].dt
+        df['annee'] = dates.year
+        df['mois'] = dates.month
+        df['jour'] = dates.day
+        df['jour_annee'] = dates.dayofyear
+        df['jour_semaine'] = dates.dayofweek
+        
+        # Libellés (nom du mois, saison, année-mois) encodés en catégories :
+        # 12 ou quelques centaines de modalités pour des centaines de milliers de lignes
+        mois = df['mois'].to_numpy(dtype=np.int64, na_value=0)
+        df['nom_mois'] = pd.Categorical.from_codes(mois - 1, [MONTHS_FR[m] for m in range(1, 13)])
+        
+        saisons = list(SEASONS)
+        saison_par_mois = np.array([-1] + [saisons.index(get_season(m)) for m in range(1, 13)])
+        df['saison'] = pd.Categorical.from_codes(saison_par_mois[mois], saisons)
+        
+        # Année-mois pour groupby (ordre chronologique = ordre des catégories)
+        periode = np.where(mois > 0, df['annee'].to_numpy(dtype=np.int64, na_value=0) * 12 + mois - 1, -1)
+        codes, periodes = pd.factorize(periode, sort=True, use_na_sentinel=False)
+        libelles = [f"{p // 12:04d}-{p % 12 + 1:02d}" for p in periodes]
+        if len(periodes) and periodes[0] < 0:
+            codes, libelles = codes - 1, libelles[1:]
+        df['annee_mois'] = pd.Categorical.from_codes(codes, libelles)
+    
+    # Extraire le code département (2 premiers chiffres du NUM_POSTE)
+    if 'NUM_POSTE' in df.columns:
+        stations = pd.unique(df['NUM_POSTE'])
+        depts = pd.Series([str(s)[:2] for s in stations], index=stations)
+        df['dept'] = df['NUM_POSTE'].map(depts).astype('category')
+        df['region'] = df['dept'].map(REGIONS_FRANCE).astype('category')
+    
+    # Convertir vent m/s en km/h pour plus de lisibilité
+    if 'FFM' in df.columns:
+        df['FFM_kmh'] = df['FFM'] * 3.6
+    if 'FXY' in df.columns:
+        df['FXY_kmh'] = df['FXY'] * 3.6
+    
+    # Indicateurs booléens pour événements
+    if 'TN' in df.columns:
+        df['jour_gel'] = df['TN'] < 0
+    if 'TX' in df.columns:
+        df['jour_canicule'] = df['TX'] > 35
+        df['jour_chaleur'] = df['TX'] > 30
+    if 'RR' in df.columns:
+        df['jour_pluie'] = df['RR'] > 1
+        df['jour_pluie_forte'] = df['RR'] > 50
+    
+    return df
+
+
+def get_season(month: int) -> str:
+    """
+    Retourne la saison correspondant au mois
+    
+    Args:
+        month: Numéro du mois (1-12)
+        
+    Returns:
+        Nom de la saison
+    """
+    for season, months in SEASONS.items():
+        if month in months:
+            return season
+    return 'Inconnu'
+
+
+def handle_missing_values(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Gère les valeurs manquantes
+    
+    Args:
+        df: DataFrame avec possibles valeurs manquantes
+        
+    Returns:
+        DataFrame avec gestion des valeurs manquantes
+    """
+    df = df.copy(deep=False)
+    
+    # Remplacer les valeurs sentinelles par NaN si nécessaire
+    # (certains fichiers météo utilisent 9999 ou -999 pour valeurs manquantes)
+    
+    # Pour l'instant, pandas gère déjà les valeurs vides avec pd.to_numeric
+    
+    return df
+
+
+def get_stations_list(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Retourne la liste unique des stations avec leurs métadonnées
+    
+    Args:
+        df: DataFrame complet
+        
+    Returns:
+        DataFrame avec une ligne par station
+    """
+    if df.empty:
+        return pd.DataFrame()
+    
+    stations = df.groupby('NUM_POSTE').agg({
+        'NOM_USUEL': 'first',
+        'LAT': 'first',
+        'LON': 'first',
+        'ALTI': 'first',
+        'dept': 'first',
+        'region': 'first',
+        'date': ['min', 'max', 'count']
+    }).reset_index()
+    
+    # Aplatir les colonnes multi-index
+    stations.columns = ['NUM_POSTE', 'NOM_USUEL', 'LAT', 'LON', 'ALTI', 
+                       'dept', 'region', 'date_debut', 'date_fin', 'nb_mesures']
+    
+    return stations
+
+
+def get_data_summary(df: pd.DataFrame) -> dict:
+    """
+    Retourne un résumé statistique des données
+    
+    Args:
+        df: DataFrame complet
+        
+    Returns:
+        Dictionnaire avec statistiques clés
+    """
+    if df.empty:
+        return {}
+    
+    summary = {
+        'nb_lignes': len(df),
+        'nb_stations': df['NUM_POSTE'].nunique() if 'NUM_POSTE' in df.columns else 0,
+        'date_min': df['date'].min() if 'date' in df.columns else None,
+        'date_max': df['date'].max() if 'date' in df.columns else None,
+        'nb_jours': df['date'].nunique() if 'date' in df.columns else 0,
+        'nb_regions': df['region'].nunique() if 'region' in df.columns else 0,
+        'completude': {}
+    }
+    
+    # Calculer le taux de complétude pour les colonnes principales
+    for col in ['TN', 'TX', 'TM', 'RR', 'FFM']:
+        if col in df.columns:
+            summary['completude'][col] = (df[col].notna().sum() / len(df) * 100)
+    
+    return summary
+
+
+@profile()
+def filter_by_quality(df: pd.DataFrame, accepted=None, keep_unflagged: bool = True) -> pd.DataFrame:
+    """
+    Filtre les données selon leur qualité
+    
+    Les mesures dont le code qualité (QX) n'est pas accepté sont remplacées
+    par NaN, toutes variables à la fois (core.quality).
+    
+    Args:
+        df: DataFrame à filtrer
+        accepted: Codes acceptés : None (QUALITY_RULES), liste commune
+            ([0, 1]) ou dictionnaire par variable ({'RR': [0, 1, 9]})
+        keep_unflagged: Conserver les mesures sans code qualité
+        
+    Returns:
+        DataFrame filtré
+    """
+    return apply_quality_mask(df, accepted, keep_unflagged)
+
+
+def load_normals(df_full: pd.DataFrame = None, path: str = NORMALS_FILE):
+    """
+    Charge les normales climatologiques précalculées à l'ingestion
+    
+    Si le fichier n'existe pas encore, les normales sont calculées sur le
+    jeu complet fourni (jamais sur un sous-ensemble filtré).
+    
+    Args:
+        df_full: DataFrame complet utilisé en repli
+        path: Chemin du fichier de normales (.npz)
+        
+    Returns:
+        NormalsStore ou None si aucune source n'est disponible
+    """
+    if Path(path).exists():
+        return NormalsStore.load(path)
+    
+    if df_full is not None and not df_full.empty:
+        return compute_normals(df_full)
+    
+    return None
+
+
+def load_wind_rose_cube(df_full: pd.DataFrame = None,
+                        speed_col: str = 'FFM',
+                        direction_col: str = 'DXY'):
+    """
+    Charge le cube station × mois des roses des vents précalculé à l'ingestion
+    
+    Si le fichier n'existe pas encore, le cube est construit sur le jeu
+    complet fourni.
+    
+    Args:
+        df_full: DataFrame complet utilisé en repli
+        speed_col: Colonne de vitesse
+        direction_col: Colonne de direction
+        
+    Returns:
+        WindRoseCube ou None si aucune source n'est disponible
+    """
+    path = wind_rose_cube_path(speed_col, direction_col)
+    
+    if Path(path).exists():
+        return WindRoseCube.load(path)
+    
+    if (df_full is not None and not df_full.empty
+            and speed_col in df_full.columns and direction_col in df_full.columns):
+        return build_wind_rose_cube(df_full, speed_col, direction_col)
+    
+    return None
+
+
+def load_quantile_cube(df_full: pd.DataFrame = None, variable: str = 'TX'):
+    """
+    Charge le cube station × mois des croquis de quantiles précalculé à l'ingestion
+    
+    Si le fichier n'existe pas encore, le cube est construit sur le jeu
+    complet fourni.
+    
+    Args:
+        df_full: DataFrame complet utilisé en repli
+        variable: Variable résumée
+        
+    Returns:
+        QuantileCube ou None si aucune source n'est disponible
+    """
+    path = quantile_cube_path(variable)
+    
+    if Path(path).exists():
+        return QuantileCube.load(path)
+    
+    if df_full is not None and not df_full.empty and variable in df_full.columns:
+        return build_quantile_cube(df_full, variable)
+    
+    return None
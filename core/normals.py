@@ -0,0 +1,274 @@
+"""
+Normales climatologiques par station et calcul vectorisé des anomalies
+
+Les normales (quotidiennes et mensuelles) sont calculées une fois sur la
+période de référence, à l'ingestion, puis stockées sous forme de tableaux
+NumPy indexés par (station, mois) et (station, jour calendaire). Le calcul
+d'une anomalie se réduit ainsi à une soustraction vectorisée, indépendante
+des filtres appliqués par l'utilisateur.
+"""
+
+import numpy as np
+import pandas as pd
+from pathlib import Path
+from utils.constants import REFERENCE_PERIOD, NORMALS_VARIABLES, PROCESSED_DIR
+
+NORMALS_FILE = f"{PROCESSED_DIR}/normales.npz"
+
+# Jours cumulés en début de mois pour une année bissextile : le 29 février a
+# son propre indice et le 1er mars garde le même indice toutes les années
+_CUMUL_JOURS = np.array([0, 31, 60, 91, 121, 152, 182, 213, 244, 274, 305, 335])
+
+N_JOURS_CALENDAIRES = 366
+
+
+def calendar_day_index(mois, jour) -> np.ndarray:
+    """
+    Indice du jour calendaire (0-365) indépendant des années bissextiles
+
+    Args:
+        mois: Tableau des mois (1-12)
+        jour: Tableau des jours du mois (1-31)
+
+    Returns:
+        Tableau d'indices entiers
+    """
+    mois = np.asarray(mois, dtype=np.int64)
+    jour = np.asarray(jour, dtype=np.int64)
+    return _CUMUL_JOURS[mois - 1] + jour - 1
+
+
+def date_components(df: pd.DataFrame):
+    """
+    Extrait (année, mois, jour, valide) en tableaux NumPy
+
+    Les dates manquantes sont remplacées par le 1er janvier et signalées
+    par valide=False pour garder des indices exploitables.
+    """
+    if 'date' in df.columns:
+        dates = pd.to_datetime(df['date'])
+        valid = dates.notna().to_numpy()
+        dates = dates.fillna(pd.Timestamp('2000-01-01'))
+        return (dates.dt.year.to_numpy(dtype=np.int64),
+                dates.dt.month.to_numpy(dtype=np.int64),
+                dates.dt.day.to_numpy(dtype=np.int64),
+                valid)
+
+    ymd = df['AAAAMMJJ'].to_numpy(dtype=np.int64)
+    valid = ymd > 0
+    ymd = np.where(valid, ymd, 20000101)
+    return ymd // 10000, (ymd // 100) % 100, ymd % 100, valid
+
+
+def _circular_smoothing(sums: np.ndarray, counts: np.ndarray, window: int):
+    """Moyenne glissante circulaire sur l'axe des jours calendaires"""
+    half = window // 2
+    width = 2 * half + 1
+
+    def rolling_sum(x):
+        padded = np.concatenate([x[:, -half:], x, x[:, :half]], axis=1)
+        cumsum = np.cumsum(padded, axis=1)
+        cumsum = np.concatenate([np.zeros_like(cumsum[:, :1]), cumsum], axis=1)
+        return cumsum[:, width:] - cumsum[:, :-width]
+
+    return rolling_sum(sums), rolling_sum(counts)
+
+
+class NormalsStore:
+    """
+    Normales climatologiques par station
+
+    Attributs:
+        stations: Identifiants NUM_POSTE triés (n_stations,)
+        variables: Variables disponibles
+        mensuelles: Normales mensuelles (n_stations, 12, n_variables)
+        quotidiennes: Normales quotidiennes lissées (n_stations, 366, n_variables)
+        periode: Période (année_début, année_fin) réellement utilisée
+    """
+
+    def __init__(self, stations, variables, mensuelles, quotidiennes, periode):
+        self.stations = np.asarray(stations, dtype=np.int64)
+        self.variables = list(variables)
+        self.mensuelles = mensuelles
+        self.quotidiennes = quotidiennes
+        self.periode = (int(periode[0]), int(periode[1]))
+
+    def __contains__(self, variable) -> bool:
+        return variable in self.variables
+
+    def station_index(self, num_poste) -> np.ndarray:
+        """
+        Position de chaque station dans le store (-1 si inconnue)
+
+        Args:
+            num_poste: Tableau de NUM_POSTE
+
+        Returns:
+            Tableau d'indices entiers
+        """
+        num_poste = np.asarray(num_poste, dtype=np.int64)
+        if len(self.stations) == 0:
+            return np.full(len(num_poste), -1)
+
+        idx = np.searchsorted(self.stations, num_poste)
+        idx = np.clip(idx, 0, len(self.stations) - 1)
+        return np.where(self.stations[idx] == num_poste, idx, -1)
+
+    def lookup(self, df: pd.DataFrame, variable: str, freq: str = 'mensuelle') -> np.ndarray:
+        """
+        Normale associée à chaque ligne du DataFrame
+
+        Args:
+            df: DataFrame avec NUM_POSTE et la date (ou AAAAMMJJ)
+            variable: Variable météo
+            freq: 'mensuelle' ou 'quotidienne'
+
+        Returns:
+            Tableau float aligné sur les lignes de df (NaN si inconnue)
+        """
+        if variable not in self.variables or df.empty:
+            return np.full(len(df), np.nan)
+
+        v = self.variables.index(variable)
+        st_idx = self.station_index(df['NUM_POSTE'])
+        _, mois, jour, valid = date_components(df)
+
+        if freq == 'quotidienne':
+            normales = self.quotidiennes[st_idx, calendar_day_index(mois, jour), v]
+        else:
+            normales = self.mensuelles[st_idx, mois - 1, v]
+
+        return np.where((st_idx >= 0) & valid, normales, np.nan)
+
+    def anomalies(self, df: pd.DataFrame, variable: str, freq: str = 'mensuelle') -> pd.Series:
+        """
+        Écart de chaque observation à la normale de sa station
+
+        Args:
+            df: DataFrame avec NUM_POSTE, la date et la variable
+            variable: Variable météo
+            freq: 'mensuelle' ou 'quotidienne'
+
+        Returns:
+            Série d'anomalies alignée sur l'index de df
+        """
+        valeurs = df[variable].to_numpy(dtype=np.float64)
+        return pd.Series(valeurs - self.lookup(df, variable, freq), index=df.index)
+
+    def replace_stations(self, update: 'NormalsStore') -> 'NormalsStore':
+        """
+        Remplace (ou ajoute) les stations recalculées dans un autre store
+
+        Args:
+            update: Store calculé sur un sous-ensemble de stations
+
+        Returns:
+            Nouveau NormalsStore (les variables de self sont conservées)
+        """
+        keep = ~np.isin(self.stations, update.stations)
+        stations = np.concatenate([self.stations[keep], update.stations])
+        order = np.argsort(stations, kind='stable')
+
+        def splice(old, new):
+            aligned = np.full((len(update.stations),) + old.shape[1:], np.nan, dtype=old.dtype)
+            for v, variable in enumerate(self.variables):
+                if variable in update.variables:
+                    aligned[:, :, v] = new[:, :, update.variables.index(variable)]
+            return np.concatenate([old[keep], aligned])[order]
+
+        periode = (min(self.periode[0], update.periode[0]), max(self.periode[1], update.periode[1]))
+        return NormalsStore(stations[order], self.variables,
+                            splice(self.mensuelles, update.mensuelles),
+                            splice(self.quotidiennes, update.quotidiennes),
+                            periode)
+
+    def save(self, path: str = NORMALS_FILE):
+        """Sauvegarde le store au format .npz"""
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        np.savez_compressed(
+            path,
+            stations=self.stations,
+            variables=np.array(self.variables),
+            mensuelles=self.mensuelles,
+            quotidiennes=self.quotidiennes,
+            periode=np.array(self.periode)
+        )
+
+    @classmethod
+    def load(cls, path: str = NORMALS_FILE) -> 'NormalsStore':
+        """Charge un store sauvegardé par save()"""
+        with np.load(path, allow_pickle=False) as data:
+            return cls(
+                stations=data['stations'],
+                variables=data['variables'].tolist(),
+                mensuelles=data['mensuelles'],
+                quotidiennes=data['quotidiennes'],
+                periode=data['periode']
+            )
+
+
+def compute_normals(df: pd.DataFrame,
+                    variables: list = None,
+                    reference_period: tuple = REFERENCE_PERIOD,
+                    smoothing_window: int = 31) -> NormalsStore:
+    """
+    Calcule les normales quotidiennes et mensuelles de chaque station
+
+    La période effective (années réellement couvertes) est enregistrée dans
+    le store. Si le jeu de données ne recoupe pas du tout la période de
+    référence, toutes les années disponibles sont utilisées.
+
+    Args:
+        df: DataFrame brut ou enrichi (NUM_POSTE + date ou AAAAMMJJ)
+        variables: Variables à traiter (défaut : NORMALS_VARIABLES)
+        reference_period: (année_début, année_fin) incluses
+        smoothing_window: Fenêtre (jours) du lissage des normales quotidiennes
+
+    Returns:
+        NormalsStore
+    """
+    if variables is None:
+        variables = NORMALS_VARIABLES
+    variables = [v for v in variables if v in df.columns]
+
+    annee, mois, jour, valid_date = date_components(df)
+    in_period = valid_date & (annee >= reference_period[0]) & (annee <= reference_period[1])
+
+    if not in_period.any():
+        in_period = valid_date
+
+    if in_period.any():
+        periode = (annee[in_period].min(), annee[in_period].max())
+    else:
+        periode = reference_period
+
+    stations, st_idx = np.unique(df['NUM_POSTE'].to_numpy(dtype=np.int64), return_inverse=True)
+    n_st = len(stations)
+
+    idx_mois = st_idx * 12 + (mois - 1)
+    idx_jour = st_idx * N_JOURS_CALENDAIRES + calendar_day_index(mois, jour)
+
+    mensuelles = np.full((n_st, 12, len(variables)), np.nan, dtype=np.float32)
+    quotidiennes = np.full((n_st, N_JOURS_CALENDAIRES, len(variables)), np.nan, dtype=np.float32)
+
+    for v, variable in enumerate(variables):
+        valeurs = df[variable].to_numpy(dtype=np.float64)
+        valid = in_period & ~np.isnan(valeurs)
+
+        sums = np.bincount(idx_mois[valid], weights=valeurs[valid], minlength=n_st * 12)
+        counts = np.bincount(idx_mois[valid], minlength=n_st * 12)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            mensuelles[:, :, v] = (sums / counts).reshape(n_st, 12)
+
+        size = n_st * N_JOURS_CALENDAIRES
+        sums = np.bincount(idx_jour[valid], weights=valeurs[valid], minlength=size)
+        counts = np.bincount(idx_jour[valid], minlength=size).astype(np.float64)
+        sums, counts = _circular_smoothing(
+            sums.reshape(n_st, N_JOURS_CALENDAIRES),
+            counts.reshape(n_st, N_JOURS_CALENDAIRES),
+            smoothing_window
+        )
+        with np.errstate(invalid='ignore', divide='ignore'):
+            quotidiennes[:, :, v] = sums / counts
+
+    return NormalsStore(stations, variables, mensuelles, quotidiennes, periode)
@@ -0,0 +1,64 @@
+"""
+Exécution des calculs lourds dans des processus workers
+
+Le cœur ne dépend pas de Streamlit : ses fonctions peuvent être envoyées
+telles quelles à un ProcessPoolExecutor (fonctions de module, arguments
+picklables).
+"""
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+
+def default_workers() -> int:
+    """Nombre de workers par défaut (cœurs disponibles, au moins 1)"""
+    try:
+        return max(len(os.sched_getaffinity(0)), 1)
+    except AttributeError:
+        return max(os.cpu_count() or 1, 1)
+
+
+def parallel_map(func, items, workers: int = None, chunksize: int = 1) -> list:
+    """
+    Applique func à chaque élément, dans un pool de processus si utile
+
+    Args:
+        func: Fonction de module (picklable)
+        items: Éléments à traiter
+        workers: Nombre de processus (None = cœurs disponibles, 1 = en série)
+        chunksize: Éléments envoyés par lot à chaque worker
+
+    Returns:
+        Résultats dans l'ordre des éléments
+    """
+    items = list(items)
+    workers = min(workers or default_workers(), len(items)) if items else 1
+
+    if workers <= 1:
+        return [func(item) for item in items]
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(func, items, chunksize=chunksize))
+
+
+def parallel_starmap(func, arg_tuples, workers: int = None) -> list:
+    """
+    Variante de parallel_map pour des fonctions à plusieurs arguments
+
+    Args:
+        func: Fonction de module (picklable)
+        arg_tuples: Tuples d'arguments
+        workers: Nombre de processus (None = cœurs disponibles, 1 = en série)
+
+    Returns:
+        Résultats dans l'ordre des tuples
+    """
+    arg_tuples = [tuple(args) for args in arg_tuples]
+    workers = min(workers or default_workers(), len(arg_tuples)) if arg_tuples else 1
+
+    if workers <= 1:
+        return [func(*args) for args in arg_tuples]
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(func, *args) for args in arg_tuples]
+        return [future.result() for future in futures]
@@ -0,0 +1,393 @@
+"""
+Module d'optimisation de performance pour données massives (sans Streamlit)
+"""
+
+import pandas as pd
+import numpy as np
+from .downsampling import DEFAULT_MAX_POINTS, WEBGL_THRESHOLD
+
+
+def _strata_codes(df: pd.DataFrame, keys: list) -> np.ndarray:
+    """Numéro de strate de chaque ligne (0..k-1), une factorisation par colonne"""
+    codes = np.zeros(len(df), dtype=np.int64)
+    for key in keys:
+        key_codes, uniques = pd.factorize(df[key], use_na_sentinel=False)
+        codes = codes * len(uniques) + key_codes
+        if len(keys) > 1:
+            # Renumérotation dense des combinaisons présentes
+            present = np.bincount(codes) > 0
+            codes = (np.cumsum(present) - 1)[codes]
+    return codes
+
+
+def _allocate(sizes: np.ndarray, total: int, allocation: str) -> np.ndarray:
+    """
+    Nombre de lignes à tirer dans chaque strate
+
+    Args:
+        sizes: Taille de chaque strate
+        total: Nombre de lignes à tirer (inférieur à la somme des tailles)
+        allocation: 'proportional' (au prorata des tailles, plus forts restes)
+            ou 'equal' (même quota pour toutes, la part inutilisée des petites
+            strates revenant aux autres)
+
+    Returns:
+        Quotas par strate (entiers, au plus la taille de la strate)
+    """
+    if allocation == 'proportional':
+        exact = sizes * (total / sizes.sum())
+    elif allocation == 'equal':
+        # Niveau commun L tel que somme(min(taille, L)) = total
+        ordered = np.sort(sizes)
+        below = np.concatenate([[0], np.cumsum(ordered)[:-1]])
+        levels = (total - below) / (len(sizes) - np.arange(len(sizes)))
+        k = np.searchsorted(levels <= ordered, True)
+        exact = np.minimum(sizes, levels[min(k, len(sizes) - 1)])
+    else:
+        raise ValueError(f"Allocation inconnue : {allocation} (attendu : 'proportional' ou 'equal')")
+
+    quotas = np.minimum(np.floor(exact).astype(np.int64), sizes)
+
+    # Lignes restantes : aux plus forts restes, dans les strates non épuisées
+    remainder = np.where(quotas < sizes, exact - quotas, -1.0)
+    missing = int(total - quotas.sum())
+    if missing > 0:
+        quotas[np.argsort(-remainder, kind='stable')[:missing]] += 1
+    return quotas
+
+
+def stratified_sample(df: pd.DataFrame, max_points: int = 10000, by='annee',
+                      allocation: str = 'proportional', seed: int = 42) -> pd.DataFrame:
+    """
+    Échantillon stratifié reproductible
+
+    Chaque ligne reçoit une clé aléatoire (graine fixe) ; l'échantillon d'une
+    strate est formé des quota lignes de plus petite clé, numérotées par
+    groupby().cumcount() dans l'ordre des clés, sans boucle sur les strates.
+    Seules les candidates (clé sous un seuil d'environ deux fois la fraction
+    tirée de la strate) sont triées : une strate qui en manquerait reprend
+    toutes ses lignes, le tirage reste donc exact.
+
+    Args:
+        df: DataFrame complet
+        max_points: Taille de l'échantillon
+        by: Colonne(s) définissant les strates ('annee', 'NUM_POSTE', 'region',
+            ou une liste de colonnes) ; les valeurs manquantes forment une strate
+        allocation: 'proportional' (au prorata de la taille des strates) ou
+            'equal' (même nombre de lignes par strate, dans la limite de sa taille)
+        seed: Graine du tirage
+
+    Returns:
+        DataFrame échantillonné, dans l'ordre d'origine des lignes
+    """
+    if len(df) <= max_points:
+        return df
+
+    codes = _strata_codes(df, [by] if isinstance(by, str) else list(by))
+    sizes = np.bincount(codes)
+    quotas = _allocate(sizes, max_points, allocation)
+
+    key = np.random.default_rng(seed).random(len(df))
+    limit = np.minimum(1.0, (2 * quotas + 10) / sizes)
+    candidate = key < limit[codes]
+    short = np.bincount(codes[candidate], minlength=len(sizes)) < quotas
+    if short.any():
+        candidate |= short[codes]
+
+    rows = np.flatnonzero(candidate)
+    rows = rows[np.argsort(key[rows])]
+    strata = codes[rows]
+    rank = pd.Series(strata).groupby(strata).cumcount().to_numpy()
+
+    return df.iloc[np.sort(rows[rank < quotas[strata]])]
+
+
+def sample_data_for_viz(df: pd.DataFrame, max_points: int = 10000, method: str = 'random',
+                        by='annee', allocation: str = 'proportional', seed: int = 42) -> pd.DataFrame:
+    """
+    Échantillonne les données pour visualisation rapide
+    
+    Args:
+        df: DataFrame complet
+        max_points: Nombre maximum de points à afficher
+        method: 'random', 'first', 'last', 'stratified'
+        by: Colonne(s) des strates pour 'stratified' (voir stratified_sample)
+        allocation: 'proportional' ou 'equal' pour 'stratified'
+        seed: Graine des tirages aléatoires
+        
+    Returns:
+        DataFrame échantillonné
+    """
+    if len(df) <= max_points:
+        return df
+    
+    if method == 'first':
+        return df.head(max_points)
+    elif method == 'last':
+        return df.tail(max_points)
+    elif method == 'stratified':
+        keys = [by] if isinstance(by, str) else list(by)
+        if set(keys).issubset(df.columns):
+            return stratified_sample(df, max_points, keys, allocation, seed)
+    
+    return df.sample(n=max_points, random_state=seed)
+
+
+def aggregate_temporal_data(df: pd.DataFrame, freq: str = 'M') -> pd.DataFrame:
+    """
+    Agrège les données temporelles pour réduire le nombre de points
+    
+    Args:
+        df: DataFrame avec colonne 'date'
+        freq: Fréquence d'agrégation ('D', 'W', 'M', 'Y')
+        
+    Returns:
+        DataFrame agrégé
+    """
+    if 'date' not in df.columns:
+        return df
+    
+    df_agg = df.set_index('date').resample(freq).agg({
+        col: 'mean' for col in df.select_dtypes(include=[np.number]).columns
+    })
+    
+    return df_agg.reset_index()
+
+
+def reduce_dataframe_memory(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Réduit l'utilisation mémoire du DataFrame
+    
+    Args:
+        df: DataFrame à optimiser
+        
+    Returns:
+        DataFrame optimisé
+    """
+    df = df.copy()
+    
+    for col in df.select_dtypes(include=['float']).columns:
+        df[col] = pd.to_numeric(df[col], downcast='float')
+    
+    for col in df.select_dtypes(include=['integer']).columns:
+        df[col] = pd.to_numeric(df[col], downcast='integer')
+    
+    for col in df.select_dtypes(include=['object']).columns:
+        if df[col].nunique() / len(df) < 0.5:
+            df[col] = df[col].astype('category')
+    
+    return df
+
+
+def filter_data_by_date_range(df: pd.DataFrame, start_date=None, end_date=None) -> pd.DataFrame:
+    """
+    Filtre efficace par plage de dates
+    
+    Args:
+        df: DataFrame avec colonne 'date'
+        start_date: Date de début
+        end_date: Date de fin
+        
+    Returns:
+        DataFrame filtré
+    """
+    if 'date' not in df.columns:
+        return df
+    
+    mask = pd.Series(True, index=df.index)
+    
+    if start_date:
+        mask &= df['date'] >= start_date
+    
+    if end_date:
+        mask &= df['date'] <= end_date
+    
+    return df[mask]
+
+
+def get_top_n_categories(df: pd.DataFrame, column: str, n: int = 10) -> list:
+    """
+    Récupère les N catégories les plus fréquentes
+    
+    Args:
+        df: DataFrame
+        column: Nom de la colonne
+        n: Nombre de catégories à retourner
+        
+    Returns:
+        Liste des top N catégories
+    """
+    counts = df[column].value_counts()
+    # Les colonnes catégorielles comptent aussi les modalités absentes (0)
+    return counts[counts > 0].head(n).index.tolist()
+
+
+def optimize_plotly_figure(fig, max_points: int = 5000):
+    """
+    Optimise une figure Plotly pour performance
+    
+    Args:
+        fig: Figure Plotly
+        max_points: Nombre max de points
+        
+    Returns:
+        Figure optimisée
+    """
+    # Réduire la qualité des rendus pour vitesse
+    fig.update_layout(
+        hovermode='closest',  # Au lieu de 'x' ou 'y'
+        dragmode='pan',  # Désactiver zoom par défaut
+    )
+    
+    # Désactiver les animations
+    fig.layout.transition = {'duration': 0}
+    
+    return fig
+
+
+def paginate_dataframe(df: pd.DataFrame, page_size: int = 100, page_num: int = 1) -> pd.DataFrame:
+    """
+    Pagination pour grands DataFrames
+    
+    Args:
+        df: DataFrame complet
+        page_size: Taille de la page
+        page_num: Numéro de page (1-indexé)
+        
+    Returns:
+        DataFrame paginé
+    """
+    start_idx = (page_num - 1) * page_size
+    end_idx = start_idx + page_size
+    
+    return df.iloc[start_idx:end_idx]
+
+
+def _marker_coordinates(gdf):
+    """Longitude et latitude des marqueurs (colonnes LON/LAT ou géométrie ponctuelle)"""
+    if {'LON', 'LAT'}.issubset(gdf.columns):
+        return gdf['LON'].to_numpy(dtype=np.float64), gdf['LAT'].to_numpy(dtype=np.float64)
+    return gdf.geometry.x.to_numpy(), gdf.geometry.y.to_numpy()
+
+
+def _extremeness(values) -> np.ndarray:
+    """Écart à la médiane en écarts interquartiles (valeurs manquantes : -1)"""
+    values = np.asarray(values, dtype=np.float64)
+    if not np.isfinite(values).any():
+        return np.full(len(values), -1.0)
+    q1, median, q3 = np.nanpercentile(values, [25, 50, 75])
+    score = np.abs(values - median) / ((q3 - q1) or 1.0)
+    return np.where(np.isnan(score), -1.0, score)
+
+
+def _grid_cells(x: np.ndarray, y: np.ndarray, level: int) -> np.ndarray:
+    """Cellule de chaque point dans une grille de 2^level × 2^level"""
+    size = 2 ** level
+    return np.minimum((x * size).astype(np.int64), size - 1) * size + np.minimum((y * size).astype(np.int64), size - 1)
+
+
+def _cell_leaders(cells: np.ndarray, score: np.ndarray) -> np.ndarray:
+    """Position du point de plus fort score de chaque cellule"""
+    order = np.lexsort((-score, cells))
+    first = np.concatenate([[True], cells[order][1:] != cells[order][:-1]])
+    return order[first]
+
+
+def limit_map_markers(gdf, max_markers: int = 500, method: str = 'grid', variable: str = None,
+                      seed: int = 42):
+    """
+    Limite le nombre de marqueurs sur une carte
+    
+    Méthode 'grid' (arbre quaternaire) : l'emprise est découpée en grilles de
+    plus en plus fines (2 × 2, 4 × 4...) ; la plus fine dont les cellules
+    occupées tiennent dans le budget garde un marqueur par cellule, puis le
+    budget restant va aux cellules du niveau suivant non encore représentées.
+    Les stations isolées (montagne) restent visibles, les groupes denses
+    (littoral) sont éclaircis. Dans chaque cellule, et pour départager les
+    cellules du niveau suivant, les valeurs les plus extrêmes de variable
+    passent en premier (tirage aléatoire reproductible sans variable).
+    
+    Args:
+        gdf: GeoDataFrame ou DataFrame avec LAT et LON
+        max_markers: Nombre maximum de marqueurs
+        method: 'grid' ou 'random' (tirage aléatoire simple)
+        variable: Colonne affichée, dont les extrêmes sont privilégiés
+        seed: Graine des tirages aléatoires
+        
+    Returns:
+        GeoDataFrame échantillonné, dans l'ordre d'origine des lignes
+    """
+    if len(gdf) <= max_markers:
+        return gdf
+    
+    if method == 'random':
+        return gdf.sample(n=max_markers, random_state=seed)
+    
+    x, y = _marker_coordinates(gdf)
+    
+    # Cellules carrées : longitudes ramenées à la latitude moyenne
+    x = x * np.cos(np.radians(np.nanmean(y)))
+    span = max(np.nanmax(x) - np.nanmin(x), np.nanmax(y) - np.nanmin(y)) or 1.0
+    x = np.nan_to_num((x - np.nanmin(x)) / span)
+    y = np.nan_to_num((y - np.nanmin(y)) / span)
+    
+    if variable is not None and variable in gdf.columns:
+        score = _extremeness(gdf[variable])
+    else:
+        score = np.random.default_rng(seed).random(len(gdf))
+    
+    # Niveau le plus fin dont les cellules occupées tiennent dans le budget
+    level = 0
+    while level < 24 and len(np.unique(_grid_cells(x, y, level + 1))) <= max_markers:
+        level += 1
+    
+    kept = _cell_leaders(_grid_cells(x, y, level), score)
+    
+    # Budget restant : meilleures cellules du niveau suivant sans marqueur
+    finer = _grid_cells(x, y, level + 1)
+    leaders = _cell_leaders(finer, score)
+    leaders = leaders[~np.isin(finer[leaders], finer[kept])]
+    extra = leaders[np.argsort(-score[leaders], kind='stable')[:max_markers - len(kept)]]
+    
+    return gdf.iloc[np.sort(np.concatenate([kept, extra]))]
+
+
+def get_performance_config():
+    """
+    Retourne la configuration de performance recommandée
+    
+    Returns:
+        dict: Configuration
+    """
+    return {
+        'max_chart_points': 10000,
+        'max_line_points': DEFAULT_MAX_POINTS,  # Points par courbe (core.downsampling)
+        'max_map_markers': 500,
+        'max_table_rows': 1000,
+        'aggregation_freq': 'M',  # Mensuel par défaut
+        'enable_downsampling': True,
+        'enable_caching': True,
+        'chart_renderer': 'webgl',  # Pour Plotly : 'webgl' ou 'svg'
+        'webgl_threshold': WEBGL_THRESHOLD  # Points au-delà desquels une courbe passe en WebGL
+    }
+
+
+def create_summary_stats(df: pd.DataFrame, group_by: str = None) -> pd.DataFrame:
+    """
+    Crée des statistiques résumées au lieu d'afficher toutes les données
+    
+    Args:
+        df: DataFrame
+        group_by: Colonne de groupement
+        
+    Returns:
+        DataFrame de statistiques
+    """
+    numeric_cols = df.select_dtypes(include=[np.number]).columns
+    
+    if group_by and group_by in df.columns:
+        stats = df.groupby(group_by)[numeric_cols].agg(['count', 'mean', 'std', 'min', 'max'])
+    else:
+        stats = df[numeric_cols].describe()
+    
+    return stats
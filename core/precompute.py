@@ -0,0 +1,120 @@
+"""
+Précalcul des agrégats dérivés (normales, cubes de rose des vents et de quantiles)
+
+Chaque agrégat est une tâche indépendante qui relit seulement les colonnes
+utiles du fichier Parquet : les tâches sont réparties sur des processus
+workers (core.parallel) sans transférer la table complète entre processus.
+"""
+
+import time
+from pathlib import Path
+
+import pandas as pd
+from utils.constants import NORMALS_VARIABLES
+from .ingest import read_partitioned
+from .normals import compute_normals, NORMALS_FILE
+from .parallel import parallel_starmap
+from .query import open_dataset
+from .quantiles import build_quantile_cube, quantile_cube_path, QUANTILE_CUBE_VARIABLES
+from .wind_rose import build_wind_rose_cube, wind_rose_cube_path, WIND_ROSE_CUBE_VARIABLES
+
+DATE_COLUMNS = ['NUM_POSTE', 'AAAAMMJJ']
+
+
+def _available_columns(path: str) -> list:
+    return open_dataset(path).schema.names
+
+
+def _read_columns(path: str, columns: list) -> pd.DataFrame:
+    """Lit des colonnes d'un fichier Parquet ou du jeu partitionné"""
+    if Path(path).is_dir():
+        return read_partitioned(path, columns)
+    return pd.read_parquet(path, columns=columns)
+
+
+def build_normals_file(path: str, output: str = NORMALS_FILE) -> str:
+    """
+    Tâche : calcule et sauvegarde les normales à partir du fichier Parquet
+
+    Returns:
+        Résumé lisible de la tâche
+    """
+    start = time.perf_counter()
+    available = _available_columns(path)
+    columns = DATE_COLUMNS + [v for v in NORMALS_VARIABLES if v in available]
+
+    normals = compute_normals(_read_columns(path, columns))
+    normals.save(output)
+
+    return (f"Normales {normals.periode[0]}-{normals.periode[1]} : {len(normals.stations):,} stations, "
+            f"{len(normals.variables)} variables → {output} ({time.perf_counter() - start:.1f}s)")
+
+
+def build_wind_rose_cube_file(path: str, speed_col: str, direction_col: str) -> str:
+    """
+    Tâche : construit et sauvegarde un cube de rose des vents
+
+    Returns:
+        Résumé lisible de la tâche
+    """
+    start = time.perf_counter()
+    available = _available_columns(path)
+    if speed_col not in available or direction_col not in available:
+        return f"Rose {speed_col}/{direction_col} : colonnes absentes, ignorée"
+
+    df = _read_columns(path, DATE_COLUMNS + [speed_col, direction_col])
+    cube = build_wind_rose_cube(df, speed_col, direction_col)
+    output = wind_rose_cube_path(speed_col, direction_col)
+    cube.save(output)
+
+    return (f"Rose {speed_col}/{direction_col} : {len(cube.cell_period):,} cellules station-mois "
+            f"→ {output} ({time.perf_counter() - start:.1f}s)")
+
+
+def build_quantile_cube_file(path: str, variable: str) -> str:
+    """
+    Tâche : construit et sauvegarde le cube de quantiles d'une variable
+
+    Returns:
+        Résumé lisible de la tâche
+    """
+    start = time.perf_counter()
+    if variable not in _available_columns(path):
+        return f"Quantiles {variable} : colonne absente, ignorée"
+
+    cube = build_quantile_cube(_read_columns(path, DATE_COLUMNS + [variable]), variable)
+    output = quantile_cube_path(variable)
+    cube.save(output)
+
+    return (f"Quantiles {variable} : {len(cube.cell_period):,} cellules station-mois, "
+            f"{len(cube.edges)} bornes → {output} ({time.perf_counter() - start:.1f}s)")
+
+
+def _run_task(name: str, *args) -> str:
+    return TASKS[name](*args)
+
+
+TASKS = {
+    'normales': build_normals_file,
+    'rose_des_vents': build_wind_rose_cube_file,
+    'quantiles': build_quantile_cube_file,
+}
+
+
+def precompute_derived(path: str, workers: int = None) -> list:
+    """
+    Précalcule tous les agrégats dérivés d'un fichier météo
+
+    Args:
+        path: Fichier Parquet météo ou jeu partitionné (jeu complet)
+        workers: Nombre de processus (None = cœurs disponibles, 1 = en série)
+
+    Returns:
+        Résumés des tâches, dans l'ordre de soumission
+    """
+    tasks = [('normales', str(path))]
+    tasks += [('rose_des_vents', str(path), speed, direction)
+              for speed, direction in WIND_ROSE_CUBE_VARIABLES]
+    tasks += [('quantiles', str(path), variable) for variable in QUANTILE_CUBE_VARIABLES]
+
+    return parallel_starmap(_run_task, tasks, workers)
@@ -0,0 +1,272 @@
+"""
+Profilage des chargements, filtres et graphiques
+
+profile() s'utilise comme décorateur ou comme gestionnaire de contexte. Chaque
+exécution produit une mesure (span) : durée en nanosecondes, pic mémoire
+(tracemalloc, optionnel), lignes en entrée et en sortie. Les spans s'imbriquent
+(un create_* appelé pendant le rendu d'une page est enfant du span de la page)
+et sont collectés par thread, donc par session Streamlit.
+
+Activation par variables d'environnement :
+    METEO_PROFILING=0           désactive la collecte (activée par défaut)
+    METEO_PROFILING_MEMORY=1    active le suivi mémoire (tracemalloc, coûteux)
+"""
+
+import json
+import os
+import threading
+import time
+import tracemalloc
+from datetime import datetime
+from functools import wraps
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+PROFILING_LOG = 'logs/profiling.jsonl'
+
+_state = threading.local()
+_run_counter = 0
+_run_lock = threading.Lock()
+
+
+def profiling_enabled() -> bool:
+    """Collecte des spans active"""
+    return os.environ.get('METEO_PROFILING', '1') != '0'
+
+
+def memory_tracking_enabled() -> bool:
+    """Suivi du pic mémoire actif"""
+    return os.environ.get('METEO_PROFILING_MEMORY', '0') == '1'
+
+
+def count_rows(obj):
+    """
+    Nombre de lignes (DataFrame, Series, tableau) ou de points (figure Plotly)
+
+    Returns:
+        Entier, ou None si l'objet n'est pas mesurable
+    """
+    if isinstance(obj, (pd.DataFrame, pd.Series, np.ndarray, list)):
+        return len(obj)
+
+    traces = getattr(obj, 'data', None)
+    if isinstance(traces, tuple):
+        total = 0
+        for trace in traces:
+            for attr in ('x', 'r', 'lat', 'values', 'z'):
+                values = getattr(trace, attr, None)
+                if values is not None:
+                    total += len(values)
+                    break
+        return total
+
+    return None
+
+
+class Span:
+    """Mesure d'une exécution profilée"""
+
+    __slots__ = ('name', 'depth', 'parent', 'start_ns', 'duration_ns', 'peak_bytes',
+                 'rows_in', 'rows_out', 'error', '_mem_start', '_mem_peak')
+
+    def __init__(self, name: str, depth: int, parent: str = None, rows_in=None):
+        self.name = name
+        self.depth = depth
+        self.parent = parent
+        self.start_ns = 0
+        self.duration_ns = 0
+        self.peak_bytes = None
+        self.rows_in = rows_in
+        self.rows_out = None
+        self.error = None
+        self._mem_start = 0
+        self._mem_peak = 0
+
+    @property
+    def duration_ms(self) -> float:
+        return self.duration_ns / 1e6
+
+    def to_dict(self) -> dict:
+        return {
+            'name': self.name,
+            'parent': self.parent,
+            'depth': self.depth,
+            'duration_ms': round(self.duration_ms, 3),
+            'peak_mb': None if self.peak_bytes is None else round(self.peak_bytes / 1024 ** 2, 3),
+            'rows_in': self.rows_in,
+            'rows_out': self.rows_out,
+            'error': self.error,
+        }
+
+
+def _stack() -> list:
+    if not hasattr(_state, 'stack'):
+        _state.stack = []
+        _state.spans = []
+    return _state.stack
+
+
+def _finished() -> list:
+    _stack()
+    return _state.spans
+
+
+def _start(span: Span):
+    stack = _stack()
+
+    if memory_tracking_enabled():
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+        current, peak = tracemalloc.get_traced_memory()
+        # Le pic courant appartient au span parent avant la remise à zéro
+        if stack:
+            stack[-1]._mem_peak = max(stack[-1]._mem_peak, peak)
+        tracemalloc.reset_peak()
+        span._mem_start = current
+        span._mem_peak = current
+
+    stack.append(span)
+    span.start_ns = time.perf_counter_ns()
+
+
+def _stop(span: Span):
+    span.duration_ns = time.perf_counter_ns() - span.start_ns
+    stack = _stack()
+    stack.pop()
+
+    if memory_tracking_enabled() and tracemalloc.is_tracing():
+        _, peak = tracemalloc.get_traced_memory()
+        peak = max(span._mem_peak, peak)
+        span.peak_bytes = max(peak - span._mem_start, 0)
+        if stack:
+            stack[-1]._mem_peak = max(stack[-1]._mem_peak, peak)
+
+    _finished().append(span)
+
+
+class profile:
+    """
+    Décorateur ou gestionnaire de contexte créant un span
+
+    Usage:
+        @profile()
+        def create_chart(df, variable): ...
+
+        with profile('agrégation mensuelle', rows_in=len(df)) as span:
+            df_m = ...
+            span.rows_out = len(df_m)
+
+    En décorateur, les lignes en entrée sont celles du premier argument
+    mesurable et les lignes en sortie celles du résultat.
+    """
+
+    def __init__(self, name: str = None, rows_in=None):
+        self.name = name
+        self.rows_in = rows_in
+        self._span = None
+
+    def __enter__(self):
+        if not profiling_enabled():
+            # Span factice : les attributs restent affectables
+            self._span = Span(self.name or 'span', 0)
+            return self._span
+
+        stack = _stack()
+        parent = stack[-1].name if stack else None
+        self._span = Span(self.name or 'span', len(stack), parent, self.rows_in)
+        _start(self._span)
+        return self._span
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is not None:
+            self._span.error = exc_type.__name__
+        if profiling_enabled() and self._span.start_ns:
+            _stop(self._span)
+        return False
+
+    def __call__(self, func):
+        name = self.name or func.__name__
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            if not profiling_enabled():
+                return func(*args, **kwargs)
+
+            rows_in = None
+            for arg in args:
+                rows_in = count_rows(arg)
+                if rows_in is not None:
+                    break
+
+            with profile(name, rows_in) as span:
+                result = func(*args, **kwargs)
+                span.rows_out = count_rows(result)
+            return result
+
+        return wrapper
+
+
+def collect_spans(clear: bool = True) -> list:
+    """
+    Spans terminés du thread courant (dans l'ordre de fin)
+
+    Args:
+        clear: Vider la collecte après lecture (une collecte par exécution de page)
+
+    Returns:
+        Liste de Span
+    """
+    spans = list(_finished())
+    if clear:
+        _finished().clear()
+    return spans
+
+
+def slowest_spans(spans: list, n: int = 10) -> pd.DataFrame:
+    """
+    Les n spans les plus lents sous forme de tableau
+
+    Args:
+        spans: Liste de Span
+        n: Nombre de lignes
+
+    Returns:
+        DataFrame trié par durée décroissante
+    """
+    rows = [span.to_dict() for span in spans]
+    if not rows:
+        return pd.DataFrame(columns=['name', 'parent', 'depth', 'duration_ms',
+                                     'peak_mb', 'rows_in', 'rows_out', 'error'])
+    table = pd.DataFrame(rows).sort_values('duration_ms', ascending=False).head(n)
+    table[['rows_in', 'rows_out']] = table[['rows_in', 'rows_out']].astype('Int64')
+    return table
+
+
+def export_spans(spans: list, path: str = PROFILING_LOG, context: dict = None) -> str:
+    """
+    Ajoute les spans à un fichier JSON-lines (une ligne par span)
+
+    Args:
+        spans: Liste de Span
+        path: Fichier de destination
+        context: Champs ajoutés à chaque ligne (page, session...)
+
+    Returns:
+        Identifiant de l'exécution exportée
+    """
+    global _run_counter
+    with _run_lock:
+        _run_counter += 1
+        run_id = f"{os.getpid()}-{_run_counter}"
+
+    timestamp = datetime.now().isoformat(timespec='seconds')
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+
+    with open(path, 'a', encoding='utf-8') as f:
+        for span in spans:
+            record = {'run': run_id, 'timestamp': timestamp, **(context or {}), **span.to_dict()}
+            f.write(json.dumps(record, ensure_ascii=False) + '\n')
+
+    return run_id
@@ -0,0 +1,165 @@
+"""
+Masquage des mesures selon les codes qualité Météo-France
+
+Chaque mesure X est accompagnée d'un code QX (utils.constants.QUALITY_CODES) :
+0 protégée, 1 validée, 2 douteuse, 9 filtrée non validée. Les codes
+acceptés pour une variable forment un masque de bits (bit c levé = code c
+accepté). Toutes les variables sont traitées en une seule opération : les
+codes sont lus en matrice (lignes × variables) puis confrontés à la table
+de bits des variables par indexation NumPy, sans boucle .loc par colonne.
+"""
+
+import numpy as np
+import pandas as pd
+from utils.constants import QUALITY_RULES
+from .profiling import profile
+
+# Codes internes : mesure sans code qualité, code hors plage (jamais accepté)
+UNFLAGGED = 62
+UNKNOWN = 63
+
+
+def quality_pairs(columns) -> list:
+    """
+    Couples (mesure, code qualité) présents dans une table
+
+    Args:
+        columns: Colonnes de la table
+
+    Returns:
+        Liste de (variable, colonne QVARIABLE)
+    """
+    available = set(columns)
+    return [(col[1:], col) for col in columns if col.startswith('Q') and col[1:] in available]
+
+
+def code_bitmask(codes, keep_unflagged: bool = True) -> int:
+    """
+    Masque de bits d'une liste de codes acceptés
+
+    Args:
+        codes: Codes qualité acceptés (ex. [0, 1])
+        keep_unflagged: Accepter les mesures sans code qualité
+
+    Returns:
+        Entier dont le bit c est levé si le code c est accepté
+
+    Raises:
+        ValueError: Si un code est hors de la plage 0-61
+    """
+    mask = 0
+    for code in codes:
+        code = int(code)
+        if not 0 <= code < UNFLAGGED:
+            raise ValueError(f"Code qualité invalide : {code}")
+        mask |= 1 << code
+    if keep_unflagged:
+        mask |= 1 << UNFLAGGED
+    return mask
+
+
+def resolve_rules(variables: list, accepted=None, keep_unflagged: bool = True) -> np.ndarray:
+    """
+    Masques de bits des codes acceptés, un par variable
+
+    Args:
+        variables: Variables mesurées
+        accepted: None (QUALITY_RULES), liste de codes commune à toutes les
+            variables, ou dictionnaire {variable: codes} complété par
+            QUALITY_RULES ('default' pour les variables non citées)
+        keep_unflagged: Accepter les mesures sans code qualité
+
+    Returns:
+        Tableau uint64 de longueur len(variables)
+    """
+    if accepted is None:
+        rules = QUALITY_RULES
+    elif isinstance(accepted, dict):
+        rules = {**QUALITY_RULES, **accepted}
+    else:
+        rules = {'default': list(accepted)}
+
+    return np.array([code_bitmask(rules.get(v, rules['default']), keep_unflagged) for v in variables],
+                    dtype=np.uint64)
+
+
+def rejection_mask(df: pd.DataFrame, accepted=None, keep_unflagged: bool = True):
+    """
+    Mesures rejetées par leur code qualité, toutes variables à la fois
+
+    Args:
+        df: Table au format Météo-France (colonnes X et QX)
+        accepted, keep_unflagged: Voir resolve_rules
+
+    Returns:
+        (variables, tableau booléen lignes × variables, True = rejetée)
+    """
+    pairs = quality_pairs(df.columns)
+    variables = [v for v, _ in pairs]
+    if not pairs:
+        return variables, np.zeros((len(df), 0), dtype=bool)
+
+    flags = df[[q for _, q in pairs]].to_numpy(dtype=np.float32, na_value=np.nan)
+
+    codes = np.full(flags.shape, UNKNOWN, dtype=np.uint8)
+    with np.errstate(invalid='ignore'):
+        valid = (flags >= 0) & (flags < UNFLAGGED) & (flags == np.floor(flags))
+    codes[valid] = flags[valid]
+    codes[np.isnan(flags)] = UNFLAGGED
+
+    # Table de bits (variables × 64) : accepte[j, c] = bit c du masque de j
+    masks = resolve_rules(variables, accepted, keep_unflagged)
+    accepte = ((masks[:, None] >> np.arange(64, dtype=np.uint64)) & np.uint64(1)).astype(bool)
+
+    return variables, ~accepte[np.arange(len(variables)), codes]
+
+
+@profile('quality_mask')
+def apply_quality_mask(df: pd.DataFrame, accepted=None, keep_unflagged: bool = True) -> pd.DataFrame:
+    """
+    Remplace par NaN les mesures dont le code qualité n'est pas accepté
+
+    Seules les colonnes ayant au moins une mesure rejetée sont réécrites ;
+    les autres restent partagées avec la table d'origine (copy-on-write).
+
+    Args:
+        df: Table au format Météo-France (colonnes X et QX)
+        accepted, keep_unflagged: Voir resolve_rules
+
+    Returns:
+        Nouvelle DataFrame masquée
+    """
+    variables, rejected = rejection_mask(df, accepted, keep_unflagged)
+    changed = rejected.any(axis=0)
+    if not changed.any():
+        return df
+
+    columns = [v for v, c in zip(variables, changed) if c]
+    mask = pd.DataFrame(rejected[:, changed], index=df.index, columns=columns)
+
+    df = df.copy(deep=False)
+    df[columns] = df[columns].mask(mask)
+    return df
+
+
+def quality_summary(df: pd.DataFrame, accepted=None, keep_unflagged: bool = True) -> pd.DataFrame:
+    """
+    Mesures rejetées par variable
+
+    Args:
+        df: Table au format Météo-France (colonnes X et QX)
+        accepted, keep_unflagged: Voir resolve_rules
+
+    Returns:
+        DataFrame indexée par variable : mesures, rejetees, pct_rejetees
+    """
+    variables, rejected = rejection_mask(df, accepted, keep_unflagged)
+    present = df[variables].notna().to_numpy()
+    mesures = present.sum(axis=0)
+    rejetees = (rejected & present).sum(axis=0)
+
+    return pd.DataFrame({
+        'mesures': mesures,
+        'rejetees': rejetees,
+        'pct_rejetees': np.round(100 * rejetees / np.maximum(mesures, 1), 2),
+    }, index=pd.Index(variables, name='variable'))
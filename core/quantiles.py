@@ -0,0 +1,540 @@
+"""
+Moteur de quantiles : calcul exact groupé et croquis fusionnables
+
+percentiles() calcule tous les centiles demandés en un seul appel
+np.nanpercentile (un seul tri partiel de la colonne), grouped_percentiles()
+ceux de chaque groupe (station, mois...) en un seul tri (groupe, valeur).
+box_stats() en tire les statistiques des boîtes à moustaches et histogram()
+les effectifs par classe, pour que les graphiques reçoivent quelques nombres
+par groupe ou par classe au lieu des valeurs brutes.
+
+Un cube précalculé (QuantileCube) conserve, pour chaque couple station ×
+mois, l'histogramme de la variable sur des bornes à effectif égal calculées
+sur tout le jeu. Les histogrammes s'additionnent : les centiles d'un
+ensemble quelconque de stations et d'années sont lus dans la somme de
+quelques histogrammes, sans relire la table quotidienne. Chaque borne est
+aussi une classe de largeur nulle : les valeurs fréquentes (0 mm de pluie)
+sont restituées exactement, les autres à moins d'une classe près.
+"""
+
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from utils.constants import PROCESSED_DIR, NORMALS_VARIABLES
+from .normals import date_components
+
+# Centiles affichés par défaut
+DEFAULT_PERCENTILES = [1, 5, 10, 25, 50, 75, 90, 95, 99]
+
+# Points atypiques conservés par boîte (les plus éloignés des moustaches)
+MAX_BOX_OUTLIERS = 50
+
+# Nombre de classes visé par les histogrammes affichés
+DEFAULT_HISTOGRAM_BINS = 50
+
+# Pas de classe « ronds » (× puissance de 10)
+NICE_STEPS = (1, 2, 2.5, 5, 10)
+
+# Nombre de bornes des histogrammes du cube (2 × bornes - 1 classes)
+DEFAULT_SKETCH_EDGES = 128
+
+
+def percentiles(values, ps=DEFAULT_PERCENTILES) -> pd.Series:
+    """
+    Centiles d'une série, tous calculés en un seul appel
+
+    Args:
+        values: Valeurs (les NaN sont ignorés)
+        ps: Centiles demandés (0-100)
+
+    Returns:
+        Series indexée par centile, NaN si aucune valeur
+    """
+    values = np.asarray(values, dtype=np.float64)
+    if not np.isfinite(values).any():
+        return pd.Series(np.nan, index=list(ps), dtype=np.float64)
+    return pd.Series(np.nanpercentile(values, ps), index=list(ps))
+
+
+def grouped_percentiles(values, groups, ps=DEFAULT_PERCENTILES) -> pd.DataFrame:
+    """
+    Centiles par groupe, en un tri des valeurs suivi d'un tri stable par groupe
+
+    Même interpolation linéaire que np.percentile.
+
+    Args:
+        values: Valeurs (les NaN sont ignorés)
+        groups: Groupe de chaque valeur (même longueur)
+        ps: Centiles demandés (0-100)
+
+    Returns:
+        DataFrame indexée par groupe (ordre trié), une colonne par centile,
+        plus 'n' (nombre de valeurs)
+    """
+    values = np.asarray(values, dtype=np.float64)
+    codes, uniques = pd.factorize(pd.Series(groups), sort=True)
+    valid = ~np.isnan(values) & (codes >= 0)
+
+    values, codes = values[valid], codes[valid]
+
+    # Tri des valeurs, puis tri stable par groupe (tri par base sur 16 bits si possible)
+    order = np.argsort(values)
+    group_codes = codes[order].astype(np.int16 if len(uniques) < 2 ** 15 else np.int64)
+    order = order[np.argsort(group_codes, kind='stable')]
+    ordered = values[order]
+
+    n = np.bincount(codes, minlength=len(uniques))
+    start = np.cumsum(n) - n
+
+    # Rang fractionnaire de chaque centile dans chaque groupe : groupes × centiles
+    rank = (np.asarray(ps, dtype=np.float64)[None, :] / 100) * np.maximum(n - 1, 0)[:, None]
+    low = np.floor(rank).astype(np.int64)
+    high = np.minimum(low + 1, np.maximum(n - 1, 0)[:, None])
+    weight = rank - low
+
+    empty = n == 0
+    first = np.where(empty, 0, start)[:, None]
+    if len(ordered):
+        result = (ordered[np.minimum(first + low, len(ordered) - 1)] * (1 - weight)
+                  + ordered[np.minimum(first + high, len(ordered) - 1)] * weight)
+    else:
+        result = np.full(rank.shape, np.nan)
+    result[empty] = np.nan
+
+    table = pd.DataFrame(result, index=pd.Index(uniques, name=getattr(groups, 'name', None)), columns=list(ps))
+    table['n'] = n
+    return table
+
+
+def box_stats(values, groups, whisker: float = 1.5, max_outliers: int = MAX_BOX_OUTLIERS):
+    """
+    Statistiques de boîte à moustaches par groupe (conventions de Plotly)
+
+    Quartiles par interpolation linéaire ; chaque moustache s'arrête à la
+    valeur observée la plus éloignée à moins de whisker × IQR de la boîte.
+
+    Args:
+        values: Valeurs (les NaN sont ignorés)
+        groups: Groupe de chaque valeur (même longueur)
+        whisker: Longueur des moustaches en écarts interquartiles
+        max_outliers: Points atypiques conservés par groupe (les plus éloignés)
+
+    Returns:
+        (DataFrame indexée par groupe : n, q1, median, q3, lowerfence, upperfence, mean ;
+        DataFrame des points atypiques retenus : groupe, valeur)
+    """
+    values = np.asarray(values, dtype=np.float64)
+    groups = pd.Series(groups).reset_index(drop=True)
+
+    stats = grouped_percentiles(values, groups, [25, 50, 75])
+    stats = stats.rename(columns={25: 'q1', 50: 'median', 75: 'q3'})
+    stats = stats[stats['n'] > 0]
+
+    codes = stats.index.get_indexer(groups)
+    valid = (codes >= 0) & ~np.isnan(values)
+    values, codes = values[valid], codes[valid]
+
+    q1 = stats['q1'].to_numpy()[codes]
+    q3 = stats['q3'].to_numpy()[codes]
+    iqr = q3 - q1
+    low_limit, high_limit = q1 - whisker * iqr, q3 + whisker * iqr
+    inside = (values >= low_limit) & (values <= high_limit)
+
+    n_groups = len(stats)
+    lowerfence = np.full(n_groups, np.inf)
+    upperfence = np.full(n_groups, -np.inf)
+    np.minimum.at(lowerfence, codes[inside], values[inside])
+    np.maximum.at(upperfence, codes[inside], values[inside])
+
+    stats['lowerfence'] = lowerfence
+    stats['upperfence'] = upperfence
+    stats['mean'] = np.bincount(codes, weights=values, minlength=n_groups) / stats['n'].to_numpy()
+
+    # Points atypiques : les plus éloignés des limites d'abord
+    outside = ~inside
+    distance = np.maximum(low_limit - values, values - high_limit)[outside]
+    outliers = pd.DataFrame({'code': codes[outside], 'valeur': values[outside], 'distance': distance})
+    outliers = outliers.sort_values(['code', 'distance'], ascending=[True, False], kind='stable')
+    outliers = outliers[outliers.groupby('code').cumcount() < max_outliers]
+    outliers = pd.DataFrame({
+        'groupe': stats.index.take(outliers['code'].to_numpy()),
+        'valeur': outliers['valeur'].to_numpy()
+    })
+
+    return stats, outliers
+
+
+def histogram(values, nbins: int = DEFAULT_HISTOGRAM_BINS):
+    """
+    Histogramme à pas rond (1, 2, 2,5 ou 5 × 10^k), d'au plus nbins classes environ
+
+    Les bornes sont des multiples du pas : les mesures au dixième ne tombent
+    pas irrégulièrement de part et d'autre des bornes (effet de peigne). Une
+    valeur égale à une borne compte dans la classe qui commence à cette borne.
+
+    Args:
+        values: Valeurs (les NaN sont ignorés)
+        nbins: Nombre de classes visé (le pas est arrondi au pas rond supérieur)
+
+    Returns:
+        (effectifs par classe, bornes des classes : une de plus que les effectifs) ;
+        deux tableaux vides si aucune valeur
+    """
+    values = np.asarray(values, dtype=np.float64)
+    values = values[np.isfinite(values)]
+    if len(values) == 0:
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float64)
+
+    low, high = values.min(), values.max()
+    raw_step = (high - low) / max(nbins, 1)
+    if raw_step > 0:
+        magnitude = 10.0 ** np.floor(np.log10(raw_step))
+        step = magnitude * next(s for s in NICE_STEPS if s * magnitude >= raw_step * (1 - 1e-9))
+    else:
+        step = 1.0
+
+    # Tolérance d'un dix-millième de classe : valeurs float32 voisines d'une borne
+    start = np.floor(low / step + 1e-4) * step
+    n = int(np.floor((high - start) / step + 1e-4)) + 1
+    index = np.floor((values - start) / step + 1e-4).astype(np.int64)
+    counts = np.bincount(np.clip(index, 0, n - 1), minlength=n)
+
+    return counts, start + step * np.arange(n + 1)
+
+
+def sketch_edges(values, n_edges: int = DEFAULT_SKETCH_EDGES) -> np.ndarray:
+    """
+    Bornes à effectif égal d'une variable (centiles régulièrement espacés, sans doublon)
+
+    Les centiles confondus sur une valeur très fréquente (0 mm de pluie)
+    laissent des bornes libres : elles sont redistribuées sur les valeurs
+    restantes, pour garder la résolution de la queue de distribution.
+
+    Args:
+        values: Valeurs de tout le jeu
+        n_edges: Nombre maximal de bornes
+
+    Returns:
+        Bornes croissantes (vide si aucune valeur)
+    """
+    values = np.asarray(values, dtype=np.float64)
+    values = values[~np.isnan(values)]
+    if len(values) == 0:
+        return np.array([], dtype=np.float64)
+
+    edges = np.unique(np.percentile(values, np.linspace(0, 100, n_edges)))
+    for _ in range(3):
+        free = n_edges - len(edges)
+        rest = values[~np.isin(values, edges)]
+        if free < 2 or len(rest) == 0:
+            break
+        edges = np.unique(np.concatenate([edges, np.percentile(rest, np.linspace(0, 100, free + 2)[1:-1])]))
+    return edges
+
+
+def sketch_codes(values, edges: np.ndarray) -> np.ndarray:
+    """
+    Classe de chaque valeur : 2i si elle vaut la borne i, 2i+1 si elle est entre les bornes i et i+1
+
+    Args:
+        values: Valeurs (sans NaN)
+        edges: Bornes (sketch_edges)
+
+    Returns:
+        Codes de classe int64 dans [0, 2 × len(edges) - 2]
+    """
+    values = np.asarray(values, dtype=np.float64)
+    i = np.clip(np.searchsorted(edges, values, side='right') - 1, 0, len(edges) - 1)
+    inside = values != edges[i]
+    return np.minimum(2 * i + inside, 2 * len(edges) - 2)
+
+
+def sketch_percentiles(counts: np.ndarray, edges: np.ndarray, ps=DEFAULT_PERCENTILES) -> pd.Series:
+    """
+    Centiles estimés depuis un histogramme de croquis
+
+    Les valeurs d'une classe entre deux bornes sont supposées réparties
+    uniformément ; une classe de borne restitue la valeur exacte.
+
+    Args:
+        counts: Effectifs par classe (2 × len(edges) - 1)
+        edges: Bornes (sketch_edges)
+        ps: Centiles demandés (0-100)
+
+    Returns:
+        Series indexée par centile, NaN si l'histogramme est vide
+    """
+    counts = np.asarray(counts, dtype=np.int64)
+    total = counts.sum()
+    if total == 0 or len(edges) == 0:
+        return pd.Series(np.nan, index=list(ps), dtype=np.float64)
+
+    low = np.repeat(edges, 2)[:-1]
+    high = low.copy()
+    high[1::2] = edges[1:]
+
+    cumulative = np.cumsum(counts)
+    rank = np.asarray(ps, dtype=np.float64) / 100 * (total - 1)
+    b = np.minimum(np.searchsorted(cumulative, rank, side='right'), len(counts) - 1)
+    position = (rank - (cumulative[b] - counts[b]) + 0.5) / np.maximum(counts[b], 1)
+    return pd.Series(low[b] + np.clip(position, 0, 1) * (high[b] - low[b]), index=list(ps))
+
+
+# ==================== CUBE PRÉCALCULÉ STATION × MOIS ====================
+
+QUANTILE_CUBE_PATTERN = PROCESSED_DIR + "/quantiles_{variable}.npz"
+
+# Variables précalculées à l'ingestion
+QUANTILE_CUBE_VARIABLES = NORMALS_VARIABLES
+
+
+def quantile_cube_path(variable: str) -> str:
+    """Chemin du cube précalculé d'une variable"""
+    return QUANTILE_CUBE_PATTERN.format(variable=variable)
+
+
+def _compact_counts(counts) -> np.ndarray:
+    """
+    Effectifs dans le plus petit entier non signé qui les contient
+
+    Un station-mois compte d'ordinaire au plus 31 valeurs (uint8), mais des
+    jours en double (lots ajoutés qui se recouvrent) peuvent dépasser 255 :
+    le type s'élargit au lieu de déborder.
+    """
+    counts = np.asarray(counts)
+    if counts.size and counts.min() < 0:
+        raise ValueError("Effectifs négatifs dans le cube de quantiles")
+    largest = int(counts.max()) if counts.size else 0
+    return counts.astype(np.promote_types(np.uint8, np.min_scalar_type(largest)))
+
+
+class QuantileCube:
+    """
+    Histogrammes de croquis par couple station × mois, stockés creux
+
+    Seuls les couples observés sont stockés (une cellule par station-mois),
+    et pour chaque cellule seules ses classes non vides (au plus 31 sur
+    2 × n_bornes - 1) : format CSR, plus petit que la colonne résumée. Les
+    effectifs prennent le plus petit type entier qui les contient. Les
+    requêtes sans filtre de mois somment un cumul dense station × année
+    calculé au chargement (quelques centaines de lignes au lieu des valeurs
+    quotidiennes) ; avec un filtre de mois, les entrées des cellules retenues
+    sont fusionnées par np.bincount.
+
+    Attributs:
+        stations: Identifiants NUM_POSTE triés
+        cell_station: Indice de station de chaque cellule
+        cell_period: Mois absolu de chaque cellule (année * 12 + mois - 1)
+        offsets: Début des entrées de chaque cellule (n_cellules + 1)
+        bins: Classe de chaque entrée
+        counts: Effectif de chaque entrée
+        edges: Bornes communes à toutes les cellules
+        variable: Variable résumée
+    """
+
+    def __init__(self, stations, cell_station, cell_period, offsets, bins, counts, edges, variable):
+        self.stations = np.asarray(stations, dtype=np.int64)
+        self.cell_station = np.asarray(cell_station, dtype=np.int32)
+        self.cell_period = np.asarray(cell_period, dtype=np.int32)
+        self.offsets = np.asarray(offsets, dtype=np.int64)
+        self.bins = np.asarray(bins, dtype=np.uint8 if len(edges) <= 128 else np.uint16)
+        self.counts = _compact_counts(counts)
+        self.edges = np.asarray(edges, dtype=np.float64)
+        self.variable = str(variable)
+        self.n_bins = max(2 * len(self.edges) - 1, 0)
+        self._rollup = None
+
+    def matches(self, variable: str) -> bool:
+        """Indique si le cube peut répondre pour une variable"""
+        return self.variable == variable
+
+    def _mask(self, stations=None, years=None, months=None) -> np.ndarray:
+        """Sélection des cellules selon stations, années et mois"""
+        mask = np.ones(len(self.cell_period), dtype=bool)
+
+        if stations is not None:
+            st_mask = np.isin(self.stations, np.asarray(stations, dtype=np.int64))
+            mask &= st_mask[self.cell_station]
+        if years is not None:
+            mask &= np.isin(self.cell_period // 12, np.asarray(years, dtype=np.int64))
+        if months is not None:
+            mask &= np.isin(self.cell_period % 12 + 1, np.asarray(months, dtype=np.int64))
+
+        return mask
+
+    def _entry_cells(self) -> np.ndarray:
+        """Cellule de chaque entrée"""
+        return np.repeat(np.arange(len(self.cell_period)), np.diff(self.offsets))
+
+    def _merge(self, entries: np.ndarray, rows: np.ndarray, n_rows: int) -> np.ndarray:
+        """Somme des entrées retenues dans un tableau dense lignes × classes"""
+        flat = rows * self.n_bins + self.bins[entries].astype(np.int64)
+        return np.bincount(flat, weights=self.counts[entries], minlength=n_rows * self.n_bins).reshape(n_rows, self.n_bins)
+
+    def _year_rollup(self):
+        """Cumul dense station × année (calculé une fois) : (station, année, effectifs)"""
+        if self._rollup is None:
+            keys = self.cell_station.astype(np.int64) * 10_000 + self.cell_period // 12
+            row_keys, cell_row = np.unique(keys, return_inverse=True)
+            entries = np.arange(len(self.bins))
+            counts = _compact_counts(self._merge(entries, cell_row[self._entry_cells()], len(row_keys)))
+            self._rollup = (row_keys // 10_000, row_keys % 10_000, counts)
+        return self._rollup
+
+    def histogram(self, stations=None, years=None, months=None) -> np.ndarray:
+        """Histogramme fusionné d'une sélection (somme des cellules)"""
+        if months is None:
+            row_station, row_year, counts = self._year_rollup()
+            mask = np.ones(len(row_year), dtype=bool)
+            if stations is not None:
+                mask &= np.isin(self.stations, np.asarray(stations, dtype=np.int64))[row_station]
+            if years is not None:
+                mask &= np.isin(row_year, np.asarray(years, dtype=np.int64))
+            return counts[mask].sum(axis=0, dtype=np.int64)
+
+        entries = np.flatnonzero(np.repeat(self._mask(stations, years, months), np.diff(self.offsets)))
+        return self._merge(entries, np.zeros(len(entries), dtype=np.int64), 1)[0].astype(np.int64)
+
+    def percentiles(self, ps=DEFAULT_PERCENTILES, stations=None, years=None, months=None) -> pd.Series:
+        """
+        Centiles d'un ensemble de stations et d'une période
+
+        Args:
+            ps: Centiles demandés (0-100)
+            stations: NUM_POSTE retenus (None = toutes)
+            years: Années retenues (None = toutes)
+            months: Mois retenus 1-12 (None = tous)
+
+        Returns:
+            Series indexée par centile
+        """
+        return sketch_percentiles(self.histogram(stations, years, months), self.edges, ps)
+
+    def replace_cells(self, update: 'QuantileCube', cell_keys=None) -> 'QuantileCube':
+        """
+        Remplace (ou ajoute) les cellules station-mois recalculées
+
+        Les autres cellules de self sont conservées telles quelles : seule
+        la tranche recalculée change.
+
+        Args:
+            update: Cube construit sur les mêmes bornes (build_quantile_cube(edges=...))
+                sur les seules cellules à rafraîchir
+            cell_keys: Cellules rafraîchies (NUM_POSTE * 100 000 + mois absolu),
+                y compris celles devenues vides (défaut : cellules de update)
+
+        Returns:
+            Nouveau QuantileCube
+
+        Raises:
+            ValueError: Si les variables ou les bornes des deux cubes diffèrent
+        """
+        if not self.matches(update.variable) or not np.array_equal(self.edges, update.edges):
+            raise ValueError("Cubes de quantiles incompatibles")
+
+        old_keys = self.stations[self.cell_station] * 100_000 + self.cell_period
+        new_keys = update.stations[update.cell_station] * 100_000 + update.cell_period
+        keep = ~np.isin(old_keys, new_keys if cell_keys is None else np.union1d(cell_keys, new_keys))
+
+        keys = np.concatenate([old_keys[keep], new_keys])
+        order = np.argsort(keys, kind='stable')
+        keys = keys[order]
+        stations, cell_station = np.unique(keys // 100_000, return_inverse=True)
+
+        # Entrées des cellules dans l'ordre des nouvelles cellules
+        starts = np.concatenate([self.offsets[:-1][keep], update.offsets[:-1] + len(self.bins)])[order]
+        lengths = np.concatenate([np.diff(self.offsets)[keep], np.diff(update.offsets)])[order]
+        offsets = np.concatenate([[0], np.cumsum(lengths)])
+        entries = np.repeat(starts - offsets[:-1], lengths) + np.arange(offsets[-1])
+
+        return QuantileCube(
+            stations=stations,
+            cell_station=cell_station,
+            cell_period=keys % 100_000,
+            offsets=offsets,
+            bins=np.concatenate([self.bins, update.bins])[entries],
+            counts=np.concatenate([self.counts, update.counts])[entries],
+            edges=self.edges,
+            variable=self.variable
+        )
+
+    def save(self, path: str = None):
+        """Sauvegarde le cube au format .npz"""
+        path = path or quantile_cube_path(self.variable)
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        np.savez_compressed(
+            path,
+            stations=self.stations,
+            cell_station=self.cell_station,
+            cell_period=self.cell_period,
+            offsets=self.offsets,
+            bins=self.bins,
+            counts=self.counts,
+            edges=self.edges,
+            variable=np.array(self.variable)
+        )
+
+    @classmethod
+    def load(cls, path: str) -> 'QuantileCube':
+        """Charge un cube sauvegardé par save()"""
+        with np.load(path, allow_pickle=False) as data:
+            return cls(
+                stations=data['stations'],
+                cell_station=data['cell_station'],
+                cell_period=data['cell_period'],
+                offsets=data['offsets'],
+                bins=data['bins'],
+                counts=data['counts'],
+                edges=data['edges'],
+                variable=data['variable'].item()
+            )
+
+
+def build_quantile_cube(df: pd.DataFrame, variable: str,
+                        n_edges: int = DEFAULT_SKETCH_EDGES, edges: np.ndarray = None) -> QuantileCube:
+    """
+    Construit le cube station × mois des histogrammes de croquis en un seul passage
+
+    Args:
+        df: DataFrame brut ou enrichi (NUM_POSTE, date ou AAAAMMJJ, variable)
+        variable: Variable à résumer
+        n_edges: Nombre maximal de bornes
+        edges: Bornes imposées (celles d'un cube existant, pour replace_cells) ;
+            les valeurs hors bornes sont rangées dans la classe extrême
+
+    Returns:
+        QuantileCube
+    """
+    values = df[variable].to_numpy(dtype=np.float64, na_value=np.nan)
+    annee, mois, _, valid_date = date_components(df)
+    used = valid_date & ~np.isnan(values)
+
+    if edges is None:
+        edges = sketch_edges(values[used], n_edges)
+    n_bins = max(2 * len(edges) - 1, 0)
+
+    stations, st_idx = np.unique(df['NUM_POSTE'].to_numpy(dtype=np.int64), return_inverse=True)
+    period = annee * 12 + (mois - 1)
+
+    # Une cellule par couple (station, mois absolu) observé
+    cells, cell_idx = np.unique(st_idx[used] * 100_000 + period[used], return_inverse=True)
+    n_cells = len(cells)
+
+    # Entrées non vides (cellule, classe), triées par cellule puis par classe
+    if n_bins:
+        entries, counts = np.unique(cell_idx * n_bins + sketch_codes(values[used], edges), return_counts=True)
+    else:
+        entries, counts = np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+    offsets = np.searchsorted(entries // max(n_bins, 1), np.arange(n_cells + 1))
+
+    return QuantileCube(
+        stations=stations,
+        cell_station=cells // 100_000,
+        cell_period=cells % 100_000,
+        offsets=offsets,
+        bins=entries % max(n_bins, 1),
+        counts=counts,
+        edges=edges,
+        variable=variable
+    )
@@ -0,0 +1,274 @@
+"""
+Requêtes hors mémoire sur l'archive météo (scanner Arrow Dataset)
+
+load_meteo matérialise toute la table en pandas : la taille du jeu est
+bornée par la RAM. MeteoQuery interroge le même fichier Parquet, ou le jeu
+partitionné de l'ingestion, sans le charger : la projection (colonnes) et
+les filtres (années, stations) sont poussés dans le scanner Arrow, et les
+agrégations sont calculées lot par lot (record batches) sous forme de
+sommes partielles fusionnées à la fin. La mémoire utilisée dépend du nombre
+de groupes, pas du nombre de lignes de l'archive.
+"""
+
+import numpy as np
+import pandas as pd
+from pathlib import Path
+from utils.constants import METEO_FILE, REGIONS_FRANCE
+from .profiling import profile
+
+# Colonnes de partition du jeu produit par core.ingest
+PARTITION_COLUMNS = ['dept', 'annee']
+
+# Clés de groupement calculées à partir de AAAAMMJJ / NUM_POSTE
+DERIVED_KEYS = {'annee', 'mois', 'jour', 'dept', 'region'}
+
+# Agrégations fusionnables lot par lot
+AGGREGATIONS = ('mean', 'sum', 'min', 'max', 'count', 'std', 'first')
+
+DEFAULT_BATCH_ROWS = 256_000
+
+
+def open_dataset(path):
+    """
+    Ouvre un fichier Parquet ou le jeu partitionné dept=XX/annee=YYYY
+
+    Args:
+        path: Fichier Parquet ou dossier partitionné
+
+    Returns:
+        pyarrow.dataset.Dataset
+    """
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+
+    if Path(path).is_dir():
+        partitioning = ds.partitioning(pa.schema([('dept', pa.string()), ('annee', pa.int64())]), flavor='hive')
+        return ds.dataset(str(path), format='parquet', partitioning=partitioning,
+                          exclude_invalid_files=True, ignore_prefixes=['.', '_'])
+
+    return ds.dataset(str(path), format='parquet')
+
+
+def scan_filter(dataset, years=None, stations=None, names=None):
+    """
+    Expression de filtre poussée dans le scanner
+
+    Sur le jeu partitionné, les années et départements élaguent des
+    partitions entières ; sur un fichier unique, les bornes de AAAAMMJJ
+    permettent d'ignorer les row groups hors période.
+
+    Args:
+        dataset: Dataset ouvert par open_dataset
+        years: Années retenues (None = toutes)
+        stations: NUM_POSTE retenus (None = tous)
+        names: NOM_USUEL retenus (None = tous)
+
+    Returns:
+        Expression pyarrow ou None
+    """
+    import pyarrow.dataset as ds
+
+    partitioned = 'annee' in dataset.schema.names and 'AAAAMMJJ' in dataset.schema.names
+    conditions = []
+
+    if years:
+        years = sorted({int(y) for y in years})
+        if partitioned:
+            conditions.append(ds.field('annee').isin(years))
+        else:
+            ranges = [(ds.field('AAAAMMJJ') >= y * 10_000) & (ds.field('AAAAMMJJ') < (y + 1) * 10_000)
+                      for y in years]
+            condition = ranges[0]
+            for r in ranges[1:]:
+                condition = condition | r
+            conditions.append(condition)
+
+    if stations is not None:
+        stations = pd.Series(stations, dtype='int64')
+        conditions.append(ds.field('NUM_POSTE').isin(stations.tolist()))
+        if partitioned:
+            conditions.append(ds.field('dept').isin(stations.astype(str).str.zfill(8).str[:2].unique().tolist()))
+
+    if names is not None:
+        conditions.append(ds.field('NOM_USUEL').isin([str(n) for n in names]))
+
+    if not conditions:
+        return None
+
+    expression = conditions[0]
+    for condition in conditions[1:]:
+        expression = expression & condition
+    return expression
+
+
+def _add_derived_keys(df: pd.DataFrame, keys) -> pd.DataFrame:
+    """Ajoute les clés dérivées (annee, mois, jour, dept, region) demandées"""
+    if {'annee', 'mois', 'jour'} & set(keys) and 'AAAAMMJJ' in df.columns:
+        ymd = df['AAAAMMJJ'].to_numpy(dtype=np.int64)
+        df['annee'] = ymd // 10_000
+        df['mois'] = (ymd // 100) % 100
+        df['jour'] = ymd % 100
+
+    if {'dept', 'region'} & set(keys):
+        dept = df['NUM_POSTE'].astype(str).str[:2]
+        df['dept'] = dept
+        df['region'] = dept.map(REGIONS_FRANCE)
+
+    return df
+
+
+def _partial_aggregate(df: pd.DataFrame, by: list, agg_functions: dict) -> pd.DataFrame:
+    """Agrégats partiels fusionnables d'un lot"""
+    grouped = df.groupby(by, sort=False, dropna=False)
+    parts = {}
+
+    for col, func in agg_functions.items():
+        if func in ('mean', 'sum', 'std'):
+            parts[f"{col}__sum"] = grouped[col].sum()
+        if func in ('mean', 'count', 'std'):
+            parts[f"{col}__count"] = grouped[col].count()
+        if func == 'std':
+            parts[f"{col}__sumsq"] = (df[col] ** 2).groupby([df[k] for k in by], sort=False, dropna=False).sum()
+        if func in ('min', 'max', 'first'):
+            parts[f"{col}__{func}"] = grouped[col].agg(func)
+
+    return pd.DataFrame(parts)
+
+
+def _finalize(partials: pd.DataFrame, by: list, agg_functions: dict) -> pd.DataFrame:
+    """Fusionne les agrégats partiels et calcule les statistiques finales"""
+    merge = {c: c.rsplit('__', 1)[1] for c in partials.columns}
+    merge = {c: ('sum' if f in ('count', 'sumsq') else f) for c, f in merge.items()}
+    merged = partials.groupby(level=by, sort=True, dropna=False).agg(merge)
+
+    result = pd.DataFrame(index=merged.index)
+    for col, func in agg_functions.items():
+        if func in ('sum', 'min', 'max', 'first'):
+            result[col] = merged[f"{col}__{func}"]
+        elif func == 'count':
+            result[col] = merged[f"{col}__count"].astype('int64')
+        else:
+            n = merged[f"{col}__count"].to_numpy(dtype=np.float64)
+            total = merged[f"{col}__sum"].to_numpy(dtype=np.float64)
+            with np.errstate(invalid='ignore', divide='ignore'):
+                mean = total / n
+                if func == 'mean':
+                    result[col] = mean
+                else:
+                    sumsq = merged[f"{col}__sumsq"].to_numpy(dtype=np.float64)
+                    result[col] = np.sqrt(np.maximum(sumsq - n * mean ** 2, 0) / (n - 1))
+
+    return result.reset_index()
+
+
+class MeteoQuery:
+    """
+    Requêtes poussées dans le scanner sur un fichier ou un jeu partitionné
+
+    Usage:
+        query = MeteoQuery('data/processed/meteo')
+        query.aggregate(['NUM_POSTE', 'annee'], {'TX': 'mean', 'RR': 'sum'}, years=range(1991, 2021))
+        query.scan(['NUM_POSTE', 'AAAAMMJJ', 'TX'], stations=[13001009])
+    """
+
+    def __init__(self, path: str = METEO_FILE, batch_rows: int = DEFAULT_BATCH_ROWS):
+        self.path = str(path)
+        self.dataset = open_dataset(path)
+        self.batch_rows = batch_rows
+
+    @property
+    def columns(self) -> list:
+        """Colonnes de la table (hors colonnes de partition)"""
+        return [c for c in self.dataset.schema.names if c not in PARTITION_COLUMNS]
+
+    def batches(self, columns: list, years=None, stations=None, names=None):
+        """
+        Parcourt les lignes filtrées par lots pandas
+
+        Args:
+            columns: Colonnes projetées
+            years, stations, names: Filtres (voir scan_filter)
+
+        Yields:
+            DataFrame d'au plus batch_rows lignes
+        """
+        scanner = self.dataset.scanner(columns=list(columns), batch_size=self.batch_rows,
+                                       filter=scan_filter(self.dataset, years, stations, names))
+        for batch in scanner.to_batches():
+            if batch.num_rows:
+                yield batch.to_pandas()
+
+    @profile('query.scan')
+    def scan(self, columns: list = None, years=None, stations=None, names=None) -> pd.DataFrame:
+        """
+        Matérialise les seules lignes et colonnes demandées, prêtes pour les pages
+
+        Args:
+            columns: Colonnes à lire (None = toutes)
+            years, stations, names: Filtres (voir scan_filter)
+
+        Returns:
+            DataFrame préparé comme par load_meteo
+        """
+        from .loader import prepare_meteo
+
+        columns = self.columns if columns is None else columns
+        table = self.dataset.to_table(columns=list(columns),
+                                      filter=scan_filter(self.dataset, years, stations, names))
+        return prepare_meteo(table.to_pandas())
+
+    @profile('query.aggregate')
+    def aggregate(self, by, agg_functions: dict, years=None, stations=None, names=None) -> pd.DataFrame:
+        """
+        Agrégation groupée calculée lot par lot, sans matérialiser la table
+
+        Équivalent à df.groupby(by).agg(agg_functions).reset_index() sur la
+        table filtrée. 'first' suit l'ordre de lecture des fichiers.
+
+        Args:
+            by: Clé(s) de groupement : colonnes de la table ou clés dérivées
+                (annee, mois, jour, dept, region)
+            agg_functions: {colonne: 'mean' | 'sum' | 'min' | 'max' | 'count' | 'std' | 'first'}
+            years, stations, names: Filtres (voir scan_filter)
+
+        Returns:
+            DataFrame d'une ligne par groupe
+
+        Raises:
+            ValueError: Si une agrégation n'est pas fusionnable (médiane...)
+        """
+        by = [by] if isinstance(by, str) else list(by)
+        unsupported = {f for f in agg_functions.values() if f not in AGGREGATIONS}
+        if unsupported:
+            raise ValueError(f"Agrégations non supportées hors mémoire : {', '.join(sorted(unsupported))}")
+
+        derived = [k for k in by + list(agg_functions) if k in DERIVED_KEYS and k not in self.columns]
+        source = [c for c in by + list(agg_functions) if c not in derived]
+        if {'annee', 'mois', 'jour'} & set(derived):
+            source.append('AAAAMMJJ')
+        if {'dept', 'region'} & set(derived):
+            source.append('NUM_POSTE')
+        source = list(dict.fromkeys(source))
+
+        partials = [_partial_aggregate(_add_derived_keys(df, derived), by, agg_functions)
+                    for df in self.batches(source, years, stations, names)]
+
+        if not partials:
+            return pd.DataFrame(columns=by + list(agg_functions))
+        return _finalize(pd.concat(partials), by, agg_functions)
+
+    def aggregate_by_station(self, agg_functions: dict = None, **filters) -> pd.DataFrame:
+        """Agrégats par station (mêmes défauts que preprocessing.aggregate_by_station)"""
+        if agg_functions is None:
+            agg_functions = {
+                'NOM_USUEL': 'first', 'LAT': 'first', 'LON': 'first', 'ALTI': 'first', 'region': 'first',
+                'TN': 'mean', 'TX': 'mean', 'TM': 'mean', 'RR': 'sum', 'FFM': 'mean'
+            }
+        available = set(self.columns) | DERIVED_KEYS
+        agg_dict = {c: f for c, f in agg_functions.items() if c in available}
+        return self.aggregate('NUM_POSTE', agg_dict, **filters)
+
+    def aggregate_by_year(self, agg_functions: dict, by_station: bool = False, **filters) -> pd.DataFrame:
+        """Agrégats annuels (par station si by_station)"""
+        by = ['NUM_POSTE', 'annee'] if by_station else ['annee']
+        return self.aggregate(by, agg_functions, **filters)
@@ -0,0 +1,243 @@
+"""
+Instantané de la table enrichie en Arrow IPC non compressé, projeté en mémoire
+
+Chaque processus Streamlit (plusieurs workers derrière un répartiteur)
+chargeait et enrichissait sa propre copie de la table météo. Les colonnes de
+la table enrichie (core.loader.ColumnStore) sont écrites chacune dans un
+fichier Arrow IPC (format Feather v2) non compressé, que les autres processus
+ouvrent par memory-map en lecture seule. La table grandit avec les colonnes
+déclarées par les pages : un agrandissement n'écrit que les colonnes
+nouvelles, jamais la table entière. Les colonnes numériques sans valeur nulle
+(les NaN sont conservés comme valeurs, pas comme nulls) deviennent des
+tableaux NumPy qui pointent directement dans le fichier : le cache de pages
+du système garde une seule copie physique partagée par tous les processus.
+
+Le dossier des colonnes porte l'empreinte de la source : un instantané
+périmé n'est jamais relu, et il est supprimé à la première publication de
+l'empreinte suivante (sauf s'il est encore ouvert par ce processus). Chaque
+fichier porte une empreinte du nom de sa colonne, vérifiée à la lecture
+avec le nombre de lignes : une colonne étrangère ou incomplète est ignorée.
+
+Activation par variable d'environnement :
+    METEO_SNAPSHOT=0    désactive l'instantané (activé par défaut)
+"""
+
+import hashlib
+import os
+import shutil
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+from utils.constants import PROCESSED_DIR
+
+SNAPSHOT_DIR = f"{PROCESSED_DIR}/snapshots"
+
+# Dossiers d'instantané ouverts par ce processus (jamais supprimés)
+_OPEN_DIRS = set()
+
+
+def snapshot_enabled() -> bool:
+    """Instantané partagé actif"""
+    return os.environ.get('METEO_SNAPSHOT', '1') != '0'
+
+
+def _safe(text: str) -> str:
+    """Texte utilisable dans un nom de fichier"""
+    return ''.join(c if c.isalnum() else '_' for c in text)
+
+
+def snapshot_path(source: str, fingerprint: str, directory: str = SNAPSHOT_DIR) -> Path:
+    """
+    Fichier d'instantané (table entière) d'une source pour une empreinte donnée
+
+    Args:
+        source: Fichier ou dossier source
+        fingerprint: Empreinte de la source (core.fingerprint)
+        directory: Dossier des instantanés
+
+    Returns:
+        Chemin <dossier>/<nom source>.<empreinte>.arrow
+    """
+    stem = Path(source).name.split('.')[0]
+    return Path(directory) / f"{stem}.{_safe(fingerprint)}.arrow"
+
+
+def snapshot_dir(source: str, fingerprint: str, directory: str = SNAPSHOT_DIR) -> Path:
+    """
+    Dossier des colonnes d'instantané d'une source pour une empreinte donnée
+
+    Returns:
+        Chemin <dossier>/<nom source>.<empreinte>/
+    """
+    path = snapshot_path(source, fingerprint, directory)
+    return path.with_name(path.name[:-len('.arrow')])
+
+
+def column_path(directory, column: str) -> Path:
+    """Fichier d'une colonne dans un dossier d'instantané (<colonne>.<empreinte du nom>.arrow)"""
+    digest = hashlib.sha1(str(column).encode('utf-8')).hexdigest()[:10]
+    return Path(directory) / f"{_safe(column)}.{digest}.arrow"
+
+
+def remove_stale_snapshots(directory):
+    """
+    Supprime les instantanés de la même source sous une autre empreinte
+
+    Les dossiers encore ouverts par ce processus sont conservés ; un fichier
+    projeté par un autre processus reste lisible par celui-ci (POSIX) ou
+    n'est pas supprimé (Windows).
+
+    Args:
+        directory: Dossier d'instantané courant (snapshot_dir)
+    """
+    directory = Path(directory)
+    stem, fingerprint = directory.name.split('.')[:2]
+    for old in directory.parent.glob(f"{stem}.*"):
+        if old.name.split('.')[1] == fingerprint or old.resolve() in _OPEN_DIRS:
+            continue
+        if old.is_dir():
+            shutil.rmtree(old, ignore_errors=True)
+        else:
+            try:
+                old.unlink()
+            except OSError:
+                pass
+
+
+def _to_arrow(df: pd.DataFrame) -> pa.Table:
+    """Table Arrow dont les colonnes flottantes gardent NaN comme valeur (sans bitmap de nulls)"""
+    arrays = []
+    for col in df.columns:
+        values = df[col]
+        if pd.api.types.is_float_dtype(values.dtype) and isinstance(values.dtype, np.dtype):
+            arrays.append(pa.array(values.to_numpy(), from_pandas=False))
+        else:
+            arrays.append(pa.Array.from_pandas(values))
+    return pa.Table.from_arrays(arrays, names=[str(c) for c in df.columns])
+
+
+def _write_ipc(table: pa.Table, path: Path) -> Path:
+    """
+    Écrit une table Arrow IPC non compressée
+
+    L'écriture se fait dans un fichier temporaire renommé à la fin : un
+    processus concurrent ne projette jamais un fichier partiel.
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    try:
+        with pa.OSFile(str(tmp), 'wb') as sink:
+            with pa.ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+        os.replace(tmp, path)
+    except OSError:
+        tmp.unlink(missing_ok=True)
+        raise
+    return path
+
+
+def write_snapshot(df: pd.DataFrame, path) -> Path:
+    """
+    Écrit la table enrichie entière en Arrow IPC non compressé
+
+    Args:
+        df: Table enrichie (sortie de prepare_meteo)
+        path: Fichier de destination (snapshot_path)
+
+    Returns:
+        Chemin écrit
+    """
+    return _write_ipc(_to_arrow(df), Path(path))
+
+
+def read_snapshot(path) -> pd.DataFrame:
+    """
+    Projette un instantané en mémoire (lecture seule, sans copie des colonnes numériques)
+
+    Les tableaux NumPy obtenus sont en lecture seule : pandas (copy-on-write)
+    copie une colonne avant toute modification.
+
+    Args:
+        path: Fichier écrit par write_snapshot ou write_columns
+
+    Returns:
+        DataFrame enrichie
+    """
+    source = pa.memory_map(str(path), 'r')
+    table = pa.ipc.open_file(source).read_all()
+    return table.to_pandas(split_blocks=True)
+
+
+def _read_column(path: Path):
+    """Colonne d'un fichier d'instantané, ou None s'il est illisible ou ne correspond pas à son nom"""
+    try:
+        part = read_snapshot(path)
+    except (OSError, pa.ArrowInvalid):
+        return None
+    if len(part.columns) != 1 or column_path(path.parent, part.columns[0]).name != path.name:
+        return None
+    return part
+
+
+def write_columns(df: pd.DataFrame, columns: list, directory) -> list:
+    """
+    Écrit des colonnes de la table enrichie, un fichier Arrow IPC par colonne
+
+    Une colonne déjà publiée et valide (par un autre processus, même
+    empreinte) n'est pas réécrite : son fichier est renvoyé tel quel.
+
+    Args:
+        df: Table enrichie
+        columns: Colonnes à écrire
+        directory: Dossier d'instantané (snapshot_dir)
+
+    Returns:
+        Chemins écrits
+    """
+    directory = Path(directory)
+    if not directory.exists():
+        remove_stale_snapshots(directory)
+    _OPEN_DIRS.add(directory.resolve())
+
+    paths = []
+    for column in columns:
+        path = column_path(directory, column)
+        published = _read_column(path) if path.exists() else None
+        if published is None or len(published) != len(df):
+            _write_ipc(_to_arrow(df[[column]]), path)
+        paths.append(path)
+    return paths
+
+
+def read_columns(directory, exclude=(), rows: int = None) -> pd.DataFrame:
+    """
+    Projette en mémoire les colonnes d'un dossier d'instantané
+
+    Un fichier est ignoré s'il est illisible, s'il ne contient pas une seule
+    colonne dont le nom correspond au fichier, ou si sa longueur diffère de
+    rows (par défaut, la longueur la plus fréquente du dossier).
+
+    Args:
+        directory: Dossier d'instantané (snapshot_dir)
+        exclude: Colonnes à ne pas projeter (déjà présentes chez l'appelant)
+        rows: Nombre de lignes attendu (celui de la table de l'appelant)
+
+    Returns:
+        DataFrame des colonnes projetées (vide si aucune)
+    """
+    directory = Path(directory)
+    _OPEN_DIRS.add(directory.resolve())
+    exclude = {column_path(directory, c).name for c in exclude}
+
+    parts = [_read_column(path) for path in sorted(directory.glob('*.arrow')) if path.name not in exclude]
+    parts = [part for part in parts if part is not None]
+
+    if rows is None and parts:
+        lengths = pd.Series([len(part) for part in parts])
+        rows = lengths.mode().iloc[0]
+    parts = [part for part in parts if len(part) == rows]
+    if not parts:
+        return pd.DataFrame()
+    return pd.concat(parts, axis=1)
@@ -0,0 +1,473 @@
+"""
+Moteur de rose des vents vectorisé
+
+Les directions sont classées en secteurs par arithmétique entière et les
+vitesses par np.digitize, puis l'histogramme joint direction × vitesse est
+obtenu en un seul np.bincount, éventuellement par groupe (station, saison).
+
+Un cube précalculé (WindRoseCube) conserve à l'ingestion la matrice
+direction × vitesse de chaque couple station × mois : toute rose est
+ensuite la somme de quelques matrices, sans relire la table quotidienne.
+"""
+
+import numpy as np
+import pandas as pd
+from pathlib import Path
+from utils.constants import PROCESSED_DIR, SEASONS
+from .normals import date_components
+
+# Libellés des 16 secteurs (notation française : O = Ouest)
+SECTOR_LABELS_16 = ['N', 'NNE', 'NE', 'ENE', 'E', 'ESE', 'SE', 'SSE',
+                    'S', 'SSO', 'SO', 'OSO', 'O', 'ONO', 'NO', 'NNO']
+
+# Bornes des classes de vitesse (m/s) : la dernière classe est ouverte
+DEFAULT_SPEED_BINS = [0, 2, 4, 6, 8]
+
+
+def sector_labels(n_sectors: int = 16) -> list:
+    """
+    Libellés des secteurs de direction
+
+    Args:
+        n_sectors: Nombre de secteurs (4, 8, 16 ou autre)
+
+    Returns:
+        Liste de libellés, du Nord dans le sens horaire
+    """
+    if 16 % n_sectors == 0:
+        step = 16 // n_sectors
+        return SECTOR_LABELS_16[::step]
+
+    width = 360 / n_sectors
+    return [f"{i * width:.0f}°" for i in range(n_sectors)]
+
+
+def speed_class_labels(speed_bins: list = DEFAULT_SPEED_BINS, unit: str = 'm/s') -> list:
+    """
+    Libellés des classes de vitesse
+
+    Args:
+        speed_bins: Bornes croissantes des classes
+        unit: Unité affichée
+
+    Returns:
+        Liste de libellés ('0-2 m/s', ..., '>8 m/s')
+    """
+    labels = [f"{lo:g}-{hi:g} {unit}" for lo, hi in zip(speed_bins[:-1], speed_bins[1:])]
+    labels.append(f">{speed_bins[-1]:g} {unit}")
+    return labels
+
+
+def bin_directions(direction, n_sectors: int = 16) -> np.ndarray:
+    """
+    Numéro de secteur de chaque direction (0 = Nord, sens horaire)
+
+    Args:
+        direction: Directions en degrés
+        n_sectors: Nombre de secteurs
+
+    Returns:
+        Tableau d'entiers dans [0, n_sectors)
+    """
+    direction = np.asarray(direction, dtype=np.float64)
+    width = 360.0 / n_sectors
+    return (np.floor((direction % 360.0 + width / 2) / width) % n_sectors).astype(np.int64)
+
+
+def bin_speeds(speed, speed_bins: list = DEFAULT_SPEED_BINS) -> np.ndarray:
+    """
+    Numéro de classe de chaque vitesse (intervalles fermés à droite)
+
+    Args:
+        speed: Vitesses
+        speed_bins: Bornes croissantes des classes
+
+    Returns:
+        Tableau d'entiers dans [0, len(speed_bins))
+    """
+    speed = np.asarray(speed, dtype=np.float64)
+    return np.digitize(speed, speed_bins[1:], right=True).astype(np.int64)
+
+
+def _prepare(direction, speed, calm_threshold):
+    """Filtre les valeurs manquantes et sépare les calmes"""
+    direction = np.asarray(direction, dtype=np.float64)
+    speed = np.asarray(speed, dtype=np.float64)
+    valid = ~(np.isnan(direction) | np.isnan(speed))
+    calm = valid & (speed <= calm_threshold)
+    return valid & ~calm, calm
+
+
+def compute_wind_rose(direction, speed,
+                      n_sectors: int = 16,
+                      speed_bins: list = DEFAULT_SPEED_BINS,
+                      calm_threshold: float = 0.0) -> dict:
+    """
+    Histogramme joint direction × classe de vitesse
+
+    Args:
+        direction: Directions en degrés
+        speed: Vitesses associées
+        n_sectors: Nombre de secteurs de direction
+        speed_bins: Bornes des classes de vitesse
+        calm_threshold: Vitesse en dessous de laquelle (incluse) le vent est calme
+
+    Returns:
+        Dictionnaire {'counts', 'secteurs', 'classes', 'calmes', 'total'}
+        où counts est un tableau int64 (n_sectors, n_classes)
+    """
+    keep, calm = _prepare(direction, speed, calm_threshold)
+    n_classes = len(speed_bins)
+
+    sectors = bin_directions(np.asarray(direction)[keep], n_sectors)
+    classes = bin_speeds(np.asarray(speed)[keep], speed_bins)
+
+    counts = np.bincount(sectors * n_classes + classes,
+                         minlength=n_sectors * n_classes).reshape(n_sectors, n_classes)
+
+    return {
+        'counts': counts,
+        'secteurs': sector_labels(n_sectors),
+        'classes': speed_class_labels(speed_bins),
+        'calmes': int(calm.sum()),
+        'total': int(keep.sum() + calm.sum())
+    }
+
+
+def compute_wind_roses(df: pd.DataFrame,
+                       speed_col: str,
+                       direction_col: str,
+                       by: str,
+                       n_sectors: int = 16,
+                       speed_bins: list = DEFAULT_SPEED_BINS,
+                       calm_threshold: float = 0.0) -> dict:
+    """
+    Une rose des vents par groupe (station, saison...) en un seul passage
+
+    Args:
+        df: DataFrame avec vitesse, direction et colonne de groupement
+        speed_col: Colonne de vitesse
+        direction_col: Colonne de direction
+        by: Colonne de groupement
+        n_sectors: Nombre de secteurs de direction
+        speed_bins: Bornes des classes de vitesse
+        calm_threshold: Seuil de calme
+
+    Returns:
+        Dictionnaire {valeur du groupe: rose (cf. compute_wind_rose)}
+    """
+    if df.empty:
+        return {}
+
+    keep, calm = _prepare(df[direction_col], df[speed_col], calm_threshold)
+    codes, groups = pd.factorize(df[by], sort=True)
+    has_group = codes >= 0
+    keep &= has_group
+    calm &= has_group
+
+    n_classes = len(speed_bins)
+    cell = n_sectors * n_classes
+
+    sectors = bin_directions(df[direction_col].to_numpy()[keep], n_sectors)
+    classes = bin_speeds(df[speed_col].to_numpy()[keep], speed_bins)
+    flat = codes[keep] * cell + sectors * n_classes + classes
+
+    counts = np.bincount(flat, minlength=len(groups) * cell).reshape(len(groups), n_sectors, n_classes)
+    calmes = np.bincount(codes[calm], minlength=len(groups))
+
+    secteurs = sector_labels(n_sectors)
+    classes_labels = speed_class_labels(speed_bins)
+
+    return {
+        group: {
+            'counts': counts[i],
+            'secteurs': secteurs,
+            'classes': classes_labels,
+            'calmes': int(calmes[i]),
+            'total': int(counts[i].sum() + calmes[i])
+        }
+        for i, group in enumerate(groups)
+    }
+
+
+def wind_rose_table(rose: dict, normalize: bool = False) -> pd.DataFrame:
+    """
+    Met une rose au format long pour Plotly (bar_polar)
+
+    Args:
+        rose: Résultat de compute_wind_rose
+        normalize: Fréquences en % du total au lieu de comptages
+
+    Returns:
+        DataFrame (direction, vitesse_classe, count)
+    """
+    counts = rose['counts'].astype(np.float64)
+    if normalize and rose['total'] > 0:
+        counts = counts / rose['total'] * 100
+
+    n_sectors, n_classes = counts.shape
+    return pd.DataFrame({
+        'direction': np.repeat(rose['secteurs'], n_classes),
+        'vitesse_classe': np.tile(rose['classes'], n_sectors),
+        'count': counts.ravel()
+    })
+
+
+# ==================== CUBE PRÉCALCULÉ STATION × MOIS ====================
+
+WIND_ROSE_CUBE_PATTERN = PROCESSED_DIR + "/rose_des_vents_{speed}_{direction}.npz"
+
+# Couples (vitesse, direction) précalculés à l'ingestion
+WIND_ROSE_CUBE_VARIABLES = [('FFM', 'DXY'), ('FXY', 'DXY')]
+
+_SAISON_PAR_MOIS = {m: saison for saison, mois in SEASONS.items() for m in mois}
+
+
+def wind_rose_cube_path(speed_col: str, direction_col: str) -> str:
+    """Chemin du cube précalculé pour un couple (vitesse, direction)"""
+    return WIND_ROSE_CUBE_PATTERN.format(speed=speed_col, direction=direction_col)
+
+
+class WindRoseCube:
+    """
+    Matrices direction × classe de vitesse par couple station × mois
+
+    Seuls les couples observés sont stockés (une cellule par station-mois).
+
+    Attributs:
+        stations: Identifiants NUM_POSTE triés
+        cell_station: Indice de station de chaque cellule
+        cell_period: Mois absolu de chaque cellule (année * 12 + mois - 1)
+        counts: Comptages int32 (n_cellules, n_secteurs, n_classes)
+        calmes: Nombre d'observations calmes par cellule
+    """
+
+    def __init__(self, stations, cell_station, cell_period, counts, calmes,
+                 speed_col, direction_col, n_sectors, speed_bins, calm_threshold):
+        self.stations = np.asarray(stations, dtype=np.int64)
+        self.cell_station = np.asarray(cell_station, dtype=np.int32)
+        self.cell_period = np.asarray(cell_period, dtype=np.int32)
+        self.counts = counts
+        self.calmes = calmes
+        self.speed_col = str(speed_col)
+        self.direction_col = str(direction_col)
+        self.n_sectors = int(n_sectors)
+        self.speed_bins = [float(b) for b in speed_bins]
+        self.calm_threshold = float(calm_threshold)
+
+    def matches(self, speed_col: str, direction_col: str,
+                n_sectors: int = 16, calm_threshold: float = 0.0) -> bool:
+        """Indique si le cube peut répondre à une demande de rose"""
+        return (self.speed_col == speed_col and self.direction_col == direction_col
+                and self.n_sectors == n_sectors and self.calm_threshold == calm_threshold)
+
+    def _mask(self, stations=None, years=None, months=None) -> np.ndarray:
+        """Sélection des cellules selon stations, années et mois"""
+        mask = np.ones(len(self.cell_period), dtype=bool)
+
+        if stations is not None:
+            st_mask = np.isin(self.stations, np.asarray(stations, dtype=np.int64))
+            mask &= st_mask[self.cell_station]
+        if years is not None:
+            mask &= np.isin(self.cell_period // 12, np.asarray(years, dtype=np.int64))
+        if months is not None:
+            mask &= np.isin(self.cell_period % 12 + 1, np.asarray(months, dtype=np.int64))
+
+        return mask
+
+    def _as_rose(self, counts: np.ndarray, calmes: int) -> dict:
+        return {
+            'counts': counts.astype(np.int64),
+            'secteurs': sector_labels(self.n_sectors),
+            'classes': speed_class_labels(self.speed_bins),
+            'calmes': int(calmes),
+            'total': int(counts.sum() + calmes)
+        }
+
+    def rose(self, stations=None, years=None, months=None) -> dict:
+        """
+        Rose des vents pour un ensemble de stations et une période
+
+        Args:
+            stations: NUM_POSTE retenus (None = toutes)
+            years: Années retenues (None = toutes)
+            months: Mois retenus 1-12 (None = tous)
+
+        Returns:
+            Rose au format de compute_wind_rose
+        """
+        mask = self._mask(stations, years, months)
+        return self._as_rose(self.counts[mask].sum(axis=0), self.calmes[mask].sum())
+
+    def roses_by(self, key: str, stations=None, years=None, months=None) -> dict:
+        """
+        Une rose par groupe : 'station', 'annee', 'mois', 'saison' ou 'periode'
+
+        Args:
+            key: Clé de groupement
+            stations: NUM_POSTE retenus (None = toutes)
+            years: Années retenues (None = toutes)
+            months: Mois retenus 1-12 (None = tous)
+
+        Returns:
+            Dictionnaire {groupe: rose}
+        """
+        mask = self._mask(stations, years, months)
+        period = self.cell_period[mask]
+
+        if key == 'station':
+            labels = self.stations[self.cell_station[mask]]
+        elif key == 'annee':
+            labels = period // 12
+        elif key == 'mois':
+            labels = period % 12 + 1
+        elif key == 'saison':
+            labels = pd.Series(period % 12 + 1).map(_SAISON_PAR_MOIS).to_numpy()
+        else:
+            labels = period
+
+        codes, groups = pd.factorize(labels, sort=True)
+        counts = np.zeros((len(groups),) + self.counts.shape[1:], dtype=np.int64)
+        np.add.at(counts, codes, self.counts[mask])
+        calmes = np.bincount(codes, weights=self.calmes[mask], minlength=len(groups))
+
+        return {group: self._as_rose(counts[i], calmes[i]) for i, group in enumerate(groups)}
+
+    def replace_cells(self, update: 'WindRoseCube', cell_keys=None) -> 'WindRoseCube':
+        """
+        Remplace (ou ajoute) les cellules station-mois recalculées
+
+        Les autres cellules de self sont conservées telles quelles : seule
+        la tranche recalculée change.
+
+        Args:
+            update: Cube construit avec les mêmes paramètres sur les seules
+                cellules à rafraîchir
+            cell_keys: Cellules rafraîchies (NUM_POSTE * 100 000 + mois absolu),
+                y compris celles devenues vides (défaut : cellules de update)
+
+        Returns:
+            Nouveau WindRoseCube
+
+        Raises:
+            ValueError: Si les paramètres des deux cubes diffèrent
+        """
+        if (not self.matches(update.speed_col, update.direction_col, update.n_sectors, update.calm_threshold)
+                or self.speed_bins != update.speed_bins):
+            raise ValueError("Cubes de rose des vents incompatibles")
+
+        old_keys = self.stations[self.cell_station] * 100_000 + self.cell_period
+        new_keys = update.stations[update.cell_station] * 100_000 + update.cell_period
+        keep = ~np.isin(old_keys, new_keys if cell_keys is None else np.union1d(cell_keys, new_keys))
+
+        keys = np.concatenate([old_keys[keep], new_keys])
+        order = np.argsort(keys, kind='stable')
+        keys = keys[order]
+        stations, cell_station = np.unique(keys // 100_000, return_inverse=True)
+
+        return WindRoseCube(
+            stations=stations,
+            cell_station=cell_station,
+            cell_period=keys % 100_000,
+            counts=np.concatenate([self.counts[keep], update.counts])[order],
+            calmes=np.concatenate([self.calmes[keep], update.calmes])[order],
+            speed_col=self.speed_col,
+            direction_col=self.direction_col,
+            n_sectors=self.n_sectors,
+            speed_bins=self.speed_bins,
+            calm_threshold=self.calm_threshold
+        )
+
+    def save(self, path: str = None):
+        """Sauvegarde le cube au format .npz"""
+        path = path or wind_rose_cube_path(self.speed_col, self.direction_col)
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        np.savez_compressed(
+            path,
+            stations=self.stations,
+            cell_station=self.cell_station,
+            cell_period=self.cell_period,
+            counts=self.counts,
+            calmes=self.calmes,
+            colonnes=np.array([self.speed_col, self.direction_col]),
+            n_sectors=np.array(self.n_sectors),
+            speed_bins=np.array(self.speed_bins),
+            calm_threshold=np.array(self.calm_threshold)
+        )
+
+    @classmethod
+    def load(cls, path: str) -> 'WindRoseCube':
+        """Charge un cube sauvegardé par save()"""
+        with np.load(path, allow_pickle=False) as data:
+            speed_col, direction_col = data['colonnes'].tolist()
+            return cls(
+                stations=data['stations'],
+                cell_station=data['cell_station'],
+                cell_period=data['cell_period'],
+                counts=data['counts'],
+                calmes=data['calmes'],
+                speed_col=speed_col,
+                direction_col=direction_col,
+                n_sectors=data['n_sectors'],
+                speed_bins=data['speed_bins'].tolist(),
+                calm_threshold=data['calm_threshold']
+            )
+
+
+def build_wind_rose_cube(df: pd.DataFrame,
+                         speed_col: str = 'FFM',
+                         direction_col: str = 'DXY',
+                         n_sectors: int = 16,
+                         speed_bins: list = DEFAULT_SPEED_BINS,
+                         calm_threshold: float = 0.0) -> WindRoseCube:
+    """
+    Construit le cube station × mois des roses des vents en un seul passage
+
+    Args:
+        df: DataFrame brut ou enrichi (NUM_POSTE, date ou AAAAMMJJ, vitesse, direction)
+        speed_col: Colonne de vitesse
+        direction_col: Colonne de direction
+        n_sectors: Nombre de secteurs de direction
+        speed_bins: Bornes des classes de vitesse
+        calm_threshold: Seuil de calme
+
+    Returns:
+        WindRoseCube
+    """
+    keep, calm = _prepare(df[direction_col], df[speed_col], calm_threshold)
+    annee, mois, _, valid_date = date_components(df)
+    keep &= valid_date
+    calm &= valid_date
+    used = keep | calm
+
+    stations, st_idx = np.unique(df['NUM_POSTE'].to_numpy(dtype=np.int64), return_inverse=True)
+    period = annee * 12 + (mois - 1)
+
+    # Une cellule par couple (station, mois absolu) observé
+    cells, cell_idx = np.unique(st_idx[used] * 100_000 + period[used], return_inverse=True)
+    n_cells = len(cells)
+
+    n_classes = len(speed_bins)
+    cell_size = n_sectors * n_classes
+
+    kept = keep[used]
+    sectors = bin_directions(df[direction_col].to_numpy()[keep], n_sectors)
+    classes = bin_speeds(df[speed_col].to_numpy()[keep], speed_bins)
+    flat = cell_idx[kept] * cell_size + sectors * n_classes + classes
+
+    counts = np.bincount(flat, minlength=n_cells * cell_size)
+    counts = counts.reshape(n_cells, n_sectors, n_classes).astype(np.int32)
+    calmes = np.bincount(cell_idx[~kept], minlength=n_cells).astype(np.int32)
+
+    return WindRoseCube(
+        stations=stations,
+        cell_station=cells // 100_000,
+        cell_period=cells % 100_000,
+        counts=counts,
+        calmes=calmes,
+        speed_col=speed_col,
+        direction_col=direction_col,
+        n_sectors=n_sectors,
+        speed_bins=speed_bins,
+        calm_threshold=calm_threshold
+    )
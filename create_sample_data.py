@@ -7,6 +7,8 @@ import pandas as pd
 import os
 from pathlib import Path
 
+from core.precompute import precompute_derived
+
 def create_sample_data():
     """Crée des fichiers échantillons à partir des données complètes."""
     
@@ -36,6 +38,9 @@ def create_sample_data():
         df_meteo_sample.to_parquet(sample_file, compression='snappy', index=False)
         print(f"   ✅ Échantillon créé: {len(df_meteo_sample):,} lignes, {sample_file.stat().st_size / 1024 / 1024:.2f} MB")
         print(f"   📉 Réduction: {(1 - len(df_meteo_sample)/len(df_meteo))*100:.1f}%")
+        
+        # Précalculer les normales sur le jeu complet (période de référence)
+        build_derived(meteo_file)
     else:
         print(f"⚠️  Fichier non trouvé: {meteo_file}")
     
@@ -70,5 +75,12 @@ def create_sample_data():
     print("3. Modifier data_loader.py pour utiliser les *_sample.parquet")
     print("4. Pousser vers GitHub et déployer sur Streamlit Cloud")
 
+def build_derived(meteo_file: Path):
+    """Précalcule normales et roses des vents dans des processus workers."""
+    print("\n📐 Précalcul des normales et des roses des vents...")
+    for summary in precompute_derived(meteo_file):
+        print(f"   ✅ {summary}")
+
+
 if __name__ == "__main__":
     create_sample_data()
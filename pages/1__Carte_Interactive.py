@@ -18,8 +18,11 @@ import sys
 from pathlib import Path
 sys.path.append(str(Path(__file__).parent.parent))
 
-from utils.data_loader import load_data
-from utils.constants import COLUMN_DESCRIPTIONS, UNITS
+from utils.data_loader import load_data, download_export
+from utils.constants import COLUMN_DESCRIPTIONS, UNITS, METEO_FILE
+from core.fingerprint import file_fingerprint
+from core.profiling import profile
+from utils.performance import display_profiling_panel, limit_map_markers, get_performance_config
 from utils.styles import get_page_style
 from utils.loading import display_map, display_chart
 
@@ -36,11 +39,25 @@ st.markdown(get_page_style(), unsafe_allow_html=True)
 
 # ==================== CACHE SESSION ====================
 
-@st.cache_resource
-def load_data_cached():
-    """Charge les données une seule fois et les met en cache"""
+# Colonnes utilisées par la page : seules celles-ci sont lues (core.columns)
+COLUMNS = ['TN', 'TX', 'TM', 'TAMPLI', 'RR', 'DRR', 'FFM', 'FXY', 'FWI', 'date']
+
+
+@st.cache_resource(max_entries=1)
+def _load_data_version(fingerprint, columns):
+    """
+    Charge les données une seule fois par version du fichier
+
+    Les colonnes font partie de la clé : les pages partagent ce cache
+    (même fonction, même code) mais n'en déclarent pas les mêmes.
+    """
     with st.spinner('⏳ Chargement des données...'):
-        return load_data("data/raw/meteo_sample.parquet")
+        return load_data(METEO_FILE, columns=list(columns))
+
+
+def load_data_cached():
+    """Données en cache, invalidées uniquement quand le fichier change"""
+    return _load_data_version(file_fingerprint(METEO_FILE), tuple(COLUMNS))
 
 # ==================== FONCTIONS AUXILIAIRES ====================
 
@@ -87,7 +104,7 @@ def create_popup_html(row, variable, date_str):
     unit = UNITS.get(variable, '')
     value = row.get(variable, 'N/A')
     
-    if pd.notna(value) and isinstance(value, (int, float)):
+    if pd.notna(value) and isinstance(value, (int, float, np.number)):
         value_str = f"{value:.1f} {unit}"
     else: 
         value_str = "Donnée manquante"
@@ -139,6 +156,7 @@ def create_popup_html(row, variable, date_str):
     return html
 
 
+@profile()
 def create_interactive_map(df_jour, variable, center_lat=46.603354, center_lon=1.888334):
     """Crée une carte Folium interactive"""
     m = folium.Map(
@@ -196,7 +214,10 @@ def create_interactive_map(df_jour, variable, center_lat=46.603354, center_lon=1
     
     date_str = df_jour['date'].iloc[0].strftime('%d/%m/%Y') if 'date' in df_jour.columns else 'N/A'
     
-    for idx, row in df_valid.iterrows():
+    # Budget de marqueurs : éclaircissement spatial, valeurs extrêmes privilégiées
+    df_markers = limit_map_markers(df_valid, get_performance_config()['max_map_markers'], variable=variable)
+    
+    for idx, row in df_markers.iterrows():
         color = get_color_scale(row[variable], min_val, max_val, color_type)
         
         popup_html = create_popup_html(row, variable, date_str)
@@ -273,6 +294,7 @@ def create_legend_html(min_val, max_val, variable, color_type):
     return legend_html
 
 
+@profile()
 def create_heatmap_density(df_jour, variable):
     """Crée une carte de chaleur"""
     m = folium.Map(
@@ -315,6 +337,7 @@ def create_heatmap_density(df_jour, variable):
     return m
 
 
+@profile()
 def create_top_stations_chart(df, variable, top_n=15):
     """Graphique des meilleures stations"""
     if df.empty or variable not in df.columns:
@@ -341,6 +364,7 @@ def create_top_stations_chart(df, variable, top_n=15):
     
     return fig
 
+@profile()
 def create_distribution_chart(df, variable):
     """Graphique de distribution"""
     if df.empty or variable not in df.columns:
@@ -376,6 +400,7 @@ def create_distribution_chart(df, variable):
     return fig
 
 
+@profile()
 def create_altitude_analysis(df, variable):
     """Analyse influence altitude"""
     if df.empty or variable not in df.columns or 'ALTI' not in df.columns:
@@ -419,6 +444,7 @@ def create_altitude_analysis(df, variable):
     return fig
 
 
+@profile()
 def create_temporal_comparison(df, variable, date_ref):
     """Graphique comparaison temporelle"""
     if df.empty or variable not in df.columns or 'date' not in df.columns:
@@ -541,7 +567,8 @@ def main():
             'TAMPLI': '📏 Amplitude',
             'RR': '🌧️ Pluie',
             'FFM': '💨 Vent Moy',
-            'FXY': '💨 Rafales Max'
+            'FXY': '💨 Rafales Max',
+            'FWI': '🔥 Indice Feu (IFM)'
         }
         
         variables_dict = {k: v for k, v in variables_dispo.items() if k in df_annee.columns}
@@ -644,6 +671,13 @@ def main():
         
         st_folium(carte, width=1400, height=600)
     
+    if type_viz != 'Heatmap':
+        n_stations = df_jour[['LAT', 'LON', variable_selectionnee]].dropna().shape[0]
+        max_markers = get_performance_config()['max_map_markers']
+        if n_stations > max_markers:
+            st.caption(f"📍 {max_markers:,} marqueurs sur {n_stations:,} stations : une station par zone, "
+                       f"valeurs extrêmes en priorité")
+    
     st.markdown("---")
     
     # ==================== ANALYSES ====================
@@ -694,12 +728,10 @@ def main():
         
         st.dataframe(df_display, use_container_width=True, height=400)
         
-        csv = df_display.to_csv(index=False, sep=';').encode('utf-8')
-        st.download_button(
-            "📥 Télécharger (CSV)",
-            csv,
-            f"meteo_{date_selectionnee.strftime('%Y%m%d')}_{variable_selectionnee}.csv",
-            "text/csv"
+        download_export(
+            df_display,
+            f"meteo_{date_selectionnee.strftime('%Y%m%d')}_{variable_selectionnee}",
+            key="export_carte"
         )
     
     # ==================== FOOTER ====================
@@ -711,5 +743,7 @@ def main():
     """)
 
 
-if __name__ == "__main__": 
-    main()
\ No newline at end of file
+if __name__ == "__main__":
+    with profile("page Carte Interactive"):
+        main()
+    display_profiling_panel("Carte Interactive")
\ No newline at end of file
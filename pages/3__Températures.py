@@ -16,9 +16,16 @@ import sys
 from pathlib import Path
 sys.path.append(str(Path(__file__).parent.parent))
 
-from utils.data_loader import load_data
+from utils.data_loader import load_data, load_normals, download_export
 from utils.preprocessing import filter_by_altitude
-from utils.constants import COLUMN_DESCRIPTIONS, UNITS, MONTHS_FR
+from utils.constants import COLUMN_DESCRIPTIONS, UNITS, MONTHS_FR, MONTHS_SHORT_FR, METEO_FILE, NORMALS_VARIABLES
+from core.fingerprint import file_fingerprint, dataset_fingerprint
+from core.normals import NORMALS_FILE
+from core.quantiles import percentiles, box_stats, histogram
+from components.charts import box_figure, histogram_figure, line_trace
+from core.performance import sample_data_for_viz
+from core.profiling import profile
+from utils.performance import display_profiling_panel
 from utils.styles import get_page_style
 from utils.loading import display_chart
 
@@ -35,11 +42,35 @@ st.markdown(get_page_style(), unsafe_allow_html=True)
 
 # ==================== CACHE SESSION ====================
 
-@st.cache_resource
-def load_data_cached():
-    """Charge les données une seule fois et les met en cache"""
+# Colonnes utilisées par la page : seules celles-ci sont lues (core.columns)
+COLUMNS = ['TN', 'TX', 'TM', 'date']
+
+
+@st.cache_resource(max_entries=1)
+def _load_data_version(fingerprint, columns):
+    """
+    Charge les données une seule fois par version du fichier
+
+    Les colonnes font partie de la clé : les pages partagent ce cache
+    (même fonction, même code) mais n'en déclarent pas les mêmes.
+    """
     with st.spinner('⏳ Chargement des données...'):
-        return load_data("data/raw/meteo_sample.parquet")
+        return load_data(METEO_FILE, columns=list(columns))
+
+
+def load_data_cached():
+    """Données en cache, invalidées uniquement quand le fichier change"""
+    return _load_data_version(file_fingerprint(METEO_FILE), tuple(COLUMNS))
+
+
+@st.cache_resource(max_entries=1)
+def _load_normals_version(fingerprint):
+    return load_normals(load_data(METEO_FILE, columns=NORMALS_VARIABLES))
+
+
+def load_normals_cached():
+    """Charge les normales climatologiques (calculées sur le jeu complet)"""
+    return _load_normals_version(dataset_fingerprint(METEO_FILE, NORMALS_FILE))
 
 # ==================== STATIONS PACA ====================
 
@@ -75,6 +106,7 @@ STATIONS_PACA = [
 
 # ==================== FONCTIONS DE VISUALISATION ====================
 
+@profile()
 def create_evolution_annuelle(df, variable):
     """Graphique d'évolution annuelle avec min/max"""
     if 'annee' not in df.columns or variable not in df.columns:
@@ -159,6 +191,7 @@ def create_evolution_annuelle(df, variable):
     return fig
 
 
+@profile()
 def create_evolution_mensuelle(df, variable, annee_selectionnee=None):
     """Graphique d'évolution mensuelle"""
     if 'mois' not in df.columns or variable not in df.columns:
@@ -211,6 +244,7 @@ def create_evolution_mensuelle(df, variable, annee_selectionnee=None):
     return fig
 
 
+@profile()
 def create_heatmap_annuel(df, variable):
     """Heatmap mois x année"""
     if 'annee' not in df.columns or 'mois' not in df.columns or variable not in df.columns:
@@ -241,6 +275,7 @@ def create_heatmap_annuel(df, variable):
     return fig
 
 
+@profile()
 def create_comparison_decades(df, variable):
     """Comparaison par décennie"""
     if 'annee' not in df.columns or variable not in df.columns:
@@ -278,34 +313,23 @@ def create_comparison_decades(df, variable):
     return fig
 
 
+@profile()
 def create_boxplot_mensuel(df, variable):
     """Boxplot par mois"""
     if 'mois' not in df.columns or variable not in df.columns:
         return None
     
-    df['mois_nom'] = df['mois'].map({
-        1: 'Jan', 2: 'Fév', 3: 'Mar', 4: 'Avr', 5: 'Mai', 6: 'Juin',
-        7: 'Juil', 8: 'Août', 9: 'Sep', 10: 'Oct', 11: 'Nov', 12: 'Déc'
-    })
+    # Quartiles et moustaches calculés ici : 12 boîtes envoyées au navigateur
+    stats, outliers = box_stats(df[variable], df['mois'])
     
-    fig = px.box(
-        df,
-        x='mois',
-        y=variable,
+    fig = box_figure(
+        stats,
+        outliers,
+        colors=px.colors.qualitative.Set3,
+        labels=MONTHS_SHORT_FR,
         title=f'Distribution Mensuelle - {COLUMN_DESCRIPTIONS.get(variable, variable)}',
-        labels={
-            'mois': 'Mois',
-            variable: f'{COLUMN_DESCRIPTIONS.get(variable, variable)} ({UNITS.get(variable, "")})'
-        },
-        color='mois',
-        color_discrete_sequence=px.colors.qualitative.Set3
-    )
-    
-    fig.update_xaxes(
-        tickmode='array',
-        tickvals=list(range(1, 13)),
-        ticktext=['Jan', 'Fév', 'Mar', 'Avr', 'Mai', 'Juin', 
-                  'Juil', 'Août', 'Sep', 'Oct', 'Nov', 'Déc']
+        xaxis_title='Mois',
+        yaxis_title=f'{COLUMN_DESCRIPTIONS.get(variable, variable)} ({UNITS.get(variable, "")})'
     )
     
     fig.update_layout(height=500, showlegend=False, template='plotly_white')
@@ -313,6 +337,7 @@ def create_boxplot_mensuel(df, variable):
     return fig
 
 
+@profile()
 def create_moyennes_mobiles(df, variable, window=30):
     """Graphique avec moyennes mobiles"""
     if 'date' not in df.columns or variable not in df.columns:
@@ -329,9 +354,10 @@ def create_moyennes_mobiles(df, variable, window=30):
     fig = go.Figure()
     
     # Données brutes (semi-transparentes)
-    fig.add_trace(go.Scatter(
-        x=df_daily['date'],
-        y=df_daily[variable],
+    fig.add_trace(line_trace(
+        df_daily['date'],
+        df_daily[variable],
+        method='minmax',
         mode='lines',
         name='Données quotidiennes',
         line=dict(color='lightgray', width=1),
@@ -339,27 +365,27 @@ def create_moyennes_mobiles(df, variable, window=30):
     ))
     
     # Moyenne mobile 7 jours
-    fig.add_trace(go.Scatter(
-        x=df_daily['date'],
-        y=df_daily['MA_7'],
+    fig.add_trace(line_trace(
+        df_daily['date'],
+        df_daily['MA_7'],
         mode='lines',
         name='Moyenne mobile 7 jours',
         line=dict(color='#3498db', width=2)
     ))
     
     # Moyenne mobile 30 jours
-    fig.add_trace(go.Scatter(
-        x=df_daily['date'],
-        y=df_daily['MA_30'],
+    fig.add_trace(line_trace(
+        df_daily['date'],
+        df_daily['MA_30'],
         mode='lines',
         name='Moyenne mobile 30 jours',
         line=dict(color='#e74c3c', width=2)
     ))
     
     # Moyenne mobile 365 jours
-    fig.add_trace(go.Scatter(
-        x=df_daily['date'],
-        y=df_daily['MA_365'],
+    fig.add_trace(line_trace(
+        df_daily['date'],
+        df_daily['MA_365'],
         mode='lines',
         name='Moyenne mobile 365 jours',
         line=dict(color='#2ecc71', width=3)
@@ -378,21 +404,24 @@ def create_moyennes_mobiles(df, variable, window=30):
     return fig
 
 
-def create_anomalies_chart(df, variable):
+@profile()
+def create_anomalies_chart(df, variable, normals=None):
     """Graphique des anomalies"""
     if 'annee' not in df.columns or 'mois' not in df.columns or variable not in df.columns:
         return None
     
-    # Calculer moyenne historique par mois
-    moyenne_historique = df.groupby('mois')[variable].mean()
-    
-    # Calculer anomalies
-    df_anom = df.copy()
-    df_anom['moyenne_hist'] = df_anom['mois'].map(moyenne_historique)
-    df_anom['anomalie'] = df_anom[variable] - df_anom['moyenne_hist']
+    if normals is not None and variable in normals:
+        # Normales précalculées par station : soustraction vectorisée
+        anomalies = normals.anomalies(df, variable)
+        periode = f"{normals.periode[0]}-{normals.periode[1]}"
+    else:
+        # Repli : moyenne historique par mois sur les données chargées
+        moyenne_historique = df.groupby('mois')[variable].mean()
+        anomalies = df[variable] - df['mois'].map(moyenne_historique)
+        periode = None
     
     # Agréger par année
-    df_yearly_anom = df_anom.groupby('annee')['anomalie'].mean().reset_index()
+    df_yearly_anom = anomalies.groupby(df['annee']).mean().rename('anomalie').reset_index()
     
     # Couleurs selon signe
     colors = ['#e74c3c' if x > 0 else '#3498db' for x in df_yearly_anom['anomalie']]
@@ -406,10 +435,12 @@ def create_anomalies_chart(df, variable):
         )
     ])
     
+    reference = f"Normale {periode}" if periode else "Moyenne Historique"
+    
     fig.add_hline(y=0, line_dash="dash", line_color="black", line_width=2)
     
     fig.update_layout(
-        title=f'Anomalies par rapport à la Moyenne Historique - {COLUMN_DESCRIPTIONS.get(variable, variable)}',
+        title=f'Anomalies par rapport à la {reference} - {COLUMN_DESCRIPTIONS.get(variable, variable)}',
         xaxis_title='Année',
         yaxis_title=f'Anomalie ({UNITS.get(variable, "")})',
         height=500,
@@ -420,6 +451,7 @@ def create_anomalies_chart(df, variable):
     return fig
 
 
+@profile()
 def create_jours_extremes_chart(df, variable, seuil=None):
     """Graphique du nombre de jours extrêmes"""
     if 'annee' not in df.columns or variable not in df.columns:
@@ -453,6 +485,7 @@ def create_jours_extremes_chart(df, variable, seuil=None):
     return fig
 
 
+@profile()
 def create_comparison_variables(df):
     """Comparaison des trois variables TN, TX, TM"""
     variables = ['TN', 'TX', 'TM']
@@ -493,14 +526,17 @@ def calculate_statistics(df, variable):
     if variable not in df.columns:
         return None
     
+    # Médiane et quartiles en un seul appel
+    q1, mediane, q3 = percentiles(df[variable], [25, 50, 75])
+    
     stats = {
         'Moyenne': df[variable].mean(),
-        'Médiane': df[variable].median(),
+        'Médiane': mediane,
         'Écart-type': df[variable].std(),
         'Minimum': df[variable].min(),
         'Maximum': df[variable].max(),
-        'Q1 (25%)': df[variable].quantile(0.25),
-        'Q3 (75%)': df[variable].quantile(0.75),
+        'Q1 (25%)': q1,
+        'Q3 (75%)': q3,
         'Étendue': df[variable].max() - df[variable].min(),
         'Coefficient de variation': (df[variable].std() / df[variable].mean() * 100) if df[variable].mean() != 0 else 0
     }
@@ -719,7 +755,7 @@ def main():
         
         with col1:
             st.markdown("#### Anomalies Climatiques")
-            fig_anom = create_anomalies_chart(df, variable_select)
+            fig_anom = create_anomalies_chart(df, variable_select, load_normals_cached())
             if fig_anom: 
                 display_chart(fig_anom, "⏳ Calcul des anomalies...", use_container_width=True)
         
@@ -766,13 +802,11 @@ def main():
         
         with col1:
             # Histogramme
-            fig_hist = px.histogram(
-                df.dropna(subset=[variable_select]),
-                x=variable_select,
-                nbins=50,
+            counts, edges = histogram(df[variable_select])
+            fig_hist = histogram_figure(
+                counts, edges,
                 title=f'Distribution - {COLUMN_DESCRIPTIONS.get(variable_select, variable_select)}',
-                labels={variable_select: f'{COLUMN_DESCRIPTIONS.get(variable_select, variable_select)} ({UNITS.get(variable_select, "")})'},
-                color_discrete_sequence=['#3498db']
+                xaxis_title=f'{COLUMN_DESCRIPTIONS.get(variable_select, variable_select)} ({UNITS.get(variable_select, "")})'
             )
             fig_hist.update_layout(height=400, showlegend=False)
             st.plotly_chart(fig_hist, use_container_width=True)
@@ -817,10 +851,10 @@ def main():
         with subtab1:
             st.markdown("#### Lissage par Moyennes Mobiles")
             
-            # Limiter les données pour performance
+            # Limiter les données pour performance : même nombre de lignes chaque jour
             if len(df) > 50000:
-                st.warning(f"⚠️ Trop de données ({len(df):,}).Échantillonnage aléatoire de 50,000 points.")
-                df_sample = df.sample(50000, random_state=42)
+                st.warning(f"⚠️ Trop de données ({len(df):,}). Échantillonnage stratifié par jour de 50,000 points.")
+                df_sample = sample_data_for_viz(df, 50000, 'stratified', by='date', allocation='equal')
             else:
                 df_sample = df
 
@@ -897,12 +931,11 @@ def main():
             
             with col1:
                 # Export données filtrées
-                csv_data = df.to_csv(index=False, sep=';').encode('utf-8')
-                st.download_button(
-                    label="📥 Télécharger données brutes (CSV)",
-                    data=csv_data,
-                    file_name=f"temperature_analyse_{periode_affichage}.csv",
-                    mime="text/csv"
+                download_export(
+                    df,
+                    f"temperature_analyse_{periode_affichage}",
+                    label="📥 Télécharger données brutes",
+                    key="export_donnees"
                 )
             
             with col2:
@@ -925,5 +958,7 @@ def main():
     {df['NUM_POSTE'].nunique()} stations | {len(df):,} mesures
     """)
 
-if __name__ == "__main__": 
-    main()
\ No newline at end of file
+if __name__ == "__main__":
+    with profile("page Températures"):
+        main()
+    display_profiling_panel("Températures")
\ No newline at end of file
@@ -16,9 +16,17 @@ import sys
 from pathlib import Path
 sys.path.append(str(Path(__file__).parent.parent))
 
-from utils.data_loader import load_data
+from utils.data_loader import load_data, load_normals, download_export
 from utils.preprocessing import filter_by_altitude
-from utils.constants import COLUMN_DESCRIPTIONS, UNITS, MONTHS_FR
+from utils.constants import COLUMN_DESCRIPTIONS, UNITS, MONTHS_FR, MONTHS_SHORT_FR, METEO_FILE, NORMALS_VARIABLES, THRESHOLDS
+from core.fingerprint import file_fingerprint, dataset_fingerprint
+from core.normals import NORMALS_FILE
+from core.quantiles import box_stats, histogram
+from components.charts import box_figure, histogram_figure, line_trace
+from core.dry_spells import dry_spells, longest_dry_spell_by_year
+from core.performance import sample_data_for_viz
+from core.profiling import profile
+from utils.performance import display_profiling_panel
 from utils.styles import get_page_style
 from utils.loading import display_chart
 
@@ -35,11 +43,35 @@ st.markdown(get_page_style(), unsafe_allow_html=True)
 
 # ==================== CACHE SESSION ====================
 
-@st.cache_resource
-def load_data_cached():
-    """Charge les données une seule fois et les met en cache"""
+# Colonnes utilisées par la page : seules celles-ci sont lues (core.columns)
+COLUMNS = ['RR', 'jours_secs', 'date']
+
+
+@st.cache_resource(max_entries=1)
+def _load_data_version(fingerprint, columns):
+    """
+    Charge les données une seule fois par version du fichier
+
+    Les colonnes font partie de la clé : les pages partagent ce cache
+    (même fonction, même code) mais n'en déclarent pas les mêmes.
+    """
     with st.spinner('⏳ Chargement des données...'):
-        return load_data("data/raw/meteo_sample.parquet")
+        return load_data(METEO_FILE, columns=list(columns))
+
+
+def load_data_cached():
+    """Données en cache, invalidées uniquement quand le fichier change"""
+    return _load_data_version(file_fingerprint(METEO_FILE), tuple(COLUMNS))
+
+
+@st.cache_resource(max_entries=1)
+def _load_normals_version(fingerprint):
+    return load_normals(load_data(METEO_FILE, columns=NORMALS_VARIABLES))
+
+
+def load_normals_cached():
+    """Charge les normales climatologiques (calculées sur le jeu complet)"""
+    return _load_normals_version(dataset_fingerprint(METEO_FILE, NORMALS_FILE))
 
 # ==================== STATIONS PACA ====================
 
@@ -75,6 +107,7 @@ STATIONS_PACA = [
 
 # ==================== FONCTIONS DE VISUALISATION ====================
 
+@profile()
 def create_evolution_annuelle(df, variable='RR'):
     """Graphique d'évolution annuelle des précipitations avec min/max"""
     if 'annee' not in df.columns or variable not in df.columns:
@@ -159,6 +192,7 @@ def create_evolution_annuelle(df, variable='RR'):
     return fig
 
 
+@profile()
 def create_evolution_mensuelle(df, variable='RR', annee_selectionnee=None):
     """Graphique d'évolution mensuelle des précipitations"""
     if 'mois' not in df.columns or variable not in df.columns:
@@ -211,6 +245,7 @@ def create_evolution_mensuelle(df, variable='RR', annee_selectionnee=None):
     return fig
 
 
+@profile()
 def create_heatmap_annuel(df, variable='RR'):
     """Heatmap mois x année pour les précipitations"""
     if 'annee' not in df.columns or 'mois' not in df.columns or variable not in df.columns:
@@ -241,6 +276,7 @@ def create_heatmap_annuel(df, variable='RR'):
     return fig
 
 
+@profile()
 def create_comparison_decades(df, variable='RR'):
     """Comparaison des précipitations par décennie"""
     if 'annee' not in df.columns or variable not in df.columns:
@@ -278,34 +314,23 @@ def create_comparison_decades(df, variable='RR'):
     return fig
 
 
+@profile()
 def create_boxplot_mensuel(df, variable='RR'):
     """Boxplot par mois pour la distribution des précipitations"""
     if 'mois' not in df.columns or variable not in df.columns:
         return None
     
-    df['mois_nom'] = df['mois'].map({
-        1: 'Jan', 2: 'Fév', 3: 'Mar', 4: 'Avr', 5: 'Mai', 6: 'Juin',
-        7: 'Juil', 8: 'Août', 9: 'Sep', 10: 'Oct', 11: 'Nov', 12: 'Déc'
-    })
+    # Quartiles et moustaches calculés ici : 12 boîtes envoyées au navigateur
+    stats, outliers = box_stats(df[variable], df['mois'])
     
-    fig = px.box(
-        df,
-        x='mois',
-        y=variable,
+    fig = box_figure(
+        stats,
+        outliers,
+        colors=px.colors.qualitative.Set3,
+        labels=MONTHS_SHORT_FR,
         title=f'Distribution Mensuelle - {COLUMN_DESCRIPTIONS.get(variable, variable)}',
-        labels={
-            'mois': 'Mois',
-            variable: f'{COLUMN_DESCRIPTIONS.get(variable, variable)} ({UNITS.get(variable, "")})'
-        },
-        color='mois',
-        color_discrete_sequence=px.colors.qualitative.Set3
-    )
-    
-    fig.update_xaxes(
-        tickmode='array',
-        tickvals=list(range(1, 13)),
-        ticktext=['Jan', 'Fév', 'Mar', 'Avr', 'Mai', 'Juin', 
-                  'Juil', 'Août', 'Sep', 'Oct', 'Nov', 'Déc']
+        xaxis_title='Mois',
+        yaxis_title=f'{COLUMN_DESCRIPTIONS.get(variable, variable)} ({UNITS.get(variable, "")})'
     )
     
     fig.update_layout(height=500, showlegend=False, template='plotly_white')
@@ -313,6 +338,7 @@ def create_boxplot_mensuel(df, variable='RR'):
     return fig
 
 
+@profile()
 def create_moyennes_mobiles(df, variable='RR', window=30):
     """Graphique avec moyennes mobiles des précipitations"""
     if 'date' not in df.columns or variable not in df.columns:
@@ -329,9 +355,10 @@ def create_moyennes_mobiles(df, variable='RR', window=30):
     fig = go.Figure()
     
     # Données brutes (semi-transparentes)
-    fig.add_trace(go.Scatter(
-        x=df_daily['date'],
-        y=df_daily[variable],
+    fig.add_trace(line_trace(
+        df_daily['date'],
+        df_daily[variable],
+        method='minmax',
         mode='markers',
         name='Données quotidiennes',
         marker=dict(color='lightgray', size=4),
@@ -339,27 +366,27 @@ def create_moyennes_mobiles(df, variable='RR', window=30):
     ))
     
     # Somme mobile 7 jours
-    fig.add_trace(go.Scatter(
-        x=df_daily['date'],
-        y=df_daily['MA_7'],
+    fig.add_trace(line_trace(
+        df_daily['date'],
+        df_daily['MA_7'],
         mode='lines',
         name='Somme mobile 7 jours',
         line=dict(color='#3498db', width=2)
     ))
     
     # Somme mobile 30 jours
-    fig.add_trace(go.Scatter(
-        x=df_daily['date'],
-        y=df_daily['MA_30'],
+    fig.add_trace(line_trace(
+        df_daily['date'],
+        df_daily['MA_30'],
         mode='lines',
         name='Somme mobile 30 jours',
         line=dict(color='#e74c3c', width=2)
     ))
     
     # Somme mobile 365 jours
-    fig.add_trace(go.Scatter(
-        x=df_daily['date'],
-        y=df_daily['MA_365'],
+    fig.add_trace(line_trace(
+        df_daily['date'],
+        df_daily['MA_365'],
         mode='lines',
         name='Somme mobile 365 jours',
         line=dict(color='#2ecc71', width=3)
@@ -378,21 +405,24 @@ def create_moyennes_mobiles(df, variable='RR', window=30):
     return fig
 
 
-def create_anomalies_chart(df, variable='RR'):
+@profile()
+def create_anomalies_chart(df, variable='RR', normals=None):
     """Graphique des anomalies de précipitations par rapport à la normale"""
     if 'annee' not in df.columns or 'mois' not in df.columns or variable not in df.columns:
         return None
     
-    # Calculer normale historique par mois
-    normale_historique = df.groupby('mois')[variable].mean()
-    
-    # Calculer anomalies
-    df_anom = df.copy()
-    df_anom['normale_hist'] = df_anom['mois'].map(normale_historique)
-    df_anom['anomalie'] = df_anom[variable] - df_anom['normale_hist']
+    if normals is not None and variable in normals:
+        # Normales précalculées par station : soustraction vectorisée
+        anomalies = normals.anomalies(df, variable)
+        periode = f"{normals.periode[0]}-{normals.periode[1]}"
+    else:
+        # Repli : normale historique par mois sur les données chargées
+        normale_historique = df.groupby('mois')[variable].mean()
+        anomalies = df[variable] - df['mois'].map(normale_historique)
+        periode = None
     
     # Agréger par année
-    df_yearly_anom = df_anom.groupby('annee')['anomalie'].sum().reset_index()
+    df_yearly_anom = anomalies.groupby(df['annee']).sum().rename('anomalie').reset_index()
     
     # Couleurs selon signe
     colors = ['#e74c3c' if x > 0 else '#3498db' for x in df_yearly_anom['anomalie']]
@@ -406,10 +436,12 @@ def create_anomalies_chart(df, variable='RR'):
         )
     ])
     
+    reference = f"Normale {periode}" if periode else "Normale Historique"
+    
     fig.add_hline(y=0, line_dash="dash", line_color="black", line_width=2)
     
     fig.update_layout(
-        title=f'Anomalies par rapport à la Normale Historique - {COLUMN_DESCRIPTIONS.get(variable, variable)}',
+        title=f'Anomalies par rapport à la {reference} - {COLUMN_DESCRIPTIONS.get(variable, variable)}',
         xaxis_title='Année',
         yaxis_title=f'Anomalie ({UNITS.get(variable, "")})',
         height=500,
@@ -420,6 +452,7 @@ def create_anomalies_chart(df, variable='RR'):
     return fig
 
 
+@profile()
 def create_jours_pluie_chart(df, variable='RR'):
     """Graphique du nombre de jours avec précipitations"""
     if 'annee' not in df.columns or 'date' not in df.columns or variable not in df.columns:
@@ -446,6 +479,7 @@ def create_jours_pluie_chart(df, variable='RR'):
     return fig
 
 
+@profile()
 def create_intensity_chart(df, variable='RR'):
     """Graphique de l'intensité moyenne des précipitations"""
     if 'annee' not in df.columns or variable not in df.columns:
@@ -479,6 +513,55 @@ def create_intensity_chart(df, variable='RR'):
     return fig
 
 
+@profile()
+def create_secheresse_chart(df):
+    """Graphique de la plus longue série sèche par année"""
+    if 'date' not in df.columns or 'RR' not in df.columns:
+        return None
+    
+    df_longest = longest_dry_spell_by_year(df)
+    if df_longest.empty:
+        return None
+    
+    # Maximum et moyenne des stations pour chaque année
+    df_yearly = df_longest.groupby('annee')['plus_longue_secheresse'].agg(['max', 'mean']).reset_index()
+    
+    fig = go.Figure()
+    
+    fig.add_trace(go.Bar(
+        x=df_yearly['annee'],
+        y=df_yearly['max'],
+        name='Station la plus sèche',
+        marker_color='#e67e22'
+    ))
+    
+    fig.add_trace(go.Scatter(
+        x=df_yearly['annee'],
+        y=df_yearly['mean'],
+        mode='lines+markers',
+        name='Moyenne des stations',
+        line=dict(color='#8e5a2b', width=3)
+    ))
+    
+    fig.add_hline(
+        y=THRESHOLDS['duree_secheresse'],
+        line_dash="dash",
+        line_color="red",
+        annotation_text=f"Sécheresse ({THRESHOLDS['duree_secheresse']} jours)"
+    )
+    
+    fig.update_layout(
+        title=f"Plus Longue Série Sèche par Année (RR ≤ {THRESHOLDS['pluie_faible']} mm)",
+        xaxis_title='Année',
+        yaxis_title='Jours consécutifs',
+        height=500,
+        template='plotly_white',
+        hovermode='x unified'
+    )
+    
+    return fig
+
+
 def calculate_statistics(df, variable='RR'):
     """Calcule les statistiques descriptives pour les précipitations"""
     if variable not in df.columns:
@@ -689,7 +772,7 @@ def main():
         
         with col1:
             st.markdown("#### Anomalies Climatiques")
-            fig_anom = create_anomalies_chart(df, variable_select)
+            fig_anom = create_anomalies_chart(df, variable_select, load_normals_cached())
             if fig_anom: 
                 st.plotly_chart(fig_anom, use_container_width=True)
         
@@ -736,13 +819,11 @@ def main():
         
         with col1:
             # Histogramme
-            fig_hist = px.histogram(
-                df[df[variable_select] > 0],
-                x=variable_select,
-                nbins=50,
+            counts, edges = histogram(df.loc[df[variable_select] > 0, variable_select])
+            fig_hist = histogram_figure(
+                counts, edges,
                 title=f'Distribution des Jours Pluvieux - {COLUMN_DESCRIPTIONS.get(variable_select, variable_select)}',
-                labels={variable_select: f'{COLUMN_DESCRIPTIONS.get(variable_select, variable_select)} ({UNITS.get(variable_select, "")})'},
-                color_discrete_sequence=['#3498db']
+                xaxis_title=f'{COLUMN_DESCRIPTIONS.get(variable_select, variable_select)} ({UNITS.get(variable_select, "")})'
             )
             fig_hist.update_layout(height=400, showlegend=False)
             st.plotly_chart(fig_hist, use_container_width=True)
@@ -780,15 +861,15 @@ def main():
         st.subheader("Analyses Avancées")
         
         # Sous-onglets pour les analyses avancées
-        subtab1, subtab2, subtab3 = st.tabs(["Moyennes Mobiles", "Intensité", "Tendances"])
+        subtab1, subtab2, subtab3, subtab4 = st.tabs(["Moyennes Mobiles", "Intensité", "Tendances", "Sécheresse"])
         
         with subtab1:
             st.markdown("#### Lissage par Moyennes Mobiles")
             
-            # Limiter les données pour performance
+            # Limiter les données pour performance : même nombre de lignes chaque jour
             if len(df) > 50000:
-                st.warning(f"⚠️ Trop de données ({len(df):,}).Échantillonnage aléatoire de 50,000 points.")
-                df_sample = df.sample(50000, random_state=42)
+                st.warning(f"⚠️ Trop de données ({len(df):,}). Échantillonnage stratifié par jour de 50,000 points.")
+                df_sample = sample_data_for_viz(df, 50000, 'stratified', by='date', allocation='equal')
             else:
                 df_sample = df
 
@@ -862,6 +943,52 @@ def main():
                 else: 
                     st.info(f"📉 **Tendance à la baisse** : Diminution de {abs(tendance_an):.2f} {UNITS.get(variable_select, '')}/an")
         
+        with subtab4:
+            st.markdown("#### Périodes Sèches")
+            
+            fig_secheresse = create_secheresse_chart(df)
+            if fig_secheresse:
+                st.plotly_chart(fig_secheresse, use_container_width=True)
+            
+            duree_min = st.slider(
+                "Durée minimale d'une période sèche (jours)",
+                min_value=7,
+                max_value=120,
+                value=THRESHOLDS['duree_secheresse'],
+                key="duree_secheresse"
+            )
+            
+            df_spells = dry_spells(df, min_days=duree_min)
+            
+            col1, col2, col3 = st.columns(3)
+            
+            with col1:
+                st.metric("Périodes sèches", f"{len(df_spells):,}")
+            
+            with col2:
+                st.metric("Plus longue", f"{df_spells['duree'].max() if len(df_spells) > 0 else 0} jours")
+            
+            with col3:
+                st.metric("Stations touchées", df_spells['NUM_POSTE'].nunique())
+            
+            if len(df_spells) > 0:
+                st.dataframe(
+                    df_spells.head(50).rename(columns={
+                        'NOM_USUEL': 'Station',
+                        'debut': 'Début',
+                        'fin': 'Fin',
+                        'duree': 'Durée (jours)'
+                    }).drop(columns='NUM_POSTE'),
+                    use_container_width=True,
+                    hide_index=True
+                )
+            
+            st.info(f"""
+            💡 **Définition** :
+            Un jour est sec si les précipitations sont ≤ {THRESHOLDS['pluie_faible']} mm.
+            Une mesure manquante ou un jour absent interrompt la série.
+            """)
+        
         # ==================== EXPORT ====================
 
         st.markdown("---")
@@ -870,12 +997,11 @@ def main():
             
             with col1:
                 # Export données filtrées
-                csv_data = df.to_csv(index=False, sep=';').encode('utf-8')
-                st.download_button(
-                    label="📥 Télécharger données brutes (CSV)",
-                    data=csv_data,
-                    file_name=f"precipitation_analyse_{periode_affichage}.csv",
-                    mime="text/csv"
+                download_export(
+                    df,
+                    f"precipitation_analyse_{periode_affichage}",
+                    label="📥 Télécharger données brutes",
+                    key="export_donnees"
                 )
             
             with col2:
@@ -898,5 +1024,7 @@ def main():
         {df['NUM_POSTE'].nunique()} stations | {len(df):,} mesures
         """)
 
-if __name__ == "__main__": 
-    main()
\ No newline at end of file
+if __name__ == "__main__":
+    with profile("page Précipitations"):
+        main()
+    display_profiling_panel("Précipitations")
\ No newline at end of file
@@ -10,18 +10,28 @@ import plotly.graph_objects as go
 from plotly.subplots import make_subplots
 import numpy as np
 from datetime import datetime
-import math
 
 # Imports des modules utils
 import sys
 from pathlib import Path
 sys.path.append(str(Path(__file__).parent.parent))
 
-from utils.data_loader import load_data
+from utils.data_loader import load_data, load_normals, load_wind_rose_cube, download_export
 from utils.preprocessing import filter_by_altitude
-from utils.constants import COLUMN_DESCRIPTIONS, UNITS, MONTHS_FR
+from utils.constants import COLUMN_DESCRIPTIONS, UNITS, MONTHS_FR, MONTHS_SHORT_FR, SEASONS, METEO_FILE, NORMALS_VARIABLES
+from core.fingerprint import file_fingerprint, dataset_fingerprint
+from core.normals import NORMALS_FILE
+from core.quantiles import percentiles, box_stats, histogram
+from components.charts import box_figure, histogram_figure, line_trace
+from core.performance import sample_data_for_viz
+from core.profiling import profile
+from utils.performance import display_profiling_panel
 from utils.styles import get_page_style
 from utils.loading import display_chart
+from core.wind_rose import (
+    compute_wind_rose, compute_wind_roses, wind_rose_table,
+    build_wind_rose_cube, wind_rose_cube_path
+)
 
 # ==================== CONFIGURATION PAGE ====================
 
@@ -36,11 +46,46 @@ st.markdown(get_page_style(), unsafe_allow_html=True)
 
 # ==================== CACHE SESSION ====================
 
-@st.cache_resource
-def load_data_cached():
-    """Charge les données une seule fois et les met en cache"""
+# Colonnes utilisées par la page : seules celles-ci sont lues (core.columns)
+COLUMNS = ['FFM', 'FF2M', 'FXY', 'DXY', 'FXI', 'DXI', 'FXI2', 'FXI3S', 'DXI3S', 'date']
+
+
+@st.cache_resource(max_entries=1)
+def _load_data_version(fingerprint, columns):
+    """
+    Charge les données une seule fois par version du fichier
+
+    Les colonnes font partie de la clé : les pages partagent ce cache
+    (même fonction, même code) mais n'en déclarent pas les mêmes.
+    """
     with st.spinner('⏳ Chargement des données...'):
-        return load_data("data/raw/meteo_sample.parquet")
+        return load_data(METEO_FILE, columns=list(columns))
+
+
+def load_data_cached():
+    """Données en cache, invalidées uniquement quand le fichier change"""
+    return _load_data_version(file_fingerprint(METEO_FILE), tuple(COLUMNS))
+
+
+@st.cache_resource(max_entries=1)
+def _load_normals_version(fingerprint):
+    return load_normals(load_data(METEO_FILE, columns=NORMALS_VARIABLES))
+
+
+def load_normals_cached():
+    """Charge les normales climatologiques (calculées sur le jeu complet)"""
+    return _load_normals_version(dataset_fingerprint(METEO_FILE, NORMALS_FILE))
+
+
+@st.cache_resource(max_entries=4)
+def _load_wind_rose_cube_version(speed_col, direction_col, fingerprint):
+    return load_wind_rose_cube(load_data_cached(), speed_col, direction_col)
+
+
+def load_wind_rose_cube_cached(speed_col, direction_col):
+    """Charge le cube station × mois des roses des vents"""
+    fingerprint = dataset_fingerprint(METEO_FILE, wind_rose_cube_path(speed_col, direction_col))
+    return _load_wind_rose_cube_version(speed_col, direction_col, fingerprint)
 
 # ==================== STATIONS PACA ====================
 
@@ -97,6 +142,7 @@ DIRECTIONS = {
 
 # ==================== FONCTIONS DE VISUALISATION ====================
 
+@profile()
 def create_evolution_annuelle(df, variable):
     """Graphique d'évolution annuelle du vent"""
     if 'annee' not in df.columns or variable not in df.columns:
@@ -181,6 +227,7 @@ def create_evolution_annuelle(df, variable):
     return fig
 
 
+@profile()
 def create_evolution_mensuelle(df, variable, annee_selectionnee=None):
     """Graphique d'évolution mensuelle du vent"""
     if 'mois' not in df.columns or variable not in df.columns:
@@ -233,6 +280,7 @@ def create_evolution_mensuelle(df, variable, annee_selectionnee=None):
     return fig
 
 
+@profile()
 def create_heatmap_annuel(df, variable):
     """Heatmap mois x année pour le vent"""
     if 'annee' not in df.columns or 'mois' not in df.columns or variable not in df.columns:
@@ -263,6 +311,7 @@ def create_heatmap_annuel(df, variable):
     return fig
 
 
+@profile()
 def create_comparison_decades(df, variable):
     """Comparaison du vent par décennie"""
     if 'annee' not in df.columns or variable not in df.columns:
@@ -300,34 +349,23 @@ def create_comparison_decades(df, variable):
     return fig
 
 
+@profile()
 def create_boxplot_mensuel(df, variable):
     """Boxplot par mois pour la distribution du vent"""
     if 'mois' not in df.columns or variable not in df.columns:
         return None
     
-    df['mois_nom'] = df['mois'].map({
-        1: 'Jan', 2: 'Fév', 3: 'Mar', 4: 'Avr', 5: 'Mai', 6: 'Juin',
-        7: 'Juil', 8: 'Août', 9: 'Sep', 10: 'Oct', 11: 'Nov', 12: 'Déc'
-    })
+    # Quartiles et moustaches calculés ici : 12 boîtes envoyées au navigateur
+    stats, outliers = box_stats(df[variable], df['mois'])
     
-    fig = px.box(
-        df,
-        x='mois',
-        y=variable,
+    fig = box_figure(
+        stats,
+        outliers,
+        colors=px.colors.qualitative.Set3,
+        labels=MONTHS_SHORT_FR,
         title=f'Distribution Mensuelle - {COLUMN_DESCRIPTIONS.get(variable, variable)}',
-        labels={
-            'mois': 'Mois',
-            variable: f'{COLUMN_DESCRIPTIONS.get(variable, variable)} ({UNITS.get(variable, "")})'
-        },
-        color='mois',
-        color_discrete_sequence=px.colors.qualitative.Set3
-    )
-    
-    fig.update_xaxes(
-        tickmode='array',
-        tickvals=list(range(1, 13)),
-        ticktext=['Jan', 'Fév', 'Mar', 'Avr', 'Mai', 'Juin', 
-                  'Juil', 'Août', 'Sep', 'Oct', 'Nov', 'Déc']
+        xaxis_title='Mois',
+        yaxis_title=f'{COLUMN_DESCRIPTIONS.get(variable, variable)} ({UNITS.get(variable, "")})'
     )
     
     fig.update_layout(height=500, showlegend=False, template='plotly_white')
@@ -335,60 +373,34 @@ def create_boxplot_mensuel(df, variable):
     return fig
 
 
-def create_wind_rose(df, variable_vitesse, variable_direction):
+def _cube_selection(df):
+    """Stations et années couvertes par le DataFrame filtré"""
+    return df['NUM_POSTE'].unique(), df['annee'].unique()
+
+
+@profile()
+def create_wind_rose(df, variable_vitesse, variable_direction, n_sectors=16, calm_threshold=0.0,
+                     cube=None):
     """Rose des vents - graphique polaire"""
     if variable_vitesse not in df.columns or variable_direction not in df.columns:
         return None
     
-    df_clean = df[[variable_vitesse, variable_direction]].dropna()
-    
-    # Classer par direction
-    def get_direction(angle):
-        if angle < 11.25 or angle >= 348.75:
-            return 'N'
-        elif angle < 33.75:
-            return 'NNE'
-        elif angle < 56.25:
-            return 'NE'
-        elif angle < 78.75:
-            return 'ENE'
-        elif angle < 101.25:
-            return 'E'
-        elif angle < 123.75:
-            return 'ESE'
-        elif angle < 146.25:
-            return 'SE'
-        elif angle < 168.75:
-            return 'SSE'
-        elif angle < 191.25:
-            return 'S'
-        elif angle < 213.75:
-            return 'SSO'
-        elif angle < 236.25:
-            return 'SO'
-        elif angle < 258.75:
-            return 'OSO'
-        elif angle < 281.25:
-            return 'O'
-        elif angle < 303.75:
-            return 'ONO'
-        elif angle < 326.25:
-            return 'NO'
-        else:
-            return 'NNO'
-    
-    df_clean['direction'] = df_clean[variable_direction].apply(get_direction)
-    
-    # Classer par vitesse
-    df_clean['vitesse_classe'] = pd.cut(df_clean[variable_vitesse], 
-                                         bins=[0, 2, 4, 6, 8, 100],
-                                         labels=['0-2 m/s', '2-4 m/s', '4-6 m/s', '6-8 m/s', '>8 m/s'])
-    
-    # Compter par direction et vitesse
-    wind_rose_data = df_clean.groupby(['direction', 'vitesse_classe']).size().reset_index(name='count')
+    if cube is not None and cube.matches(variable_vitesse, variable_direction, n_sectors, calm_threshold):
+        # Somme des matrices station × mois précalculées
+        stations, annees = _cube_selection(df)
+        rose = cube.rose(stations=stations, years=annees)
+    else:
+        # Histogramme direction × vitesse vectorisé
+        rose = compute_wind_rose(
+            df[variable_direction],
+            df[variable_vitesse],
+            n_sectors=n_sectors,
+            calm_threshold=calm_threshold
+        )
+    wind_rose_data = wind_rose_table(rose)
     
     # Ordre des directions
-    direction_order = ['N', 'NNE', 'NE', 'ENE', 'E', 'ESE', 'SE', 'SSE', 'S', 'SSO', 'SO', 'OSO', 'O', 'ONO', 'NO', 'NNO']
+    direction_order = rose['secteurs']
     
     fig = px.bar_polar(
         wind_rose_data,
@@ -396,6 +408,7 @@ def create_wind_rose(df, variable_vitesse, variable_direction):
         theta='direction',
         color='vitesse_classe',
         title='Rose des Vents',
+        category_orders={'direction': direction_order, 'vitesse_classe': rose['classes']},
         color_discrete_sequence=px.colors.sequential.Blues_r
     )
     
@@ -412,9 +425,163 @@ def create_wind_rose(df, variable_vitesse, variable_direction):
         height=500
     )
     
+    if rose['calmes']:
+        fig.add_annotation(
+            text=f"Calmes: {rose['calmes'] / rose['total'] * 100:.1f}%",
+            xref="paper", yref="paper",
+            x=0.02, y=0.02,
+            showarrow=False
+        )
+    
     return fig
 
 
+@profile()
+def create_wind_rose_by_group(df, variable_vitesse, variable_direction, by='saison',
+                              n_sectors=16, calm_threshold=0.0, max_groups=6, cube=None):
+    """Roses des vents par groupe (saison, station) en petits multiples"""
+    if by not in df.columns or variable_vitesse not in df.columns or variable_direction not in df.columns:
+        return None
+    
+    if (cube is not None and by in ('saison', 'NOM_USUEL')
+            and cube.matches(variable_vitesse, variable_direction, n_sectors, calm_threshold)):
+        stations, annees = _cube_selection(df)
+        if by == 'saison':
+            roses = cube.roses_by('saison', stations=stations, years=annees)
+        else:
+            noms = df.drop_duplicates('NUM_POSTE').set_index('NUM_POSTE')['NOM_USUEL']
+            roses = {
+                noms.get(num_poste, num_poste): rose
+                for num_poste, rose in cube.roses_by('station', stations=stations, years=annees).items()
+            }
+    else:
+        roses = compute_wind_roses(
+            df, variable_vitesse, variable_direction, by,
+            n_sectors=n_sectors, calm_threshold=calm_threshold
+        )
+    
+    if by == 'saison':
+        groups = [s for s in SEASONS if s in roses]
+    else:
+        groups = sorted(roses, key=lambda g: roses[g]['total'], reverse=True)[:max_groups]
+    
+    if not groups:
+        return None
+    
+    n_cols = min(len(groups), 3)
+    n_rows = (len(groups) + n_cols - 1) // n_cols
+    
+    fig = make_subplots(
+        rows=n_rows,
+        cols=n_cols,
+        specs=[[{'type': 'polar'}] * n_cols for _ in range(n_rows)],
+        subplot_titles=[str(g) for g in groups]
+    )
+    
+    colors = px.colors.sequential.Blues_r
+    
+    for i, group in enumerate(groups):
+        rose = roses[group]
+        # Fréquences en % pour comparer des groupes de tailles différentes
+        freqs = rose['counts'] / max(rose['total'], 1) * 100
+        
+        for k, classe in enumerate(rose['classes']):
+            fig.add_trace(
+                go.Barpolar(
+                    r=freqs[:, k],
+                    theta=rose['secteurs'],
+                    name=classe,
+                    marker_color=colors[k % len(colors)],
+                    legendgroup=classe,
+                    showlegend=(i == 0)
+                ),
+                row=i // n_cols + 1, col=i % n_cols + 1
+            )
+    
+    fig.update_polars(angularaxis=dict(rotation=90, direction='clockwise'))
+    fig.update_layout(
+        title='Roses des Vents (% des observations)',
+        height=400 * n_rows,
+        template='plotly_white'
+    )
+    
+    return fig
+
+
+@profile()
+def create_wind_rose_animation(df, cube):
+    """Rose des vents animée mois par mois (à partir du cube précalculé)"""
+    if cube is None or df.empty:
+        return None
+    
+    stations, annees = _cube_selection(df)
+    roses = cube.roses_by('mois', stations=stations, years=annees)
+    if not roses:
+        return None
+    
+    mois_list = sorted(roses)
+    colors = px.colors.sequential.Blues_r
+    
+    def traces(rose):
+        freqs = rose['counts'] / max(rose['total'], 1) * 100
+        return [
+            go.Barpolar(
+                r=freqs[:, k],
+                theta=rose['secteurs'],
+                name=classe,
+                marker_color=colors[k % len(colors)]
+            )
+            for k, classe in enumerate(rose['classes'])
+        ]
+    
+    # Échelle radiale commune pour comparer les mois entre eux
+    r_max = max(
+        (rose['counts'].sum(axis=1) / max(rose['total'], 1) * 100).max()
+        for rose in roses.values()
+    )
+    
+    frames = [
+        go.Frame(data=traces(roses[m]), name=MONTHS_FR[m])
+        for m in mois_list
+    ]
+    
+    fig = go.Figure(data=traces(roses[mois_list[0]]), frames=frames)
+    
+    fig.update_layout(
+        title='Rose des Vents mois par mois (% des observations)',
+        barmode='stack',
+        polar=dict(
+            radialaxis=dict(range=[0, r_max * 1.05]),
+            angularaxis=dict(rotation=90, direction='clockwise')
+        ),
+        height=600,
+        template='plotly_white',
+        updatemenus=[dict(
+            type='buttons',
+            showactive=False,
+            x=0.05, y=-0.05,
+            buttons=[
+                dict(label='▶', method='animate',
+                     args=[None, dict(frame=dict(duration=800, redraw=True), fromcurrent=True)]),
+                dict(label='⏸', method='animate',
+                     args=[[None], dict(frame=dict(duration=0, redraw=False), mode='immediate')])
+            ]
+        )],
+        sliders=[dict(
+            active=0,
+            y=-0.05, x=0.15, len=0.8,
+            steps=[
+                dict(label=MONTHS_FR[m], method='animate',
+                     args=[[MONTHS_FR[m]], dict(frame=dict(duration=0, redraw=True), mode='immediate')])
+                for m in mois_list
+            ]
+        )]
+    )
+    
+    return fig
+
+
+@profile()
 def create_speed_classes_chart(df, variable):
     """Graphique des classes de vitesse du vent"""
     if variable not in df.columns:
@@ -441,6 +608,7 @@ def create_speed_classes_chart(df, variable):
     return fig
 
 
+@profile()
 def create_moyennes_mobiles(df, variable, window=30):
     """Graphique avec moyennes mobiles du vent"""
     if 'date' not in df.columns or variable not in df.columns:
@@ -457,9 +625,10 @@ def create_moyennes_mobiles(df, variable, window=30):
     fig = go.Figure()
     
     # Données brutes (semi-transparentes)
-    fig.add_trace(go.Scatter(
-        x=df_daily['date'],
-        y=df_daily[variable],
+    fig.add_trace(line_trace(
+        df_daily['date'],
+        df_daily[variable],
+        method='minmax',
         mode='lines',
         name='Données quotidiennes',
         line=dict(color='lightgray', width=1),
@@ -467,27 +636,27 @@ def create_moyennes_mobiles(df, variable, window=30):
     ))
     
     # Moyenne mobile 7 jours
-    fig.add_trace(go.Scatter(
-        x=df_daily['date'],
-        y=df_daily['MA_7'],
+    fig.add_trace(line_trace(
+        df_daily['date'],
+        df_daily['MA_7'],
         mode='lines',
         name='Moyenne mobile 7 jours',
         line=dict(color='#3498db', width=2)
     ))
     
     # Moyenne mobile 30 jours
-    fig.add_trace(go.Scatter(
-        x=df_daily['date'],
-        y=df_daily['MA_30'],
+    fig.add_trace(line_trace(
+        df_daily['date'],
+        df_daily['MA_30'],
         mode='lines',
         name='Moyenne mobile 30 jours',
         line=dict(color='#e74c3c', width=2)
     ))
     
     # Moyenne mobile 365 jours
-    fig.add_trace(go.Scatter(
-        x=df_daily['date'],
-        y=df_daily['MA_365'],
+    fig.add_trace(line_trace(
+        df_daily['date'],
+        df_daily['MA_365'],
         mode='lines',
         name='Moyenne mobile 365 jours',
         line=dict(color='#2ecc71', width=3)
@@ -506,21 +675,24 @@ def create_moyennes_mobiles(df, variable, window=30):
     return fig
 
 
-def create_anomalies_chart(df, variable):
+@profile()
+def create_anomalies_chart(df, variable, normals=None):
     """Graphique des anomalies du vent"""
     if 'annee' not in df.columns or 'mois' not in df.columns or variable not in df.columns:
         return None
     
-    # Calculer moyenne historique par mois
-    moyenne_historique = df.groupby('mois')[variable].mean()
-    
-    # Calculer anomalies
-    df_anom = df.copy()
-    df_anom['moyenne_hist'] = df_anom['mois'].map(moyenne_historique)
-    df_anom['anomalie'] = df_anom[variable] - df_anom['moyenne_hist']
+    if normals is not None and variable in normals:
+        # Normales précalculées par station : soustraction vectorisée
+        anomalies = normals.anomalies(df, variable)
+        periode = f"{normals.periode[0]}-{normals.periode[1]}"
+    else:
+        # Repli : moyenne historique par mois sur les données chargées
+        moyenne_historique = df.groupby('mois')[variable].mean()
+        anomalies = df[variable] - df['mois'].map(moyenne_historique)
+        periode = None
     
     # Agréger par année
-    df_yearly_anom = df_anom.groupby('annee')['anomalie'].mean().reset_index()
+    df_yearly_anom = anomalies.groupby(df['annee']).mean().rename('anomalie').reset_index()
     
     # Couleurs selon signe
     colors = ['#e74c3c' if x > 0 else '#3498db' for x in df_yearly_anom['anomalie']]
@@ -534,10 +706,12 @@ def create_anomalies_chart(df, variable):
         )
     ])
     
+    reference = f"Normale {periode}" if periode else "Moyenne Historique"
+    
     fig.add_hline(y=0, line_dash="dash", line_color="black", line_width=2)
     
     fig.update_layout(
-        title=f'Anomalies par rapport à la Moyenne Historique - {COLUMN_DESCRIPTIONS.get(variable, variable)}',
+        title=f'Anomalies par rapport à la {reference} - {COLUMN_DESCRIPTIONS.get(variable, variable)}',
         xaxis_title='Année',
         yaxis_title=f'Anomalie ({UNITS.get(variable, "")})',
         height=500,
@@ -553,14 +727,17 @@ def calculate_statistics(df, variable):
     if variable not in df.columns:
         return None
     
+    # Médiane et quartiles en un seul appel
+    q1, mediane, q3 = percentiles(df[variable], [25, 50, 75])
+    
     stats = {
         'Moyenne': df[variable].mean(),
-        'Médiane': df[variable].median(),
+        'Médiane': mediane,
         'Écart-type': df[variable].std(),
         'Minimum': df[variable].min(),
         'Maximum': df[variable].max(),
-        'Q1 (25%)': df[variable].quantile(0.25),
-        'Q3 (75%)': df[variable].quantile(0.75),
+        'Q1 (25%)': q1,
+        'Q3 (75%)': q3,
         'Étendue': df[variable].max() - df[variable].min(),
         'Coefficient de variation': (df[variable].std() / df[variable].mean() * 100) if df[variable].mean() != 0 else 0
     }
@@ -783,7 +960,7 @@ def main():
         
         with col1:
             st.markdown("#### Anomalies")
-            fig_anom = create_anomalies_chart(df, variable_select)
+            fig_anom = create_anomalies_chart(df, variable_select, load_normals_cached())
             if fig_anom: 
                 st.plotly_chart(fig_anom, use_container_width=True)
         
@@ -826,12 +1003,49 @@ def main():
     with tab4:
         st.subheader("🧭 Rose des Vents")
         
-        # Chercher la colonne de direction
-        direction_cols = [col for col in df.columns if 'DXY' in col or 'DXI' in col or 'DG' in col]
+        # Chercher la colonne de direction (rafale max puis rafale instantanée)
+        direction_cols = [col for col in ['DXY', 'DXI', 'DXI3S'] if col in df.columns]
         
         if direction_cols and variable_select in df.columns:
             direction_col = direction_cols[0]
-            fig_rose = create_wind_rose(df, variable_select, direction_col)
+            rose_cube = load_wind_rose_cube_cached(variable_select, direction_col)
+            
+            opt_col1, opt_col2, opt_col3 = st.columns(3)
+            with opt_col1:
+                n_sectors = st.selectbox("Nombre de secteurs", options=[8, 16, 36], index=1)
+            with opt_col2:
+                calm_threshold = st.number_input(
+                    "Seuil de calme (m/s)",
+                    min_value=0.0, max_value=5.0, value=0.0, step=0.5
+                )
+            with opt_col3:
+                rose_par = st.radio(
+                    "Découpage",
+                    options=['Global', 'Par saison', 'Par station', 'Animation mensuelle'],
+                    horizontal=True
+                )
+            
+            if rose_par == 'Par saison':
+                fig_rose = create_wind_rose_by_group(
+                    df, variable_select, direction_col, 'saison', n_sectors, calm_threshold,
+                    cube=rose_cube
+                )
+            elif rose_par == 'Par station':
+                fig_rose = create_wind_rose_by_group(
+                    df, variable_select, direction_col, 'NOM_USUEL', n_sectors, calm_threshold,
+                    max_groups=9, cube=rose_cube
+                )
+            elif rose_par == 'Animation mensuelle':
+                if rose_cube is None or not rose_cube.matches(variable_select, direction_col,
+                                                              n_sectors, calm_threshold):
+                    # Paramètres différents de ceux de l'ingestion : cube à la volée
+                    rose_cube = build_wind_rose_cube(df, variable_select, direction_col,
+                                                     n_sectors=n_sectors, calm_threshold=calm_threshold)
+                fig_rose = create_wind_rose_animation(df, rose_cube)
+            else:
+                fig_rose = create_wind_rose(df, variable_select, direction_col, n_sectors, calm_threshold,
+                                            cube=rose_cube)
+            
             if fig_rose:
                 st.plotly_chart(fig_rose, use_container_width=True)
                 st.info(f"""
@@ -852,13 +1066,11 @@ def main():
         
         with col1:
             # Histogramme
-            fig_hist = px.histogram(
-                df.dropna(subset=[variable_select]),
-                x=variable_select,
-                nbins=50,
+            counts, edges = histogram(df[variable_select])
+            fig_hist = histogram_figure(
+                counts, edges,
                 title=f'Distribution - {COLUMN_DESCRIPTIONS.get(variable_select, variable_select)}',
-                labels={variable_select: f'{COLUMN_DESCRIPTIONS.get(variable_select, variable_select)} ({UNITS.get(variable_select, "")})'},
-                color_discrete_sequence=['#3498db']
+                xaxis_title=f'{COLUMN_DESCRIPTIONS.get(variable_select, variable_select)} ({UNITS.get(variable_select, "")})'
             )
             fig_hist.update_layout(height=400, showlegend=False)
             st.plotly_chart(fig_hist, use_container_width=True)
@@ -898,10 +1110,10 @@ def main():
         with subtab1:
             st.markdown("#### Lissage par Moyennes Mobiles")
             
-            # Limiter les données pour performance
+            # Limiter les données pour performance : même nombre de lignes chaque jour
             if len(df) > 50000:
-                st.warning(f"⚠️ Trop de données ({len(df):,}).Échantillonnage aléatoire de 50,000 points.")
-                df_sample = df.sample(50000, random_state=42)
+                st.warning(f"⚠️ Trop de données ({len(df):,}). Échantillonnage stratifié par jour de 50,000 points.")
+                df_sample = sample_data_for_viz(df, 50000, 'stratified', by='date', allocation='equal')
             else:
                 df_sample = df
 
@@ -969,12 +1181,11 @@ def main():
             
             with col1:
                 # Export données filtrées
-                csv_data = df.to_csv(index=False, sep=';').encode('utf-8')
-                st.download_button(
-                    label="📥 Télécharger données brutes (CSV)",
-                    data=csv_data,
-                    file_name=f"vent_analyse_{periode_affichage}.csv",
-                    mime="text/csv"
+                download_export(
+                    df,
+                    f"vent_analyse_{periode_affichage}",
+                    label="📥 Télécharger données brutes",
+                    key="export_donnees"
                 )
             
             with col2:
@@ -998,4 +1209,6 @@ def main():
     """)
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    with profile("page Analyse du Vent"):
+        main()
+    display_profiling_panel("Analyse du Vent")
\ No newline at end of file
@@ -16,9 +16,14 @@ import sys
 from pathlib import Path
 sys.path.append(str(Path(__file__).parent.parent))
 
-from utils.data_loader import load_data
+from utils.data_loader import load_data, query_data, download_export
 from utils.preprocessing import filter_by_altitude
-from utils.constants import COLUMN_DESCRIPTIONS, UNITS, MONTHS_FR
+from utils.constants import COLUMN_DESCRIPTIONS, UNITS, MONTHS_FR, METEO_FILE
+from core.fingerprint import file_fingerprint
+from core.profiling import profile
+from core.quantiles import box_stats
+from components.charts import box_figure
+from utils.performance import display_profiling_panel
 from utils.styles import get_page_style
 from utils.loading import display_chart
 
@@ -35,15 +40,19 @@ st.markdown(get_page_style(), unsafe_allow_html=True)
 
 # ==================== CACHE SESSION ====================
 
-@st.cache_data(ttl=3600)
 def load_data_optimized(years=None, stations=None):
-    """Charge les données optimisées pour cette page"""
+    """Charge les données optimisées pour cette page (invalidées si le fichier change)"""
+    return _load_data_optimized(file_fingerprint(METEO_FILE), years, stations)
+
+
+@st.cache_data(max_entries=8)
+def _load_data_optimized(fingerprint, years=None, stations=None):
     # Charger seulement les colonnes nécessaires
     essential_cols = ['NUM_POSTE', 'NOM_USUEL', 'LAT', 'LON', 'ALTI', 'AAAAMMJJ',
                      'TN', 'TX', 'TM', 'RR', 'FFM', 'FXY', 'DXY']
     
     with st.spinner('⏳ Chargement optimisé...'):
-        df = load_data("data/raw/meteo_sample.parquet", columns=essential_cols, years=years)
+        df = load_data(METEO_FILE, columns=essential_cols, years=years)
         
         # Filtrer par stations si spécifié
         if stations:
@@ -51,6 +60,28 @@ def load_data_optimized(years=None, stations=None):
         
         return df
 
+def station_aggregates(agg_functions, years, stations):
+    """
+    Agrégats par station calculés dans le scanner, sans les lignes quotidiennes
+    
+    Args:
+        agg_functions: {colonne: agrégation} (mean, sum, min, max, count, std, first)
+        years: Années retenues
+        stations: Noms de stations (NOM_USUEL) retenus
+        
+    Returns:
+        DataFrame d'une ligne par station
+    """
+    return _station_aggregates(file_fingerprint(METEO_FILE), agg_functions, list(years), list(stations))
+
+
+@st.cache_data(max_entries=16)
+def _station_aggregates(fingerprint, agg_functions, years, stations):
+    query = query_data(METEO_FILE)
+    if query is None:
+        return pd.DataFrame()
+    return query.aggregate('NOM_USUEL', agg_functions, years=years, names=stations)
+
 # ==================== STATIONS PACA ====================
 
 STATIONS_PACA = [
@@ -85,6 +116,7 @@ STATIONS_PACA = [
 
 # ==================== FONCTIONS DE VISUALISATION ====================
 
+@profile()
 def create_comparison_stations_line(df, stations, variable, periode_affichage):
     """Comparaison des stations par ligne (OPTIMISÉ)"""
     if variable not in df.columns or 'annee' not in df.columns:
@@ -128,6 +160,7 @@ def create_comparison_stations_line(df, stations, variable, periode_affichage):
     return fig
 
 
+@profile()
 def create_comparison_stations_bar(df, stations, variable):
     """Comparaison des stations par barres (moyenne globale)"""
     if variable not in df.columns:
@@ -155,24 +188,24 @@ def create_comparison_stations_bar(df, stations, variable):
     return fig
 
 
+@profile()
 def create_comparison_boxplot(df, stations, variable):
     """Comparaison des distributions par station (boxplot)"""
     if variable not in df.columns:
         return None
     
-    df_filtered = df[df['NOM_USUEL'].isin(stations)].copy()
+    selected = df['NOM_USUEL'].isin(stations)
     
-    fig = px.box(
-        df_filtered,
-        x='NOM_USUEL',
-        y=variable,
+    # Quartiles et moustaches par station calculés ici, une boîte par station
+    stats, outliers = box_stats(df.loc[selected, variable], df.loc[selected, 'NOM_USUEL'].astype(str))
+    
+    fig = box_figure(
+        stats,
+        outliers,
+        colors=px.colors.qualitative.Set2,
         title=f'Distribution par Station - {COLUMN_DESCRIPTIONS.get(variable, variable)}',
-        labels={
-            'NOM_USUEL': 'Station',
-            variable: f'{COLUMN_DESCRIPTIONS.get(variable, variable)} ({UNITS.get(variable, "")})'
-        },
-        color='NOM_USUEL',
-        color_discrete_sequence=px.colors.qualitative.Set2
+        xaxis_title='Station',
+        yaxis_title=f'{COLUMN_DESCRIPTIONS.get(variable, variable)} ({UNITS.get(variable, "")})'
     )
     
     fig.update_xaxes(tickangle=45)
@@ -181,6 +214,7 @@ def create_comparison_boxplot(df, stations, variable):
     return fig
 
 
+@profile()
 def create_scatter_altitude_vs_variable(df, stations, variable):
     """Graphique:  altitude vs variable"""
     if variable not in df.columns or 'ALTI' not in df.columns:
@@ -219,6 +253,7 @@ def create_scatter_altitude_vs_variable(df, stations, variable):
     return fig
 
 
+@profile()
 def create_heatmap_stations_months(df, stations, variable):
     """Heatmap:  stations x mois"""
     if variable not in df.columns or 'mois' not in df.columns:
@@ -249,6 +284,7 @@ def create_heatmap_stations_months(df, stations, variable):
     return fig
 
 
+@profile()
 def create_multi_variables_comparison(df, stations, variables, periode_affichage):
     """Comparaison de plusieurs variables pour une station"""
     if not stations or not variables:
@@ -305,6 +341,7 @@ def create_multi_variables_comparison(df, stations, variables, periode_affichage
     return fig
 
 
+@profile()
 def create_radar_stations(df, stations, variable):
     """Graphique radar:  comparaison par mois"""
     if variable not in df.columns or 'mois' not in df.columns:
@@ -342,6 +379,7 @@ def create_radar_stations(df, stations, variable):
     return fig
 
 
+@profile()
 def create_latitude_longitude_map(df, stations, variable):
     """Carte géographique avec couleurs selon la variable"""
     if variable not in df.columns or 'LAT' not in df.columns or 'LON' not in df.columns:
@@ -369,6 +407,7 @@ def create_latitude_longitude_map(df, stations, variable):
     return fig
 
 
+@profile()
 def create_latitude_vs_variable(df, stations, variable):
     """Graphique: latitude vs variable"""
     if variable not in df.columns or 'LAT' not in df.columns:
@@ -407,6 +446,7 @@ def create_latitude_vs_variable(df, stations, variable):
     return fig
 
 
+@profile()
 def create_longitude_vs_variable(df, stations, variable):
     """Graphique: longitude vs variable"""
     if variable not in df.columns or 'LON' not in df.columns:
@@ -538,9 +578,11 @@ def main():
                 )
             
             periode_affichage = f"{annee_debut}-{annee_fin}"
+            annees_selection = list(range(annee_debut, annee_fin + 1))
             df = df_full[(df_full['annee'] >= annee_debut) & (df_full['annee'] <= annee_fin)].copy()
         else:
             periode_affichage = f"{annee_min}-{annee_max}"
+            annees_selection = list(range(annee_min, annee_max + 1))
             df = df_full.copy()
     
     with filter_col2:
@@ -702,11 +744,11 @@ def main():
         with col2:
             st.markdown("#### Infos Géographiques")
             
-            df_geo = df.groupby('NOM_USUEL').agg({
+            df_geo = station_aggregates({
                 'LAT':  'first',
                 'LON': 'first',
                 'ALTI': 'first'
-            }).reset_index()
+            }, annees_selection, stations_select)
             
             st.dataframe(
                 df_geo.style.format({
@@ -746,12 +788,12 @@ def main():
         # Calculer les corrélations
         st.markdown("#### 📊 Corrélations")
         
-        df_corr = df.groupby('NOM_USUEL').agg({
+        df_corr = station_aggregates({
             'LAT': 'first',
             'LON': 'first',
             'ALTI': 'first',
             variable_select: 'mean'
-        }).reset_index()
+        }, annees_selection, stations_select)
         
         if len(df_corr) > 2:
             corr_lat = df_corr[['LAT', variable_select]].corr().iloc[0, 1]
@@ -819,12 +861,11 @@ def main():
         
         with col1:
             # Export données filtrées
-            csv_data = df.to_csv(index=False, sep=';').encode('utf-8')
-            st.download_button(
-                label="📥 Données brutes (CSV)",
-                data=csv_data,
-                file_name=f"comparaison_geo_{periode_affichage}.csv",
-                mime="text/csv"
+            download_export(
+                df,
+                f"comparaison_geo_{periode_affichage}",
+                label="📥 Données brutes",
+                key="export_donnees"
             )
         
         with col2:
@@ -847,4 +888,6 @@ def main():
     """)
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    with profile("page Comparaisons Géographiques"):
+        main()
+    display_profiling_panel("Comparaisons Géographiques")
\ No newline at end of file
@@ -16,8 +16,13 @@ import sys
 from pathlib import Path
 sys.path.append(str(Path(__file__).parent.parent))
 
-from utils.data_loader import load_data
-from utils.constants import COLUMN_DESCRIPTIONS, UNITS
+from utils.data_loader import load_data, load_quantile_cube, download_export
+from utils.constants import COLUMN_DESCRIPTIONS, UNITS, METEO_FILE
+from core.fingerprint import file_fingerprint, dataset_fingerprint
+from core.classification import compile_thresholds, classify, at_least
+from core.quantiles import DEFAULT_PERCENTILES, QUANTILE_CUBE_VARIABLES, percentiles, quantile_cube_path
+from core.profiling import profile
+from utils.performance import display_profiling_panel
 from utils.styles import get_page_style
 from utils.loading import display_chart
 
@@ -34,11 +39,37 @@ st.markdown(get_page_style(), unsafe_allow_html=True)
 
 # ==================== CACHE SESSION ====================
 
-@st.cache_resource
-def load_data_cached():
-    """Charge les données une seule fois et les met en cache"""
+# Colonnes utilisées par la page : seules celles-ci sont lues (core.columns)
+COLUMNS = ['TN', 'TX', 'TM', 'RR', 'FFM', 'FXY', 'FWI', 'date']
+
+
+@st.cache_resource(max_entries=1)
+def _load_data_version(fingerprint, columns):
+    """
+    Charge les données une seule fois par version du fichier
+
+    Les colonnes font partie de la clé : les pages partagent ce cache
+    (même fonction, même code) mais n'en déclarent pas les mêmes.
+    """
     with st.spinner('⏳ Chargement des données...'):
-        return load_data("data/raw/meteo_sample.parquet")
+        return load_data(METEO_FILE, columns=list(columns))
+
+
+def load_data_cached():
+    """Données en cache, invalidées uniquement quand le fichier change"""
+    return _load_data_version(file_fingerprint(METEO_FILE), tuple(COLUMNS))
+
+
+@st.cache_resource(max_entries=len(QUANTILE_CUBE_VARIABLES))
+def _load_quantile_cube_version(variable, fingerprint):
+    return load_quantile_cube(load_data_cached(), variable)
+
+
+def load_quantile_cube_cached(variable):
+    """Cube station × mois des croquis de quantiles (None si la variable n'en a pas)"""
+    if variable not in QUANTILE_CUBE_VARIABLES:
+        return None
+    return _load_quantile_cube_version(variable, dataset_fingerprint(METEO_FILE, quantile_cube_path(variable)))
 
 # ==================== DÉFINITION DES SEUILS ====================
 
@@ -68,9 +99,17 @@ THRESHOLDS = {
         'tempête_violente': 25.0,  # 90 km/h
         'tempête':  17.5,  # 63 km/h
         'coup_de_vent': 10.8  # 39 km/h
+    },
+    'FWI': {  # Classes de danger EFFIS (core.fwi.FWI_CLASSES)
+        'danger_extrême': 50.0,
+        'danger_très_élevé': 38.0,
+        'danger_élevé': 21.3
     }
 }
 
+# Variables dont les valeurs basses sont les plus extrêmes (≤ seuil)
+DESCENDING_VARIABLES = ['TN']
+
 COLORS_EXTREMES = {
     'extrême':  '#8B0000',
     'très_grave': '#DC143C',
@@ -81,49 +120,12 @@ COLORS_EXTREMES = {
 
 # ==================== FONCTIONS DE DÉTECTION ====================
 
-def classify_value(value, variable):
-    """Classifie une valeur selon les seuils extrêmes"""
-    if pd.isna(value) or variable not in THRESHOLDS: 
-        return 'normal', 'gray'
-    
-    thresholds = THRESHOLDS[variable]
-    
-    if variable in ['TX', 'FFM', 'FXY']: 
-        # Croissant (plus haute = plus extrême)
-        if value >= thresholds.get('extrême_chaud', thresholds.get('tempête_violente', float('inf'))):
-            return 'extrême', COLORS_EXTREMES['extrême']
-        elif value >= thresholds.get('très_chaud', thresholds.get('tempête', float('inf'))):
-            return 'très_grave', COLORS_EXTREMES['très_grave']
-        elif value >= thresholds.get('coup_de_vent', float('inf')):
-            return 'grave', COLORS_EXTREMES['grave']
-        else:
-            return 'normal', COLORS_EXTREMES['normal']
-    
-    elif variable == 'TN':
-        # Décroissant (plus basse = plus extrême)
-        if value <= thresholds.get('extrême_froid', float('-inf')):
-            return 'extrême', COLORS_EXTREMES['extrême']
-        elif value <= thresholds.get('très_froid', float('-inf')):
-            return 'très_grave', COLORS_EXTREMES['très_grave']
-        elif value <= thresholds.get('gel', float('-inf')):
-            return 'grave', COLORS_EXTREMES['grave']
-        else:
-            return 'normal', COLORS_EXTREMES['normal']
-    
-    elif variable == 'RR':
-        # Croissant (plus pluie = plus extrême)
-        if value >= thresholds.get('déluge', float('inf')):
-            return 'extrême', COLORS_EXTREMES['extrême']
-        elif value >= thresholds.get('forte_pluie', float('inf')):
-            return 'très_grave', COLORS_EXTREMES['très_grave']
-        elif value >= thresholds.get('pluie', float('inf')):
-            return 'grave', COLORS_EXTREMES['grave']
-        elif value >= thresholds.get('averse', 0):
-            return 'modéré', COLORS_EXTREMES['modéré']
-        else:
-            return 'normal', COLORS_EXTREMES['normal']
-    
-    return 'normal', COLORS_EXTREMES['normal']
+def classify_extremes(values, variable):
+    """Classifie une colonne selon les seuils extrêmes (labels catégoriels et couleurs)"""
+    bins = None
+    if variable in THRESHOLDS:
+        bins = compile_thresholds(THRESHOLDS[variable], descending=variable in DESCENDING_VARIABLES)
+    return classify(values, bins, COLORS_EXTREMES)
 
 
 def detect_extreme_events(df, variable, threshold_level='extrême'):
@@ -131,45 +133,23 @@ def detect_extreme_events(df, variable, threshold_level='extrême'):
     if variable not in THRESHOLDS or variable not in df.columns:
         return pd.DataFrame()
     
-    thresholds = THRESHOLDS[variable]
-    
-    # Définir le seuil selon le niveau
-    if threshold_level == 'extrême':
-        if variable in ['TX', 'FFM', 'FXY']: 
-            seuil = thresholds.get('extrême_chaud', thresholds.get('tempête_violente', float('inf')))
-            df_events = df[df[variable] >= seuil].copy()
-        elif variable == 'TN':
-            seuil = thresholds.get('extrême_froid', float('-inf'))
-            df_events = df[df[variable] <= seuil].copy()
-        else:
-            seuil = thresholds.get('déluge', float('inf'))
-            df_events = df[df[variable] >= seuil].copy()
-    
-    elif threshold_level == 'très_grave':
-        if variable in ['TX', 'FFM', 'FXY']: 
-            seuil = thresholds.get('très_chaud', thresholds.get('tempête', float('inf')))
-            df_events = df[df[variable] >= seuil].copy()
-        elif variable == 'TN': 
-            seuil = thresholds.get('très_froid', float('-inf'))
-            df_events = df[df[variable] <= seuil].copy()
-        else:
-            seuil = thresholds.get('forte_pluie', float('inf'))
-            df_events = df[df[variable] >= seuil].copy()
-    
-    else: 
+    if threshold_level not in ('extrême', 'très_grave'):
         return pd.DataFrame()
     
-    if df_events.empty:
+    # Classification de toute la colonne, puis sélection par niveau
+    labels, _ = classify_extremes(df[variable], variable)
+    selected = at_least(labels, threshold_level)
+    
+    if not selected.any():
         return pd.DataFrame()
     
-    # Ajouter la classification
-    df_events['classification'] = df_events[variable].apply(
-        lambda x: classify_value(x, variable)[0]
-    )
+    df_events = df[selected].copy()
+    df_events['classification'] = labels[selected]
     
     return df_events.sort_values(variable, ascending=False)
 
 
+@profile()
 def create_heatwave_analysis(df):
     """Analyse les vagues de chaleur (TX > 30°C pendant 3+ jours)"""
     if 'TX' not in df.columns or 'date' not in df.columns:
@@ -220,6 +200,7 @@ def create_heatwave_analysis(df):
     return df_heatwaves, fig
 
 
+@profile()
 def create_cold_snap_analysis(df):
     """Analyse les vagues de froid (TN < 0°C pendant 3+ jours)"""
     if 'TN' not in df.columns or 'date' not in df.columns:
@@ -267,6 +248,7 @@ def create_cold_snap_analysis(df):
     return df_coldsnaps, fig
 
 
+@profile()
 def create_extreme_timeline(df, variable):
     """Chronologie des événements extrêmes"""
     if variable not in df.columns or 'date' not in df.columns:
@@ -292,12 +274,7 @@ def create_extreme_timeline(df, variable):
             variable: f'{COLUMN_DESCRIPTIONS.get(variable, variable)} ({UNITS.get(variable, "")})',
             'classification': 'Classification'
         },
-        color_discrete_map={
-            'extrême':  COLORS_EXTREMES['extrême'],
-            'très_grave': COLORS_EXTREMES['très_grave'],
-            'grave': COLORS_EXTREMES['grave'],
-            'normal': COLORS_EXTREMES['normal']
-        },
+        color_discrete_map=COLORS_EXTREMES,
         size_max=12
     )
     
@@ -306,31 +283,23 @@ def create_extreme_timeline(df, variable):
     return fig
 
 
+@profile()
 def create_frequency_analysis(df, variable, year_range=None):
     """Analyse la fréquence des événements extrêmes par année"""
     if variable not in df.columns or 'date' not in df.columns:
         return None
     
-    df_sorted = df.sort_values('date').copy()
-    df_sorted['annee'] = df_sorted['date'].dt.year
-    
-    # Compter les événements extrêmes par année
-    events_by_year = []
-    
-    for year in sorted(df_sorted['annee'].unique()):
-        df_year = df_sorted[df_sorted['annee'] == year]
-        
-        df_extrême = detect_extreme_events(df_year, variable, 'extrême')
-        df_très_grave = detect_extreme_events(df_year, variable, 'très_grave')
-        
-        events_by_year.append({
-            'année': year,
-            'Extrêmes': len(df_extrême),
-            'Très graves': len(df_très_grave),
-            'Total': len(df_extrême) + len(df_très_grave)
-        })
-    
-    df_freq = pd.DataFrame(events_by_year)
+    if variable not in THRESHOLDS:
+        df_freq = pd.DataFrame()
+    else:
+        # Compter les événements extrêmes par année (une seule classification)
+        labels, _ = classify_extremes(df[variable], variable)
+        counts = pd.DataFrame({
+            'Extrêmes': at_least(labels, 'extrême'),
+            'Très graves': at_least(labels, 'très_grave')
+        }, index=df.index).groupby(df['date'].dt.year.rename('année')).sum()
+        counts['Total'] = counts['Extrêmes'] + counts['Très graves']
+        df_freq = counts.reset_index()
     
     if df_freq.empty:
         return None
@@ -367,6 +336,7 @@ def create_frequency_analysis(df, variable, year_range=None):
     return fig
 
 
+@profile()
 def create_extremes_map(df, variable):
     """Localisation des événements extrêmes"""
     if variable not in df.columns:
@@ -408,22 +378,23 @@ def create_extremes_map(df, variable):
     return fig
 
 
-def create_percentile_analysis(df, variable):
+@profile()
+def create_percentile_analysis(df, variable, cube=None):
     """Analyse par percentiles"""
-    if variable not in df.columns:
+    if variable not in df.columns or df[variable].isna().all():
         return None
     
-    df_valid = df.dropna(subset=[variable])
-    
-    if df_valid.empty:
-        return None
-    
-    percentiles = [1, 5, 10, 25, 50, 75, 90, 95, 99]
-    values = [df_valid[variable].quantile(p/100) for p in percentiles]
+    if cube is not None and cube.matches(variable):
+        # Fusion des croquis station × mois de la sélection
+        values = cube.percentiles(DEFAULT_PERCENTILES, stations=df['NUM_POSTE'].unique(),
+                                  years=df['annee'].unique()).to_numpy()
+    else:
+        # Tous les centiles en un seul appel
+        values = percentiles(df[variable], DEFAULT_PERCENTILES).to_numpy()
     
     fig = go.Figure(data=[
         go.Bar(
-            x=[f'{p}e' for p in percentiles],
+            x=[f'{p}e' for p in DEFAULT_PERCENTILES],
             y=values,
             marker=dict(
                 color=values,
@@ -488,7 +459,8 @@ def main():
         
         event_type = st.radio(
             "Choisir",
-            options=['Vagues de Chaleur', 'Vagues de Froid', 'Tempêtes', 'Précipitations Extrêmes', 'Tous les Extrêmes'],
+            options=['Vagues de Chaleur', 'Vagues de Froid', 'Tempêtes', 'Précipitations Extrêmes',
+                     'Danger Météo Feu', 'Tous les Extrêmes'],
             horizontal=False
         )
     
@@ -622,6 +594,31 @@ def main():
         if fig3:
             st.plotly_chart(fig3, use_container_width=True)
     
+    elif event_type == 'Danger Météo Feu':
+        st.subheader("🔥 Danger Météorologique d'Incendie (IFM)")
+        st.info("Indice Forêt Météo canadien calculé depuis TX, RR, FFM et l'humidité (estimée depuis TN/TX "
+                "si absente) | Très élevé: IFM ≥ 38 | Extrême: IFM ≥ 50")
+        
+        col1, col2 = st.columns(2)
+        
+        with col1:
+            fig1 = create_extreme_timeline(df_filtered, 'FWI')
+            if fig1:
+                st.plotly_chart(fig1, use_container_width=True)
+            
+            fig2 = create_percentile_analysis(df_filtered, 'FWI')
+            if fig2:
+                st.plotly_chart(fig2, use_container_width=True)
+        
+        with col2:
+            fig3 = create_frequency_analysis(df_filtered, 'FWI')
+            if fig3:
+                st.plotly_chart(fig3, use_container_width=True)
+            
+            fig4 = create_extremes_map(df_filtered, 'FWI')
+            if fig4:
+                st.plotly_chart(fig4, use_container_width=True)
+    
     else:  # Tous les extrêmes
         st.subheader("📊 Vue d'Ensemble - Tous les Extrêmes")
         
@@ -634,7 +631,7 @@ def main():
         
         with tab1:
             fig_heat_freq = create_frequency_analysis(df_filtered, 'TX')
-            fig_heat_perc = create_percentile_analysis(df_filtered, 'TX')
+            fig_heat_perc = create_percentile_analysis(df_filtered, 'TX', load_quantile_cube_cached('TX'))
             
             if fig_heat_freq: 
                 st.plotly_chart(fig_heat_freq, use_container_width=True)
@@ -643,7 +640,7 @@ def main():
         
         with tab2:
             fig_cold_freq = create_frequency_analysis(df_filtered, 'TN')
-            fig_cold_perc = create_percentile_analysis(df_filtered, 'TN')
+            fig_cold_perc = create_percentile_analysis(df_filtered, 'TN', load_quantile_cube_cached('TN'))
             
             if fig_cold_freq:
                 st.plotly_chart(fig_cold_freq, use_container_width=True)
@@ -652,7 +649,7 @@ def main():
         
         with tab3:
             fig_wind_freq = create_frequency_analysis(df_filtered, 'FFM')
-            fig_wind_perc = create_percentile_analysis(df_filtered, 'FFM')
+            fig_wind_perc = create_percentile_analysis(df_filtered, 'FFM', load_quantile_cube_cached('FFM'))
             
             if fig_wind_freq:
                 st.plotly_chart(fig_wind_freq, use_container_width=True)
@@ -661,7 +658,7 @@ def main():
         
         with tab4:
             fig_rain_freq = create_frequency_analysis(df_filtered, 'RR')
-            fig_rain_perc = create_percentile_analysis(df_filtered, 'RR')
+            fig_rain_perc = create_percentile_analysis(df_filtered, 'RR', load_quantile_cube_cached('RR'))
             
             if fig_rain_freq:
                 st.plotly_chart(fig_rain_freq, use_container_width=True)
@@ -675,7 +672,7 @@ def main():
         
         var_select = st.selectbox(
             "Variable à afficher",
-            options=['TN', 'TX', 'RR', 'FFM', 'FXY']
+            options=['TN', 'TX', 'RR', 'FFM', 'FXY', 'FWI']
         )
         
         df_display = detect_extreme_events(df_filtered, var_select, 'très_grave')
@@ -690,13 +687,7 @@ def main():
                 height=400
             )
             
-            csv = df_display[cols].to_csv(index=False, sep=';').encode('utf-8')
-            st.download_button(
-                "📥 Télécharger",
-                csv,
-                f"extremes_{var_select}.csv",
-                "text/csv"
-            )
+            download_export(df_display, f"extremes_{var_select}", columns=cols, key="export_extremes")
         else:
             st.info("Aucun événement extrême trouvé")
     
@@ -710,4 +701,6 @@ def main():
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    with profile("page Événements Extrêmes"):
+        main()
+    display_profiling_panel("Événements Extrêmes")
\ No newline at end of file
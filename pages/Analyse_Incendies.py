@@ -21,7 +21,17 @@ warnings.filterwarnings('ignore')
 
 # Import du style personnalisé
 sys.path.append(str(Path(__file__).parent.parent))
+from core.profiling import profile
+from utils.performance import display_profiling_panel
 from utils.styles import get_page_style
+from utils.constants import INCENDIES_FILE, SHAPEFILES_INCENDIES, METEO_FILE, SHORT_NAMES
+from utils.data_loader import load_data
+from core.fingerprint import file_fingerprint, dataset_fingerprint
+from core.fire_join import (
+    FIRE_WEATHER_VARIABLES, commune_centroids, station_locations,
+    commune_station_map, join_fire_weather, fire_weather_correlation
+)
+from core.fwi import FWI_CLASSES, fwi_class
 from utils.loading import display_chart, display_map
 
 # ==================== CONFIGURATION PAGE ====================
@@ -37,31 +47,98 @@ st.markdown(get_page_style(), unsafe_allow_html=True)
 
 # ==================== CACHE SESSION ====================
 
-@st.cache_resource
-def load_shapefiles():
+# Shapefiles et tables attributaires (.dbf) surveillés pour l'invalidation
+SHAPEFILE_SOURCES = [
+    path
+    for shp in SHAPEFILES_INCENDIES.values()
+    for path in (shp, shp[:-4] + '.dbf')
+]
+
+
+@st.cache_resource(max_entries=1)
+def _load_shapefiles_version(fingerprint):
     """Charge les fichiers shapefiles"""
     try:
         with st.spinner('⏳ Chargement des cartes...'):
-            gdf_13 = gpd.read_file("data/raw/dep_13/communes_13_with_data_for_carte_danger_incendie.shp")
-            gdf_05 = gpd.read_file("data/raw/dep_05/communes_05_with_data_for_carte_danger_incendie.shp")
+            gdf_13 = gpd.read_file(SHAPEFILES_INCENDIES['13'])
+            gdf_05 = gpd.read_file(SHAPEFILES_INCENDIES['05'])
         return gdf_13, gdf_05
     except Exception as e:  
         st.error(f"Erreur lors du chargement des shapefiles: {e}")
         return None, None
 
 
-@st.cache_resource
-def load_incendies_parquet():
+def load_shapefiles():
+    """Shapefiles en cache, invalidés uniquement quand les fichiers changent"""
+    return _load_shapefiles_version(dataset_fingerprint(*SHAPEFILE_SOURCES))
+
+
+@st.cache_resource(max_entries=1)
+def _load_incendies_version(fingerprint):
     """Charge le fichier Parquet d'incendies"""
     try:
         with st.spinner('⏳ Chargement des données incendies...'):
-            df = pd.read_parquet("data/raw/incendies_sample.parquet")
+            df = pd.read_parquet(INCENDIES_FILE)
         return df
         
     except Exception as e:  
         st.error(f"❌ Erreur lors du chargement du fichier:  {e}")
         return None
 
+
+def load_incendies_parquet():
+    """Incendies en cache, invalidés uniquement quand le fichier change"""
+    return _load_incendies_version(file_fingerprint(INCENDIES_FILE))
+
+
+@st.cache_resource(max_entries=1)
+def _prepared_geodata_version(fingerprint):
+    gdf_13, gdf_05 = load_shapefiles()
+    return prepare_geodata(gdf_13, gdf_05)
+
+
+def load_geodata():
+    """Communes préparées (risque feu), recalculées seulement si les shapefiles changent"""
+    return _prepared_geodata_version(dataset_fingerprint(*SHAPEFILE_SOURCES))
+
+
+@st.cache_resource(max_entries=1)
+def _prepared_incendies_version(fingerprint):
+    return prepare_incendies(load_incendies_parquet())
+
+
+def load_incendies():
+    """Incendies préparés, recalculés seulement si le fichier change"""
+    return _prepared_incendies_version(file_fingerprint(INCENDIES_FILE))
+
+
+# Colonnes météo jointes aux feux (table commune, voir core.columns)
+COLUMNS = FIRE_WEATHER_VARIABLES + ['date']
+
+
+@st.cache_resource(max_entries=1)
+def _fire_weather_version(fingerprint):
+    """Joint à chaque feu la météo du jour à la station la plus proche"""
+    try:
+        with st.spinner('⏳ Jointure incendies × météo...'):
+            gdf_13, gdf_05 = load_shapefiles()
+            incendies_df = load_incendies()
+            if gdf_13 is None or gdf_05 is None or incendies_df is None:
+                return None
+
+            meteo = load_data(METEO_FILE, columns=COLUMNS)
+            centroids = pd.concat([commune_centroids(gdf_13), commune_centroids(gdf_05)], ignore_index=True)
+            mapping = commune_station_map(centroids, station_locations(meteo))
+            return join_fire_weather(incendies_df, meteo, mapping)
+    except Exception as e:
+        st.error(f"❌ Erreur jointure incendies × météo: {e}")
+        return None
+
+
+def load_fire_weather():
+    """Feux et météo du jour, recalculés seulement si une des sources change"""
+    return _fire_weather_version(dataset_fingerprint(METEO_FILE, INCENDIES_FILE, *SHAPEFILE_SOURCES))
+
 # ==================== FONCTIONS DE TRAITEMENT ====================
 
 def prepare_geodata(gdf_13, gdf_05):
@@ -146,6 +223,7 @@ def prepare_incendies(df):
 
 # ==================== GRAPHIQUES INCENDIES ====================
 
+@profile()
 def create_fires_by_year(incendies_df):
     """Nombre de feux par année"""
     
@@ -178,6 +256,7 @@ def create_fires_by_year(incendies_df):
         return None
 
 
+@profile()
 def create_fires_by_month(incendies_df):
     """Nombre de feux par mois"""
     
@@ -214,6 +293,7 @@ def create_fires_by_month(incendies_df):
         return None
 
 
+@profile()
 def create_fires_by_month_pie(incendies_df):
     """Répartition mensuelle"""
     
@@ -247,6 +327,7 @@ def create_fires_by_month_pie(incendies_df):
         return None
 
 
+@profile()
 def create_affected_area_by_year(incendies_df):
     """Surface affectée par année"""
     
@@ -280,6 +361,7 @@ def create_affected_area_by_year(incendies_df):
         return None
 
 
+@profile()
 def create_combined_fires_analysis(incendies_df):
     """Analyse combinée"""
     
@@ -343,6 +425,94 @@ def create_combined_fires_analysis(incendies_df):
         return None
 
 
+# ==================== GRAPHIQUES MÉTÉO DES FEUX ====================
+
+@profile()
+def create_fires_by_fwi_class(fire_weather):
+    """Nombre de feux et surface moyenne par classe de danger IFM du jour"""
+    if fire_weather is None or 'FWI' not in fire_weather.columns:
+        return None
+    
+    df = fire_weather[fire_weather['FWI'].notna()]
+    if df.empty:
+        return None
+    
+    classes = pd.Series(fwi_class(df['FWI']), index=df.index, name='classe')
+    by_class = df.groupby(classes, observed=False).agg(
+        nb_feux=('FWI', 'size'),
+        surface_moyenne=('surf_ha', 'mean')
+    ).reindex(list(FWI_CLASSES)).reset_index()
+    
+    fig = make_subplots(specs=[[{"secondary_y": True}]])
+    
+    fig.add_trace(
+        go.Bar(
+            x=by_class['classe'],
+            y=by_class['nb_feux'],
+            name='Nombre de feux',
+            marker_color=['#2ecc71', '#f1c40f', '#f39c12', '#e67e22', '#e74c3c', '#8e44ad']
+        ),
+        secondary_y=False
+    )
+    
+    fig.add_trace(
+        go.Scatter(
+            x=by_class['classe'],
+            y=by_class['surface_moyenne'],
+            name='Surface moyenne (ha)',
+            mode='lines+markers',
+            line=dict(color='#2c3e50', width=3)
+        ),
+        secondary_y=True
+    )
+    
+    fig.update_layout(
+        title="Feux par Classe de Danger IFM du Jour",
+        height=450,
+        template='plotly_white',
+        hovermode='x unified'
+    )
+    fig.update_yaxes(title_text="Nombre de feux", secondary_y=False)
+    fig.update_yaxes(title_text="Surface moyenne (ha)", secondary_y=True)
+    
+    return fig
+
+
+@profile()
+def create_fire_weather_correlation(fire_weather):
+    """Matrice de corrélation (Spearman) entre météo du jour et surface brûlée"""
+    if fire_weather is None:
+        return None
+    
+    df = fire_weather[fire_weather['TX'].notna()] if 'TX' in fire_weather.columns else fire_weather
+    if len(df) < 10:
+        return None
+    
+    corr = fire_weather_correlation(df)
+    labels = [SHORT_NAMES.get(c, c) for c in corr.columns]
+    
+    fig = go.Figure(data=go.Heatmap(
+        z=corr.to_numpy(),
+        x=labels,
+        y=labels,
+        colorscale='RdBu_r',
+        zmin=-1,
+        zmax=1,
+        text=np.round(corr.to_numpy(), 2),
+        texttemplate='%{text}',
+        colorbar=dict(title="ρ")
+    ))
+    
+    fig.update_layout(
+        title="Corrélations Météo du Jour × Surface Brûlée (Spearman)",
+        height=450,
+        template='plotly_white'
+    )
+    
+    return fig
+
+
+@profile()
 def create_risque_feu_chart(gdf):
     """Top communes par risque"""
     gdf_sorted = gdf.nlargest(20, 'risque_feu')
@@ -361,6 +531,7 @@ def create_risque_feu_chart(gdf):
     return fig
 
 
+@profile()
 def create_foret_analysis(gdf):
     """Couverture forestière"""
     by_dept = gdf.groupby('dept_label').agg({
@@ -401,6 +572,7 @@ def calculate_statistics(gdf, incendies_df):
 
 # ==================== CARTES GÉOSPATIALES ====================
 
+@profile()
 def create_interactive_map(gdf, incendies_df=None):
     """Crée une carte interactive des communes et risques"""
     
@@ -451,6 +623,7 @@ def create_interactive_map(gdf, incendies_df=None):
     return m
 
 
+@profile()
 def create_pente_map(gdf):
     """Crée une carte choroplèthe des pentes"""
     
@@ -504,6 +677,7 @@ def create_pente_map(gdf):
     return m
 
 
+@profile()
 def create_incendies_heatmap(incendies_df):
     """Crée une heatmap des incendies"""
     
@@ -564,11 +738,9 @@ def main():
         st.stop()
     
     with st.spinner("📊 Chargement incendies..."):
-        incendies_df = load_incendies_parquet()
+        incendies_df = load_incendies()
     
-    gdf = prepare_geodata(gdf_13, gdf_05)
-    if incendies_df is not None:  
-        incendies_df = prepare_incendies(incendies_df)
+    gdf = load_geodata()
     
     # ==================== STATISTIQUES ====================
     
@@ -655,6 +827,46 @@ def main():
     
     st.markdown("---")
     
+    # ==================== MÉTÉO DES JOURS DE FEU ====================
+    
+    st.subheader("🌡️ Météo des Jours de Feu")
+    
+    fire_weather = load_fire_weather()
+    
+    if fire_weather is not None:
+        matched = fire_weather['TX'].notna() if 'TX' in fire_weather.columns else pd.Series(False, index=fire_weather.index)
+        
+        col1, col2, col3 = st.columns(3)
+        
+        with col1:
+            st.metric("Feux avec météo", f"{matched.sum():,}", delta=f"{matched.mean() * 100:.0f} % des feux", delta_color="off")
+        
+        with col2:
+            st.metric("Distance médiane à la station", f"{fire_weather.loc[matched, 'distance_km'].median():.1f} km" if matched.any() else "—")
+        
+        with col3:
+            st.metric("TX moyenne les jours de feu", f"{fire_weather.loc[matched, 'TX'].mean():.1f} °C" if matched.any() else "—")
+        
+        col1, col2 = st.columns(2)
+        
+        with col1:
+            fig = create_fires_by_fwi_class(fire_weather)
+            if fig:
+                st.plotly_chart(fig, use_container_width=True)
+        
+        with col2:
+            fig = create_fire_weather_correlation(fire_weather)
+            if fig:
+                st.plotly_chart(fig, use_container_width=True)
+        
+        st.info("""
+        💡 **Méthode** : chaque feu est rattaché aux stations les plus proches du centre de sa commune
+        (à défaut, de son département), puis à la mesure du jour de l'alerte. Seuls les feux couverts
+        par la période et les stations des données météo sont comptés.
+        """)
+    
+    st.markdown("---")
+    
     # ==================== ANALYSES GÉOSPATIALES ====================
     
     st.subheader("📊 Analyses Géospatiales")
@@ -711,4 +923,6 @@ def main():
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    with profile("page Analyse Incendies"):
+        main()
+    display_profiling_panel("Analyse Incendies")
\ No newline at end of file
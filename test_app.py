@@ -108,6 +108,44 @@ for page in pages:
     else:
         print(f"❌ {page} MANQUANT!")
 
+# 7. Vérifier les calculs sur des données synthétiques
+print("\n🧮 Vérification des calculs...")
+
+try:
+    import numpy as np
+    import plotly.graph_objects as go
+    from components.charts import line_trace
+    from core.performance import get_performance_config
+
+    config = get_performance_config()
+    dates = pd.date_range("1960-01-01", periods=config['webgl_threshold'] * 2, freq="D")
+    values = np.sin(np.arange(len(dates)) / 30)
+
+    trace = line_trace(dates, values)
+    assert config['chart_renderer'] != 'webgl' or isinstance(trace, go.Scattergl), "longue série sans WebGL"
+    assert len(trace.x) <= config['max_line_points'], "série non réduite"
+    assert isinstance(line_trace(dates[:100], values[:100]), go.Scatter), "courte série en WebGL"
+    print("✅ line_trace : réduction et rendu WebGL des longues séries")
+
+    from core.quantiles import build_quantile_cube
+
+    # 302 valeurs dans un seul station-mois (jours en double), 300 dans une classe
+    doublons = pd.DataFrame({
+        'NUM_POSTE': 13001009,
+        'AAAAMMJJ': 20240715,
+        'TX': np.concatenate([np.full(300, 30.0), [31.0, 32.0]]),
+    })
+    cube = build_quantile_cube(doublons, 'TX')
+    assert cube.histogram().sum() == 302, "effectifs du cube débordés"
+    assert cube.histogram(months=[7]).sum() == 302, "effectifs du cube débordés (mois)"
+    assert cube.replace_cells(cube).histogram().sum() == 302, "effectifs débordés après replace_cells"
+    assert cube.percentiles([50]).iloc[0] == 30.0, "médiane du cube erronée"
+    print("✅ QuantileCube : plus de 255 valeurs par station-mois")
+
+except Exception as e:
+    print(f"❌ Erreur de calcul: {e}")
+    sys.exit(1)
+
 print("\n" + "=" * 60)
 print("✨ Vérification terminée avec succès!")
 print("\n🚀 Pour lancer l'application:")
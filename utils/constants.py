@@ -71,7 +71,15 @@ COLUMN_DESCRIPTIONS = {
     
     # Autres
     'DG': 'Degrés jours de chauffage',
-    'QDG': 'Qualité degrés jours'
+    'QDG': 'Qualité degrés jours',
+    
+    # Indices feu (calculés, core.fwi)
+    'FFMC': 'Humidité des combustibles fins (FFMC)',
+    'DMC': "Humidité de l'humus (DMC)",
+    'DC': 'Indice de sécheresse (DC)',
+    'ISI': 'Indice de propagation initiale (ISI)',
+    'BUI': 'Combustible disponible (BUI)',
+    'FWI': 'Indice Forêt Météo (IFM / FWI)'
 }
 
 # ==================== NOMS COURTS POUR AFFICHAGE ====================
@@ -83,7 +91,8 @@ SHORT_NAMES = {
     'TAMPLI': 'Amplitude',
     'RR': 'Précipitations',
     'FFM': 'Vent Moyen',
-    'FXY': 'Rafales Max'
+    'FXY': 'Rafales Max',
+    'FWI': 'IFM'
 }
 
 # ==================== UNITÉS ====================
@@ -137,16 +146,22 @@ THRESHOLDS = {
 # ==================== CODES QUALITÉ ====================
 
 QUALITY_CODES = {
-    '0': 'Donnée absente',
-    '1': 'Donnée correcte',
-    '2': 'Donnée douteuse',
-    '3': 'Donnée modifiée',
-    '4': 'Donnée reconstituée',
-    '5': 'Donnée non validée',
-    '9': 'Donnée manquante'
+    0: 'Donnée protégée (validée définitivement)',
+    1: 'Donnée validée',
+    2: 'Donnée douteuse en cours de vérification',
+    9: 'Donnée filtrée (non encore validée)'
 }
 
-QUALITY_GOOD = ['1']  # Codes considérés comme bonne qualité
+QUALITY_GOOD = [0, 1]  # Codes considérés comme bonne qualité
+
+# Codes acceptés par variable ('default' pour les autres), voir core.quality
+QUALITY_RULES = {
+    'default': QUALITY_GOOD,
+    # Heures, sol et cumuls secondaires : rarement validés, données filtrées acceptées
+    'HTN': [0, 1, 9], 'HTX': [0, 1, 9], 'HXY': [0, 1, 9], 'HXI': [0, 1, 9],
+    'HXI2': [0, 1, 9], 'HXI3S': [0, 1, 9], 'DRR': [0, 1, 9], 'DG': [0, 1, 9],
+    'TNSOL': [0, 1, 9], 'TN50': [0, 1, 9]
+}
 
 # ==================== SAISONS ====================
 
@@ -163,6 +178,11 @@ MONTHS_FR = {
     9: 'Septembre', 10: 'Octobre', 11: 'Novembre', 12: 'Décembre'
 }
 
+MONTHS_SHORT_FR = {
+    1: 'Jan', 2: 'Fév', 3: 'Mar', 4: 'Avr', 5: 'Mai', 6: 'Juin',
+    7: 'Juil', 8: 'Août', 9: 'Sep', 10: 'Oct', 11: 'Nov', 12: 'Déc'
+}
+
 # ==================== PALETTES DE COULEURS ====================
 
 COLOR_PALETTES = {
@@ -299,4 +319,24 @@ MAIN_COLUMNS = {
 # Colonnes numériques à convertir
 NUMERIC_COLUMNS = ['LAT', 'LON', 'ALTI', 'RR', 'TN', 'TX', 'TM', 'TAMPLI', 
                    'TNSOL', 'TN50', 'FFM', 'FF2M', 'FXY', 'FXI', 'DXY', 
-                   'DXI', 'DRR', 'DG']
\ No newline at end of file
+                   'DXI', 'DRR', 'DG']
+# ==================== NORMALES CLIMATOLOGIQUES ====================
+
+# Dossier des données dérivées (précalculées à l'ingestion)
+PROCESSED_DIR = 'data/processed'
+
+# Période de référence des normales (années incluses)
+REFERENCE_PERIOD = (1991, 2020)
+
+# Variables pour lesquelles les normales sont précalculées
+NORMALS_VARIABLES = ['TN', 'TX', 'TM', 'RR', 'FFM', 'FXY']
+
+# ==================== SOURCES DE DONNÉES ====================
+METEO_FILE = 'data/raw/meteo_sample.parquet'
+INCENDIES_FILE = 'data/raw/incendies_sample.parquet'
+# Jeu météo partitionné par département et année (python -m core ingest)
+METEO_DATASET_DIR = 'data/processed/meteo'
+SHAPEFILES_INCENDIES = {
+    '13': 'data/raw/dep_13/communes_13_with_data_for_carte_danger_incendie.shp',
+    '05': 'data/raw/dep_05/communes_05_with_data_for_carte_danger_incendie.shp',
+}
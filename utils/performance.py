@@ -1,259 +1,61 @@
 """
 Module d'optimisation de performance pour données massives
+
+Adaptateurs Streamlit de core.performance (cache st.cache_data) et panneau
+de profilage en mode débogage.
 """
 
-import pandas as pd
-import numpy as np
+import os
 import streamlit as st
+from core import performance
+from core.performance import optimize_plotly_figure, get_performance_config
+from core.profiling import collect_spans, slowest_spans, export_spans, PROFILING_LOG
 
-
-@st.cache_data
-def sample_data_for_viz(df: pd.DataFrame, max_points: int = 10000, method: str = 'random') -> pd.DataFrame:
-    """
-    Échantillonne les données pour visualisation rapide
-    
-    Args:
-        df: DataFrame complet
-        max_points: Nombre maximum de points à afficher
-        method: 'random', 'first', 'last', 'stratified'
-        
-    Returns:
-        DataFrame échantillonné
-    """
-    if len(df) <= max_points:
-        return df
-    
-    if method == 'random':
-        return df.sample(n=max_points, random_state=42)
-    elif method == 'first':
-        return df.head(max_points)
-    elif method == 'last':
-        return df.tail(max_points)
-    elif method == 'stratified' and 'annee' in df.columns:
-        # Échantillonnage stratifié par année
-        return df.groupby('annee', group_keys=False).apply(
-            lambda x: x.sample(min(len(x), max_points // df['annee'].nunique()))
-        )
-    
-    return df.sample(n=max_points, random_state=42)
-
-
-@st.cache_data
-def aggregate_temporal_data(df: pd.DataFrame, freq: str = 'M') -> pd.DataFrame:
-    """
-    Agrège les données temporelles pour réduire le nombre de points
-    
-    Args:
-        df: DataFrame avec colonne 'date'
-        freq: Fréquence d'agrégation ('D', 'W', 'M', 'Y')
-        
-    Returns:
-        DataFrame agrégé
-    """
-    if 'date' not in df.columns:
-        return df
-    
-    df_agg = df.set_index('date').resample(freq).agg({
-        col: 'mean' for col in df.select_dtypes(include=[np.number]).columns
-    })
-    
-    return df_agg.reset_index()
-
-
-@st.cache_data
-def reduce_dataframe_memory(df: pd.DataFrame) -> pd.DataFrame:
-    """
-    Réduit l'utilisation mémoire du DataFrame
-    
-    Args:
-        df: DataFrame à optimiser
-        
-    Returns:
-        DataFrame optimisé
-    """
-    df = df.copy()
-    
-    for col in df.select_dtypes(include=['float']).columns:
-        df[col] = pd.to_numeric(df[col], downcast='float')
-    
-    for col in df.select_dtypes(include=['integer']).columns:
-        df[col] = pd.to_numeric(df[col], downcast='integer')
-    
-    for col in df.select_dtypes(include=['object']).columns:
-        if df[col].nunique() / len(df) < 0.5:
-            df[col] = df[col].astype('category')
-    
-    return df
-
-
-@st.cache_data
-def filter_data_by_date_range(df: pd.DataFrame, start_date=None, end_date=None) -> pd.DataFrame:
-    """
-    Filtre efficace par plage de dates
-    
-    Args:
-        df: DataFrame avec colonne 'date'
-        start_date: Date de début
-        end_date: Date de fin
-        
-    Returns:
-        DataFrame filtré
-    """
-    if 'date' not in df.columns:
-        return df
-    
-    mask = pd.Series(True, index=df.index)
-    
-    if start_date:
-        mask &= df['date'] >= start_date
-    
-    if end_date:
-        mask &= df['date'] <= end_date
-    
-    return df[mask]
-
-
-@st.cache_data
-def get_top_n_categories(df: pd.DataFrame, column: str, n: int = 10) -> list:
-    """
-    Récupère les N catégories les plus fréquentes
-    
-    Args:
-        df: DataFrame
-        column: Nom de la colonne
-        n: Nombre de catégories à retourner
-        
-    Returns:
-        Liste des top N catégories
-    """
-    return df[column].value_counts().head(n).index.tolist()
-
-
-def optimize_plotly_figure(fig, max_points: int = 5000):
-    """
-    Optimise une figure Plotly pour performance
-    
-    Args:
-        fig: Figure Plotly
-        max_points: Nombre max de points
-        
-    Returns:
-        Figure optimisée
-    """
-    # Réduire la qualité des rendus pour vitesse
-    fig.update_layout(
-        hovermode='closest',  # Au lieu de 'x' ou 'y'
-        dragmode='pan',  # Désactiver zoom par défaut
-    )
-    
-    # Désactiver les animations
-    fig.layout.transition = {'duration': 0}
-    
-    return fig
-
-
-@st.cache_data
-def paginate_dataframe(df: pd.DataFrame, page_size: int = 100, page_num: int = 1) -> pd.DataFrame:
-    """
-    Pagination pour grands DataFrames
-    
-    Args:
-        df: DataFrame complet
-        page_size: Taille de la page
-        page_num: Numéro de page (1-indexé)
-        
-    Returns:
-        DataFrame paginé
-    """
-    start_idx = (page_num - 1) * page_size
-    end_idx = start_idx + page_size
-    
-    return df.iloc[start_idx:end_idx]
+sample_data_for_viz = st.cache_data(performance.sample_data_for_viz)
+aggregate_temporal_data = st.cache_data(performance.aggregate_temporal_data)
+reduce_dataframe_memory = st.cache_data(performance.reduce_dataframe_memory)
+filter_data_by_date_range = st.cache_data(performance.filter_data_by_date_range)
+get_top_n_categories = st.cache_data(performance.get_top_n_categories)
+paginate_dataframe = st.cache_data(performance.paginate_dataframe)
+limit_map_markers = st.cache_data(performance.limit_map_markers)
+create_summary_stats = st.cache_data(performance.create_summary_stats)
 
 
-@st.cache_data
-def limit_map_markers(gdf, max_markers: int = 500):
-    """
-    Limite le nombre de marqueurs sur une carte
-    
-    Args:
-        gdf: GeoDataFrame
-        max_markers: Nombre maximum de marqueurs
-        
-    Returns:
-        GeoDataFrame échantillonné
-    """
-    if len(gdf) <= max_markers:
-        return gdf
-    
-    # Échantillonnage spatial intelligent
-    return gdf.sample(n=max_markers, random_state=42)
+def debug_mode() -> bool:
+    """Mode débogage : paramètre d'URL ?debug=1 ou variable METEO_DEBUG=1"""
+    if os.environ.get('METEO_DEBUG', '0') == '1':
+        return True
+    try:
+        return st.query_params.get('debug') == '1'
+    except Exception:
+        return False
 
 
-def get_performance_config():
+def display_profiling_panel(page: str, n: int = 10):
     """
-    Retourne la configuration de performance recommandée
+    Panneau de débogage : spans les plus lents de l'exécution courante
     
-    Returns:
-        dict: Configuration
-    """
-    return {
-        'max_chart_points': 10000,
-        'max_map_markers': 500,
-        'max_table_rows': 1000,
-        'aggregation_freq': 'M',  # Mensuel par défaut
-        'enable_downsampling': True,
-        'enable_caching': True,
-        'chart_renderer': 'webgl'  # Pour Plotly
-    }
-
-
-@st.cache_data
-def create_summary_stats(df: pd.DataFrame, group_by: str = None) -> pd.DataFrame:
-    """
-    Crée des statistiques résumées au lieu d'afficher toutes les données
+    À appeler en fin de page. Les spans sont toujours vidés (une collecte
+    par exécution) ; en mode débogage ils sont aussi affichés dans la barre
+    latérale et ajoutés au journal JSON-lines.
     
     Args:
-        df: DataFrame
-        group_by: Colonne de groupement
-        
-    Returns:
-        DataFrame de statistiques
+        page: Nom de la page (ajouté au journal)
+        n: Nombre de spans affichés
     """
-    numeric_cols = df.select_dtypes(include=[np.number]).columns
+    spans = collect_spans()
     
-    if group_by and group_by in df.columns:
-        stats = df.groupby(group_by)[numeric_cols].agg(['count', 'mean', 'std', 'min', 'max'])
-    else:
-        stats = df[numeric_cols].describe()
+    if not spans or not debug_mode():
+        return
     
-    return stats
-
-
-class PerformanceMonitor:
-    """Moniteur de performance pour débogage"""
-    
-    def __init__(self):
-        self.timings = {}
+    export_spans(spans, context={'page': page})
     
-    def start(self, label: str):
-        """Démarre un timer"""
-        import time
-        self.timings[label] = {'start': time.time()}
+    total_ms = sum(span.duration_ms for span in spans if span.depth == 0)
     
-    def end(self, label: str):
-        """Arrête un timer et affiche le temps"""
-        import time
-        if label in self.timings:
-            elapsed = time.time() - self.timings[label]['start']
-            self.timings[label]['elapsed'] = elapsed
-            return elapsed
-        return 0
-    
-    def display_stats(self):
-        """Affiche les statistiques de performance"""
-        if self.timings:
-            st.sidebar.markdown("### ⚡ Performance")
-            for label, data in self.timings.items():
-                if 'elapsed' in data:
-                    st.sidebar.text(f"{label}: {data['elapsed']:.2f}s")
+    with st.sidebar.expander("⚡ Profilage", expanded=False):
+        st.caption(f"{len(spans)} spans | {total_ms:,.0f} ms | journal : {PROFILING_LOG}")
+        st.dataframe(
+            slowest_spans(spans, n),
+            use_container_width=True,
+            hide_index=True
+        )